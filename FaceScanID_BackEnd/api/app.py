@@ -1,33 +1,52 @@
 # api/app.py
 from flask import Flask, jsonify, request
-import mysql.connector
 from mysql.connector import Error
 from flask_cors import CORS
 import sys
 import os
+import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import config
+from db_pool import conexao
+from src.pessoas import (
+    SQL_INSERIR_PESSOA, SQL_COLUNAS_PESSOAS, EsquemaPessoas,
+    normalizar_nome_url, extrair_campos, sql_buscar_por, sql_buscar_prefixo, projetar_colunas,
+    paginar, ler_limite
+)
+from src.recognition_service import (
+    obter_servico, aquecer_em_segundo_plano, decodificar_imagem, decodificar_ndjson
+)
+from src.bulk_import import PERFIL_API, importar_stream, stream_texto
+from src.lookup_cache import criar_cache_de_ambiente
 
 # Inicializa o aplicativo Flask
 app = Flask(__name__)
 CORS(app)  # Habilita CORS para permitir acesso de diferentes origens
 
-def conectar_banco():
+# Carrega modelo e galeria uma vez por processo, sem bloquear a inicialização
+aquecer_em_segundo_plano()
+
+# Limite de imagens por requisição em /reconhecer/lote
+MAX_IMAGENS_LOTE = int(os.getenv("MAX_IMAGENS_LOTE", 64))
+
+# Linhas por transação em /adicionar/lote
+TAMANHO_LOTE_IMPORTACAO = int(os.getenv("TAMANHO_LOTE_IMPORTACAO", 1000))
+
+# Cache de /buscar (CACHE_BUSCA_TAMANHO=0 desativa)
+cache_busca = criar_cache_de_ambiente()
+
+def ler_imagens_lote():
     """
-    Estabelece conexão com o banco de dados MySQL
-    usando as variáveis de ambiente carregadas em config.py.
+    Lê as imagens de /reconhecer/lote na ordem de envio.
+    Aceita multipart (vários arquivos) ou NDJSON, uma linha por imagem:
+    {"id": "...", "imagem": "<base64>"}. Linhas inválidas viram None.
     """
-    try:
-        return mysql.connector.connect(
-            host=config.DB_HOST,
-            user=config.DB_USER,
-            password=config.DB_PASSWORD,
-            database=config.DB_NAME,
-            port=config.DB_PORT
-        )
-    except Error as e:
-        print(f"Erro ao conectar ao MySQL: {e}")
-        return None
+    if request.files:
+        return [
+            (arquivo.filename, decodificar_imagem(arquivo.read()))
+            for _, arquivo in request.files.items(multi=True)
+        ]
+    return decodificar_ndjson(request.get_data())
 
 @app.route("/buscar/<nome_completo>", methods=["GET"])
 def buscar_usuario(nome_completo):
@@ -35,18 +54,21 @@ def buscar_usuario(nome_completo):
     Busca um usuário pelo nome completo.
     Se a URL enviar nome_completo com `_`, será convertido para espaços.
     """
-    nome_completo = nome_completo.replace("_", " ")  # Converte underscores para espaços
-
-    conn = conectar_banco()
-    if not conn:
-        return jsonify({"error": "Falha na conexão com o banco de dados"}), 500
+    nome_completo = normalizar_nome_url(nome_completo)  # Converte underscores para espaços
 
+    encontrado, usuario = cache_busca.obter(nome_completo) if cache_busca else (False, None)
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM pessoas WHERE nome_completo = %s", (nome_completo,))
-        usuario = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        if not encontrado:
+            geracao = cache_busca.geracao if cache_busca else None
+            sql = esquema_pessoas().sql_buscar_por_nome
+            # Conexão retirada do pool e devolvida ao final do bloco
+            with conexao() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(sql, (nome_completo,))
+                usuario = cursor.fetchone()
+                cursor.close()
+            if cache_busca:
+                cache_busca.guardar(nome_completo, usuario, geracao)
 
         if usuario:
             return jsonify(usuario), 200  # Retorna os dados do usuário encontrado
@@ -56,6 +78,84 @@ def buscar_usuario(nome_completo):
         print(f"Erro ao buscar usuário: {e}")
         return jsonify({"error": "Erro interno do servidor"}), 500
 
+def consultar(sql, parametros, uma_linha=False):
+    """Executa um SELECT com uma conexão do pool; retorna dicts (ou um dict/None)."""
+    with conexao() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, parametros)
+        resultado = cursor.fetchone() if uma_linha else cursor.fetchall()
+        cursor.close()
+    return resultado
+
+# Colunas da tabela 'pessoas' em uso, lidas do banco no primeiro uso
+_esquema = None
+
+def esquema_pessoas():
+    global _esquema
+    if _esquema is None:
+        _esquema = EsquemaPessoas(consultar(SQL_COLUNAS_PESSOAS, ()))
+    return _esquema
+
+@app.route("/pessoas/<int:valor>", defaults={"chave": "id"}, methods=["GET"])
+@app.route("/pessoas/<any(cpf, documento):chave>/<valor>", methods=["GET"])
+def buscar_pessoa(chave, valor):
+    """
+    Busca uma pessoa por id (/pessoas/42), CPF (/pessoas/cpf/...) ou
+    documento de identidade (/pessoas/documento/...).
+    ?campos=nome_completo,telefone limita as colunas devolvidas.
+    """
+    try:
+        esquema = esquema_pessoas()
+    except Error as e:
+        print(f"Erro ao buscar pessoa: {e}")
+        return jsonify({"error": "Erro interno do servidor"}), 500
+    if chave not in esquema.chaves:
+        return jsonify({"error": f"Busca por '{chave}' indisponível: a tabela não tem essa coluna"}), 501
+
+    try:
+        colunas = projetar_colunas(request.args.get("campos"), esquema.colunas_pessoa, esquema.colunas)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        pessoa = consultar(sql_buscar_por(esquema.chaves[chave], colunas), (valor,), uma_linha=True)
+    except Error as e:
+        print(f"Erro ao buscar pessoa: {e}")
+        return jsonify({"error": "Erro interno do servidor"}), 500
+
+    if pessoa:
+        return jsonify(pessoa), 200
+    return jsonify({"error": "Pessoa não encontrada"}), 404
+
+@app.route("/pessoas", methods=["GET"])
+def listar_pessoas():
+    """
+    Pessoas cujo nome começa com ?prefixo=, em ordem alfabética.
+    Paginação por ?limite= e ?cursor= (o 'proximo' da página anterior);
+    ?campos= escolhe as colunas (padrão: id, nome e documento).
+    """
+    prefixo = normalizar_nome_url(request.args.get("prefixo", "")).strip()
+    if not prefixo:
+        return jsonify({"error": "Parâmetro 'prefixo' é obrigatório"}), 400
+    try:
+        esquema = esquema_pessoas()
+    except Error as e:
+        print(f"Erro ao listar pessoas: {e}")
+        return jsonify({"error": "Erro interno do servidor"}), 500
+    try:
+        limite = ler_limite(request.args.get("limite"))
+        colunas = projetar_colunas(request.args.get("campos"), esquema.colunas_resumo, esquema.colunas)
+        sql, parametros = sql_buscar_prefixo(prefixo, limite, request.args.get("cursor"), colunas)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        linhas = consultar(sql, parametros)
+    except Error as e:
+        print(f"Erro ao listar pessoas: {e}")
+        return jsonify({"error": "Erro interno do servidor"}), 500
+    return jsonify(paginar(linhas, limite)), 200
+
 @app.route("/adicionar", methods=["POST"])
 def adicionar_usuario():
     """
@@ -64,104 +164,128 @@ def adicionar_usuario():
     """
     dados = request.json  # Obtém dados da requisição JSON
 
-    # Extrai as colunas
-    nome_completo = dados.get("nome_completo")
-    doc_identidade = dados.get("doc_identidade")
-    titulo_eleitor = dados.get("titulo_eleitor")
-    certidao_militar = dados.get("certidao_militar")
-    possui_registro_classe = dados.get("possui_registro_classe")
-    numero_registro_classe = dados.get("numero_registro_classe")
-    pis_pasep = dados.get("pis_pasep")
-    tipo_sanguineo = dados.get("tipo_sanguineo")
-    telefone = dados.get("telefone")
-    endereco = dados.get("endereco")
-    emails = dados.get("emails")
-    possui_imoveis = dados.get("possui_imoveis")
-    tipo_imovel = dados.get("tipo_imovel")
-    registro_imovel = dados.get("registro_imovel")
-    endereco_imovel = dados.get("endereco_imovel")
-    possui_veiculos = dados.get("possui_veiculos")
-    tipo_veiculo = dados.get("tipo_veiculo")
-    marca_veiculo = dados.get("marca_veiculo")
-    registro_veiculo = dados.get("registro_veiculo")
-    possui_parente = dados.get("possui_parente")
-    nome_parente = dados.get("nome_parente")
-    doc_parente = dados.get("doc_parente")
-    telefone_parente = dados.get("telefone_parente")
-    endereco_parente = dados.get("endereco_parente")
-
-    # Verifica se pelo menos nome_completo e doc_identidade foram fornecidos
-    if not nome_completo or not doc_identidade:
-        return jsonify({"error": "Campo 'nome_completo' e 'doc_identidade' são obrigatórios"}), 400
-    
-    conn = conectar_banco()
-    if not conn:
-        return jsonify({"error": "Falha na conexão com o banco de dados"}), 500
+    # Extrai as colunas e verifica os campos obrigatórios
+    valores, erro = extrair_campos(dados)
+    if erro:
+        return jsonify({"error": erro}), 400
     
     try:
-        cursor = conn.cursor()
-        # Insere todos os campos na tabela
-        cursor.execute("""
-            INSERT INTO pessoas (
-                nome_completo,
-                doc_identidade,
-                titulo_eleitor,
-                certidao_militar,
-                possui_registro_classe,
-                numero_registro_classe,
-                pis_pasep,
-                tipo_sanguineo,
-                telefone,
-                endereco,
-                emails,
-                possui_imoveis,
-                tipo_imovel,
-                registro_imovel,
-                endereco_imovel,
-                possui_veiculos,
-                tipo_veiculo,
-                marca_veiculo,
-                registro_veiculo,
-                possui_parente,
-                nome_parente,
-                doc_parente,
-                telefone_parente,
-                endereco_parente
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            nome_completo,
-            doc_identidade,
-            titulo_eleitor,
-            certidao_militar,
-            possui_registro_classe,
-            numero_registro_classe,
-            pis_pasep,
-            tipo_sanguineo,
-            telefone,
-            endereco,
-            emails,
-            possui_imoveis,
-            tipo_imovel,
-            registro_imovel,
-            endereco_imovel,
-            possui_veiculos,
-            tipo_veiculo,
-            marca_veiculo,
-            registro_veiculo,
-            possui_parente,
-            nome_parente,
-            doc_parente,
-            telefone_parente,
-            endereco_parente
-        ))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with conexao() as conn:
+            cursor = conn.cursor()
+            # Insere todos os campos na tabela
+            cursor.execute(SQL_INSERIR_PESSOA, valores)
+            conn.commit()
+            cursor.close()
+        if cache_busca:
+            cache_busca.invalidar(dados["nome_completo"])
         
         return jsonify({"message": "Usuário adicionado com sucesso!"}), 201
     except Error as e:
         print(f"Erro ao adicionar usuário: {e}")
         return jsonify({"error": "Erro ao inserir no banco de dados"}), 500
 
+@app.route("/adicionar/lote", methods=["POST"])
+def adicionar_lote():
+    """
+    Adiciona usuários em massa a partir de NDJSON (um JSON de /adicionar por
+    linha) ou CSV com cabeçalho (Content-Type: text/csv). O corpo é lido em
+    streaming e inserido em lotes, uma transação por lote.
+    Retorna contadores, linhas/s e o motivo de cada linha rejeitada.
+    """
+    formato = "csv" if request.mimetype == "text/csv" else "ndjson"
+    lote = request.args.get("lote", TAMANHO_LOTE_IMPORTACAO, type=int)
+
+    try:
+        relatorio = importar_stream(
+            stream_texto(request.stream), formato, perfil=PERFIL_API, tamanho_lote=max(1, lote)
+        )
+    except UnicodeDecodeError:
+        return jsonify({"error": "O corpo deve estar em UTF-8"}), 400
+    except Error as e:
+        print(f"Erro na importação em lote: {e}")
+        return jsonify({"error": "Erro ao inserir no banco de dados"}), 500
+    finally:
+        # Lotes anteriores a uma falha já foram gravados
+        if cache_busca:
+            cache_busca.limpar()
+
+    status = 201 if relatorio.inseridos else 400
+    return jsonify(relatorio.como_dict()), status
+
+@app.route("/admin/cache", methods=["GET"])
+def estatisticas_cache():
+    """Contadores do cache de /buscar deste processo (acertos, faltas, remoções...)."""
+    if cache_busca is None:
+        return jsonify({"ativo": False}), 200
+    return jsonify({"ativo": True, **cache_busca.estatisticas()}), 200
+
+@app.route("/admin/galeria", methods=["GET"])
+def estado_galeria():
+    """Versão e tamanho da galeria em uso neste processo."""
+    return jsonify(obter_servico().estado_galeria()), 200
+
+@app.route("/admin/galeria/recarregar", methods=["POST"])
+def recarregar_galeria():
+    """
+    Recarrega a galeria agora; as consultas em andamento terminam na antiga.
+    Com ?forcar=0, só recarrega se train.py gerou uma nova versão.
+    """
+    servico = obter_servico()
+    try:
+        trocada = servico.recarregar_galeria(forcar=request.args.get("forcar", "1") != "0")
+    except Exception as e:
+        print(f"Erro ao recarregar a galeria: {e}")
+        return jsonify({"error": "Erro ao recarregar a galeria"}), 500
+    return jsonify({"recarregada": trocada, **servico.estado_galeria()}), 200
+
+@app.route("/reconhecer", methods=["POST"])
+def reconhecer():
+    """
+    Reconhece os rostos de uma imagem JPEG/PNG.
+    Aceita upload multipart (campo 'imagem') ou os bytes da imagem no corpo.
+    Retorna identidade, distância e bounding box de cada rosto.
+    """
+    arquivo = request.files.get("imagem") or next(iter(request.files.values()), None)
+    dados = arquivo.read() if arquivo else request.get_data()
+
+    img = decodificar_imagem(dados)
+    if img is None:
+        return jsonify({"error": "Imagem ausente ou inválida (envie JPEG/PNG)"}), 400
+
+    try:
+        inicio = time.perf_counter()
+        faces = obter_servico().reconhecer(img)
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        return jsonify({"faces": faces, "tempo_ms": round(tempo_ms, 1)}), 200
+    except Exception as e:
+        print(f"Erro no reconhecimento: {e}")
+        return jsonify({"error": "Erro interno no reconhecimento"}), 500
+
+@app.route("/reconhecer/lote", methods=["POST"])
+def reconhecer_lote():
+    """
+    Reconhece um lote de imagens (multipart ou NDJSON) com um único forward
+    pass para todos os rostos. Os resultados voltam na ordem de entrada,
+    cada um com seu próprio campo 'error'.
+    """
+    imagens = ler_imagens_lote()
+    if not imagens:
+        return jsonify({"error": "Nenhuma imagem enviada"}), 400
+    if len(imagens) > MAX_IMAGENS_LOTE:
+        return jsonify({"error": f"Máximo de {MAX_IMAGENS_LOTE} imagens por lote"}), 413
+
+    try:
+        inicio = time.perf_counter()
+        resultados = obter_servico().reconhecer_lote([img for _, img in imagens])
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+    except Exception as e:
+        print(f"Erro no reconhecimento em lote: {e}")
+        return jsonify({"error": "Erro interno no reconhecimento"}), 500
+
+    for (identificador, _), resultado in zip(imagens, resultados):
+        resultado["id"] = identificador
+    return jsonify({"resultados": resultados, "tempo_ms": round(tempo_ms, 1)}), 200
+
 if __name__ == "__main__":
+    config.test_database_connection()
     app.run(debug=True, host="0.0.0.0", port=5000)
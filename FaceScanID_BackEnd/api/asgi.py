@@ -0,0 +1,366 @@
+# api/asgi.py
+"""
+Variante ASGI (Starlette) da API, com as mesmas rotas de api/app.py.
+- Consultas à tabela 'pessoas' via pool assíncrono (aiomysql)
+- Reconhecimento em um pool de processos limitado: a inferência não
+  bloqueia o loop de eventos e as buscas continuam fluindo
+
+Execução (a partir da raiz do projeto):
+    uvicorn api.asgi:app --host 0.0.0.0 --port 8000 --workers 2
+"""
+import asyncio
+import io
+import json
+import os
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+import aiomysql
+from mysql.connector import Error
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import DB_CONFIG, DB_POOL_CONFIG
+from src.bulk_import import PERFIL_API, importar_stream, stream_texto
+from src.lookup_cache import criar_cache_de_ambiente
+from src.pessoas import (
+    SQL_INSERIR_PESSOA, SQL_COLUNAS_PESSOAS, EsquemaPessoas,
+    CHAVES_BUSCA, normalizar_nome_url, extrair_campos, sql_buscar_por, sql_buscar_prefixo,
+    projetar_colunas, paginar, ler_limite
+)
+from src.recognition_service import (
+    inicializar_worker, ler_ndjson, reconhecer_bytes, reconhecer_lote_bytes,
+    recarregar_galeria as recarregar_galeria_worker, estado_galeria as estado_galeria_worker
+)
+
+# Processos de inferência e quantas requisições podem esperar por eles
+INFERENCE_WORKERS = int(os.getenv("ASGI_INFERENCE_WORKERS", 2))
+INFERENCE_QUEUE = int(os.getenv("ASGI_INFERENCE_QUEUE", INFERENCE_WORKERS * 2))
+MAX_IMAGENS_LOTE = int(os.getenv("MAX_IMAGENS_LOTE", 64))
+TAMANHO_LOTE_IMPORTACAO = int(os.getenv("TAMANHO_LOTE_IMPORTACAO", 1000))
+
+# Cache de /buscar (CACHE_BUSCA_TAMANHO=0 desativa)
+cache_busca = criar_cache_de_ambiente()
+
+
+class RespostaJSON(JSONResponse):
+    """JSON que também serializa datas e decimais vindos do MySQL."""
+
+    def render(self, content):
+        return json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")
+
+
+async def executar_inferencia(request, funcao, *args):
+    """Executa a inferência no pool de processos, respeitando o limite de fila."""
+    estado = request.app.state
+    async with estado.vagas_inferencia:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(estado.executor, funcao, *args)
+
+
+async def buscar_usuario(request):
+    """Busca um usuário pelo nome completo (underscores viram espaços)."""
+    nome_completo = normalizar_nome_url(request.path_params["nome_completo"])
+    encontrado, usuario = cache_busca.obter(nome_completo) if cache_busca else (False, None)
+    if not encontrado:
+        geracao = cache_busca.geracao if cache_busca else None
+        try:
+            async with request.app.state.db.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(request.app.state.esquema.sql_buscar_por_nome, (nome_completo,))
+                    usuario = await cursor.fetchone()
+        except aiomysql.Error as e:
+            print(f"Erro ao buscar usuário: {e}")
+            return RespostaJSON({"error": "Erro interno do servidor"}, status_code=500)
+        if cache_busca:
+            cache_busca.guardar(nome_completo, usuario, geracao)
+
+    if usuario:
+        return RespostaJSON(usuario, status_code=200)
+    return RespostaJSON({"error": "Usuário não encontrado"}, status_code=404)
+
+
+async def consultar(request, sql, parametros, uma_linha=False):
+    """Executa um SELECT no pool assíncrono; retorna dicts (ou um dict/None)."""
+    async with request.app.state.db.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, parametros)
+            return await (cursor.fetchone() if uma_linha else cursor.fetchall())
+
+
+async def buscar_pessoa(request):
+    """Busca uma pessoa por id, CPF ou documento (?campos= limita as colunas)."""
+    chave = request.path_params.get("chave", "id")
+    if chave not in CHAVES_BUSCA:
+        return RespostaJSON({"error": "Use /pessoas/<id>, /pessoas/cpf/<cpf> ou /pessoas/documento/<doc>"},
+                            status_code=404)
+    esquema = request.app.state.esquema
+    if chave not in esquema.chaves:
+        return RespostaJSON({"error": f"Busca por '{chave}' indisponível: a tabela não tem essa coluna"},
+                            status_code=501)
+    try:
+        colunas = projetar_colunas(request.query_params.get("campos"), esquema.colunas_pessoa, esquema.colunas)
+    except ValueError as e:
+        return RespostaJSON({"error": str(e)}, status_code=400)
+
+    try:
+        pessoa = await consultar(request, sql_buscar_por(esquema.chaves[chave], colunas),
+                                 (request.path_params["valor"],), uma_linha=True)
+    except aiomysql.Error as e:
+        print(f"Erro ao buscar pessoa: {e}")
+        return RespostaJSON({"error": "Erro interno do servidor"}, status_code=500)
+
+    if pessoa:
+        return RespostaJSON(pessoa, status_code=200)
+    return RespostaJSON({"error": "Pessoa não encontrada"}, status_code=404)
+
+
+async def listar_pessoas(request):
+    """Pessoas cujo nome começa com ?prefixo=, paginadas por ?limite= e ?cursor=."""
+    prefixo = normalizar_nome_url(request.query_params.get("prefixo", "")).strip()
+    if not prefixo:
+        return RespostaJSON({"error": "Parâmetro 'prefixo' é obrigatório"}, status_code=400)
+    try:
+        limite = ler_limite(request.query_params.get("limite"))
+        esquema = request.app.state.esquema
+        colunas = projetar_colunas(request.query_params.get("campos"), esquema.colunas_resumo, esquema.colunas)
+        sql, parametros = sql_buscar_prefixo(prefixo, limite, request.query_params.get("cursor"), colunas)
+    except ValueError as e:
+        return RespostaJSON({"error": str(e)}, status_code=400)
+
+    try:
+        linhas = await consultar(request, sql, parametros)
+    except aiomysql.Error as e:
+        print(f"Erro ao listar pessoas: {e}")
+        return RespostaJSON({"error": "Erro interno do servidor"}, status_code=500)
+    return RespostaJSON(paginar(linhas, limite), status_code=200)
+
+
+async def adicionar_usuario(request):
+    """Adiciona um novo usuário a partir do JSON recebido."""
+    try:
+        dados = await request.json()
+    except ValueError:
+        dados = None
+
+    valores, erro = extrair_campos(dados)
+    if erro:
+        return RespostaJSON({"error": erro}, status_code=400)
+
+    try:
+        async with request.app.state.db.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(SQL_INSERIR_PESSOA, valores)
+            await conn.commit()
+    except aiomysql.Error as e:
+        print(f"Erro ao adicionar usuário: {e}")
+        return RespostaJSON({"error": "Erro ao inserir no banco de dados"}, status_code=500)
+    if cache_busca:
+        cache_busca.invalidar(dados["nome_completo"])
+    return RespostaJSON({"message": "Usuário adicionado com sucesso!"}, status_code=201)
+
+
+class CorpoAssincrono(io.RawIOBase):
+    """
+    Stream binário síncrono sobre request.stream(), para ser lido em uma
+    thread: cada leitura busca o próximo pedaço do corpo no loop de eventos,
+    então o corpo nunca é carregado inteiro na memória.
+    """
+
+    def __init__(self, pedacos, loop):
+        self._pedacos = pedacos.__aiter__()
+        self._loop = loop
+        self._resto = b""
+
+    def readable(self):
+        return True
+
+    async def _proximo(self):
+        return await self._pedacos.__anext__()
+
+    def readinto(self, destino):
+        while not self._resto:
+            try:
+                self._resto = asyncio.run_coroutine_threadsafe(self._proximo(), self._loop).result()
+            except StopAsyncIteration:
+                return 0
+        n = min(len(destino), len(self._resto))
+        destino[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
+
+
+async def adicionar_lote(request):
+    """
+    Adiciona usuários em massa (NDJSON ou CSV). O corpo é lido em streaming e
+    inserido em lotes pelo mesmo importador de api/app.py (src/bulk_import),
+    em uma thread, uma transação por lote.
+    """
+    formato = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    try:
+        tamanho_lote = max(1, int(request.query_params.get("lote", TAMANHO_LOTE_IMPORTACAO)))
+    except ValueError:
+        return RespostaJSON({"error": "O parâmetro 'lote' deve ser inteiro"}, status_code=400)
+
+    loop = asyncio.get_running_loop()
+    corpo = stream_texto(io.BufferedReader(CorpoAssincrono(request.stream(), loop)))
+    try:
+        relatorio = await loop.run_in_executor(
+            None, partial(importar_stream, corpo, formato, perfil=PERFIL_API, tamanho_lote=tamanho_lote)
+        )
+    except UnicodeDecodeError:
+        return RespostaJSON({"error": "O corpo deve estar em UTF-8"}, status_code=400)
+    except Error as e:
+        print(f"Erro na importação em lote: {e}")
+        return RespostaJSON({"error": "Erro ao inserir no banco de dados"}, status_code=500)
+    finally:
+        # Lotes anteriores a uma falha já foram gravados
+        if cache_busca:
+            cache_busca.limpar()
+
+    return RespostaJSON(relatorio.como_dict(), status_code=201 if relatorio.inseridos else 400)
+
+
+async def estatisticas_cache(request):
+    """Contadores do cache de /buscar deste processo (acertos, faltas, remoções...)."""
+    if cache_busca is None:
+        return RespostaJSON({"ativo": False})
+    return RespostaJSON({"ativo": True, **cache_busca.estatisticas()})
+
+
+async def estado_galeria(request):
+    """Versão e tamanho da galeria de um dos processos de inferência."""
+    try:
+        estado = await executar_inferencia(request, estado_galeria_worker)
+    except Exception as e:
+        print(f"Erro ao consultar a galeria: {e}")
+        return RespostaJSON({"error": "Erro interno ao consultar a galeria"}, status_code=500)
+    return RespostaJSON(estado)
+
+
+async def recarregar_galeria(request):
+    """
+    Recarrega a galeria: um worker recarrega agora e devolve o novo estado; os
+    demais recebem o pedido pelo contador compartilhado na próxima verificação.
+    Com ?forcar=0, só recarrega se train.py gerou uma nova versão.
+    """
+    forcar = request.query_params.get("forcar", "1") != "0"
+    if forcar:
+        with request.app.state.pedidos_recarga.get_lock():
+            request.app.state.pedidos_recarga.value += 1
+    try:
+        estado = await executar_inferencia(request, recarregar_galeria_worker, forcar)
+    except Exception as e:
+        print(f"Erro ao recarregar a galeria: {e}")
+        return RespostaJSON({"error": "Erro ao recarregar a galeria"}, status_code=500)
+    return RespostaJSON({"workers": INFERENCE_WORKERS, **estado})
+
+
+async def reconhecer(request):
+    """Reconhece os rostos de uma imagem (multipart campo 'imagem' ou bytes no corpo)."""
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        formulario = await request.form()
+        arquivo = formulario.get("imagem") or next(iter(formulario.values()), None)
+        dados = await arquivo.read() if hasattr(arquivo, "read") else None
+    else:
+        dados = await request.body()
+
+    try:
+        faces = await executar_inferencia(request, reconhecer_bytes, dados)
+    except Exception as e:
+        print(f"Erro no reconhecimento: {e}")
+        return RespostaJSON({"error": "Erro interno no reconhecimento"}, status_code=500)
+
+    if faces is None:
+        return RespostaJSON({"error": "Imagem ausente ou inválida (envie JPEG/PNG)"}, status_code=400)
+    return RespostaJSON({"faces": faces}, status_code=200)
+
+
+async def reconhecer_lote(request):
+    """Reconhece um lote de imagens (multipart ou NDJSON), na ordem de entrada."""
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        formulario = await request.form()
+        itens = [(arquivo.filename, await arquivo.read())
+                 for _, arquivo in formulario.multi_items() if hasattr(arquivo, "read")]
+    else:
+        # NDJSON: só o base64 é lido aqui; a decodificação fica com o worker
+        itens = ler_ndjson(await request.body())
+
+    if not itens:
+        return RespostaJSON({"error": "Nenhuma imagem enviada"}, status_code=400)
+    if len(itens) > MAX_IMAGENS_LOTE:
+        return RespostaJSON({"error": f"Máximo de {MAX_IMAGENS_LOTE} imagens por lote"}, status_code=413)
+
+    try:
+        resultados = await executar_inferencia(
+            request, reconhecer_lote_bytes, [dados for _, dados in itens]
+        )
+    except Exception as e:
+        print(f"Erro no reconhecimento em lote: {e}")
+        return RespostaJSON({"error": "Erro interno no reconhecimento"}, status_code=500)
+
+    for (identificador, _), resultado in zip(itens, resultados):
+        resultado["id"] = identificador
+    return RespostaJSON({"resultados": resultados}, status_code=200)
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    app.state.db = await aiomysql.create_pool(
+        host=DB_CONFIG["host"],
+        port=DB_CONFIG["port"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        db=DB_CONFIG["database"],
+        minsize=1,
+        maxsize=DB_POOL_CONFIG["pool_size"],
+        pool_recycle=3600,
+    )
+    # Colunas da tabela em uso: chaves de /pessoas/<chave>/ e projeções
+    async with app.state.db.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(SQL_COLUNAS_PESSOAS)
+            app.state.esquema = EsquemaPessoas(await cursor.fetchall())
+    # Cada processo de inferência carrega modelo e galeria uma única vez e
+    # acompanha o contador de pedidos de recarga de /admin/galeria/recarregar.
+    # spawn: este processo já importou o DeepFace/TensorFlow, e um fork
+    # herdaria suas threads e locks em estado indefinido
+    contexto = multiprocessing.get_context("spawn")
+    app.state.pedidos_recarga = contexto.Value("i", 0)
+    app.state.executor = ProcessPoolExecutor(
+        max_workers=INFERENCE_WORKERS, mp_context=contexto, initializer=inicializar_worker,
+        initargs=(app.state.pedidos_recarga,)
+    )
+    app.state.vagas_inferencia = asyncio.Semaphore(INFERENCE_WORKERS + INFERENCE_QUEUE)
+    try:
+        yield
+    finally:
+        app.state.executor.shutdown(wait=False, cancel_futures=True)
+        app.state.db.close()
+        await app.state.db.wait_closed()
+
+
+app = Starlette(
+    routes=[
+        Route("/buscar/{nome_completo}", buscar_usuario, methods=["GET"]),
+        Route("/pessoas", listar_pessoas, methods=["GET"]),
+        Route("/pessoas/{valor:int}", buscar_pessoa, methods=["GET"]),
+        Route("/pessoas/{chave:str}/{valor}", buscar_pessoa, methods=["GET"]),
+        Route("/adicionar", adicionar_usuario, methods=["POST"]),
+        Route("/adicionar/lote", adicionar_lote, methods=["POST"]),
+        Route("/admin/cache", estatisticas_cache, methods=["GET"]),
+        Route("/admin/galeria", estado_galeria, methods=["GET"]),
+        Route("/admin/galeria/recarregar", recarregar_galeria, methods=["POST"]),
+        Route("/reconhecer", reconhecer, methods=["POST"]),
+        Route("/reconhecer/lote", reconhecer_lote, methods=["POST"]),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=ciclo_de_vida,
+)
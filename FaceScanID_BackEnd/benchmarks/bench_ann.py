@@ -0,0 +1,102 @@
+"""
+BENCH_ANN.PY - Benchmark da busca aproximada (ANN) contra a busca exata
+- Galerias sintéticas de 10k, 100k e 1M identidades
+- Mede recall@1 em relação ao GalleryIndex (busca exata)
+- Mede latência p50/p99 por consulta de cada backend
+
+Uso:
+    python benchmarks/bench_ann.py --sizes 10000,100000 --dim 4096 --nprobe 8
+Obs.: 1M vetores de 4096-d em float32 ocupam ~16 GB; use --dim menor se necessário.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.gallery_index import GalleryIndex, normalizar_l2
+from src.ann_index import construir_indice_ann, hnswlib
+
+
+def gerar_galeria(n, dim, n_grupos=1024, ruido=0.5, seed=0):
+    """Gera embeddings agrupados (imitam a estrutura de rostos parecidos)."""
+    rng = np.random.default_rng(seed)
+    centros = rng.standard_normal((n_grupos, dim), dtype=np.float32)
+    galeria = np.empty((n, dim), dtype=np.float32)
+    bloco = 50_000
+    for inicio in range(0, n, bloco):
+        fim = min(n, inicio + bloco)
+        grupos = rng.integers(0, n_grupos, fim - inicio)
+        galeria[inicio:fim] = centros[grupos] + ruido * rng.standard_normal((fim - inicio, dim), dtype=np.float32)
+    return normalizar_l2(galeria)
+
+
+def gerar_consultas(galeria, n_consultas, ruido=0.3, seed=1):
+    """Consultas = outra 'foto' de identidades existentes (vetor da galeria + ruído)."""
+    rng = np.random.default_rng(seed)
+    alvos = rng.choice(len(galeria), n_consultas, replace=False)
+    dim = galeria.shape[1]
+    ruido = ruido / np.sqrt(dim)
+    return galeria[alvos] + ruido * rng.standard_normal((n_consultas, dim), dtype=np.float32)
+
+
+def medir(indice, consultas):
+    """Executa uma consulta por vez e retorna (top-1 por consulta, latências em ms)."""
+    top1, latencias = [], []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        resultado = indice.search(consulta, k=1)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        top1.append(resultado[0][0] if resultado else None)
+    return top1, np.array(latencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN x busca exata")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--backends", default="ivf,hnsw")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--ef", type=int, default=64)
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends.split(",") if b != "hnsw" or hnswlib is not None]
+    if "hnsw" in args.backends and hnswlib is None:
+        print("⚠️ hnswlib não instalado: backend HNSW ignorado")
+
+    print(f"{'N':>9} {'backend':>8} {'build(s)':>9} {'recall@1':>9} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        galeria = gerar_galeria(n, args.dim)
+        consultas = gerar_consultas(galeria, min(args.queries, n))
+        identidades = np.arange(n).astype(str)
+
+        # limiar=2.0 desativa o filtro de distância: medimos apenas a ordenação
+        exato = GalleryIndex(identidades, galeria, limiar=2.0)
+        referencia, lat = medir(exato, consultas)
+        print(f"{n:>9} {'exact':>8} {0:>9.1f} {1:>9.3f} "
+              f"{np.percentile(lat, 50):>9.2f} {np.percentile(lat, 99):>9.2f}")
+
+        for backend in backends:
+            parametros = {'nprobe': args.nprobe} if backend == "ivf" else {'ef': args.ef}
+            inicio = time.perf_counter()
+            indice = construir_indice_ann(identidades, galeria, backend=backend,
+                                          limiar=2.0, **parametros)
+            construcao = time.perf_counter() - inicio
+
+            top1, lat = medir(indice, consultas)
+            recall = np.mean([a == b for a, b in zip(top1, referencia)])
+            print(f"{n:>9} {backend:>8} {construcao:>9.1f} {recall:>9.3f} "
+                  f"{np.percentile(lat, 50):>9.2f} {np.percentile(lat, 99):>9.2f}")
+            del indice
+
+        del exato, galeria
+
+
+if __name__ == "__main__":
+    main()
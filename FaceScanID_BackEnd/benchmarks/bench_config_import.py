@@ -0,0 +1,64 @@
+"""
+BENCH_CONFIG_IMPORT.PY - Custo de `import config` na inicialização dos scripts
+- Cada medição roda em um interpretador novo (sem cache de módulos)
+- "import": só importa o config, como train.py e recognize.py fazem
+- "DB_CONFIG": importa e lê as configurações do banco (carrega o .env)
+- "verificacao": importa e roda initialize_directories() + test_database_connection(),
+  o que o config fazia a cada import antes de ficar preguiçoso
+- Com DB_HOST inacessível (ex.: DB_HOST=10.255.255.1) a diferença mostra o travamento evitado
+
+Uso:
+    python benchmarks/bench_config_import.py --repeticoes 20
+    DB_HOST=10.255.255.1 python benchmarks/bench_config_import.py --repeticoes 3
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+CENARIOS = {
+    "import": "import config",
+    "DB_CONFIG": "import config; config.DB_CONFIG",
+    "verificacao": "import config; config.initialize_directories(); config.test_database_connection()",
+}
+
+
+def medir(codigo, repeticoes, timeout):
+    """Tempo (ms) de cada execução de `python -c codigo`, descontado o interpretador vazio."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        try:
+            subprocess.run([sys.executable, "-c", codigo], cwd=PROJECT_ROOT, timeout=timeout,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            pass
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return np.array(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do import do config.py")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0, help="limite por execução (s)")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS))
+    args = parser.parse_args()
+
+    # Custo do próprio interpretador, descontado de todos os cenários
+    base = np.median(medir("pass", args.repeticoes, args.timeout))
+    print(f"Interpretador vazio: {base:.1f} ms (descontado abaixo)")
+    print(f"{'cenário':>12} {'p50(ms)':>9} {'p99(ms)':>9} {'máx(ms)':>9}")
+    for nome in args.cenarios.split(","):
+        tempos = medir(CENARIOS[nome], args.repeticoes, args.timeout) - base
+        print(f"{nome:>12} {np.percentile(tempos, 50):>9.1f} {np.percentile(tempos, 99):>9.1f} "
+              f"{tempos.max():>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+BENCH_DETECTOR.PY - Benchmark da detecção em cascata contra a detecção direta
+- Usa um conjunto local de imagens (padrão: data/faces)
+- Referência: DEEPFACE_CONFIG['detector_backend'] no frame inteiro, o mesmo
+  detector que a cascata usa no 2º estágio
+- Mede recall/precisão da cascata (IoU >= 0.5 com a referência)
+- Mede latência média e p50/p99 por frame dos dois modos
+- Frames vazios (--vazios) mostram o ganho quando ninguém está na frente da câmera
+- Detecção em resolução reduzida (--larguras-deteccao): latência e recall,
+  também só para rostos pequenos, contra a detecção em resolução cheia
+
+Uso:
+    python benchmarks/bench_detector.py --imagens data/faces --largura 1280
+    python benchmarks/bench_detector.py --imagens data/faces --vazios fotos_sem_pessoas/
+    python benchmarks/bench_detector.py --imagens data/faces --larguras-deteccao 960,640,480
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.face_detection import CascadeDetector, detectar_reduzido
+from src.face_tracker import calcular_iou, caixa_da_face
+from src.recognition_service import RecognitionService
+
+EXTENSOES = {".jpg", ".jpeg", ".png"}
+
+
+def carregar_imagens(pasta, largura):
+    """Lê as imagens da pasta, redimensionadas para a largura de um frame de câmera."""
+    imagens = []
+    for caminho in sorted(Path(pasta).rglob("*")):
+        if caminho.suffix.lower() not in EXTENSOES:
+            continue
+        img = cv2.imread(str(caminho))
+        if img is None:
+            continue
+        if largura:
+            fator = largura / img.shape[1]
+            img = cv2.resize(img, None, fx=fator, fy=fator)
+        imagens.append((caminho.name, img))
+    return imagens
+
+
+def medir(detectar, imagens):
+    """Roda o detector em cada imagem; retorna (caixas por imagem, latências em ms)."""
+    caixas, latencias = [], []
+    for _, img in imagens:
+        inicio = time.perf_counter()
+        faces = detectar(img)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        caixas.append([caixa_da_face(face) for face in faces])
+    return caixas, np.array(latencias)
+
+
+def comparar(referencia, obtidas, limiar_iou=0.5, lado_maximo=None):
+    """
+    Retorna (acertos, total da referência, total obtido).
+    Com lado_maximo, só conta os rostos da referência menores que isso.
+    """
+    acertos = 0
+    if lado_maximo:
+        referencia = [[c for c in ref if max(c[2], c[3]) < lado_maximo] for ref in referencia]
+    for ref, obt in zip(referencia, obtidas):
+        livres = list(obt)
+        for caixa in ref:
+            melhor = max(livres, key=lambda c: calcular_iou(caixa, c), default=None)
+            if melhor is not None and calcular_iou(caixa, melhor) >= limiar_iou:
+                acertos += 1
+                livres.remove(melhor)
+    return acertos, sum(map(len, referencia)), sum(map(len, obtidas))
+
+
+def resumo(nome, latencias):
+    print(f"{nome:>10} {latencias.mean():>10.1f} {np.percentile(latencias, 50):>9.1f} "
+          f"{np.percentile(latencias, 99):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do detector em cascata")
+    parser.add_argument("--imagens", default=str(PROJECT_ROOT / "data" / "faces"))
+    parser.add_argument("--vazios", default=None, help="pasta com frames sem pessoas")
+    parser.add_argument("--largura", type=int, default=1280, help="largura dos frames (0 = original)")
+    parser.add_argument("--escala", type=float, default=None, help="sobrescreve cascade_scale")
+    parser.add_argument("--confianca", type=float, default=0.85)
+    parser.add_argument("--larguras-deteccao", default="",
+                        help="larguras da cópia de detecção a comparar (ex.: 960,640,480)")
+    parser.add_argument("--rosto-pequeno", type=int, default=96,
+                        help="lado (px) abaixo do qual um rosto conta como pequeno")
+    args = parser.parse_args()
+
+    imagens = carregar_imagens(args.imagens, args.largura)
+    if not imagens:
+        print(f"❌ Nenhuma imagem encontrada em {args.imagens}")
+        sys.exit(1)
+
+    servico = RecognitionService()
+    config = {"cascade_scale": args.escala} if args.escala else None
+    cascata = CascadeDetector(config)
+
+    def direto(img):
+        return servico.detectar(img, detector_backend=cascata.detector_backend, confianca_minima=args.confianca)
+
+    def em_cascata(img):
+        return cascata.detectar(img, confianca_minima=args.confianca)
+
+    # Aquecimento (carrega os pesos do detector antes de medir)
+    direto(imagens[0][1])
+    em_cascata(imagens[0][1])
+
+    referencia, lat_direto = medir(direto, imagens)
+    obtidas, lat_cascata = medir(em_cascata, imagens)
+    acertos, total_ref, total_obt = comparar(referencia, obtidas)
+
+    print(f"\n📊 {len(imagens)} imagens ({args.largura or 'original'} px de largura)")
+    print(f"{'modo':>10} {'média(ms)':>10} {'p50(ms)':>9} {'p99(ms)':>9}")
+    resumo("direto", lat_direto)
+    resumo("cascata", lat_cascata)
+    print(f"Recall da cascata: {acertos / max(total_ref, 1):.3f} ({acertos}/{total_ref} rostos)")
+    print(f"Precisão da cascata: {acertos / max(total_obt, 1):.3f} ({acertos}/{total_obt} detecções)")
+    print(f"Speedup médio: {lat_direto.mean() / max(lat_cascata.mean(), 1e-9):.1f}x")
+
+    larguras = [int(v) for v in args.larguras_deteccao.split(",") if v.strip()]
+    if larguras:
+        _, total_pequenos, _ = comparar(referencia, referencia, lado_maximo=args.rosto_pequeno)
+        print(f"\n📊 Detecção reduzida ({total_pequenos} rostos menores que {args.rosto_pequeno}px)")
+        print(f"{'largura':>10} {'média(ms)':>10} {'p50(ms)':>9} {'p99(ms)':>9} {'recall':>8} {'pequenos':>9}")
+        for largura in larguras:
+            obtidas, latencias = medir(
+                lambda img: detectar_reduzido(direto, img, largura, align=servico.align), imagens
+            )
+            acertos, total, _ = comparar(referencia, obtidas)
+            acertos_p, total_p, _ = comparar(referencia, obtidas, lado_maximo=args.rosto_pequeno)
+            print(f"{largura:>10} {latencias.mean():>10.1f} {np.percentile(latencias, 50):>9.1f} "
+                  f"{np.percentile(latencias, 99):>9.1f} {acertos / max(total, 1):>8.3f} "
+                  f"{acertos_p / max(total_p, 1):>9.3f}")
+
+    if args.vazios:
+        vazios = carregar_imagens(args.vazios, args.largura)
+        if vazios:
+            _, lat_vazio_direto = medir(direto, vazios)
+            falsos, lat_vazio_cascata = medir(em_cascata, vazios)
+            print(f"\n📊 {len(vazios)} frames sem pessoas")
+            resumo("direto", lat_vazio_direto)
+            resumo("cascata", lat_vazio_cascata)
+            print(f"Falsos positivos da cascata: {sum(map(len, falsos))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+BENCH_EMBEDDINGS.PY - Varredura de processos de detecção x tamanho de lote
+- Usa um conjunto local de imagens (padrão: data/faces)
+- Para cada combinação roda gerar_embeddings (src/embedding_pipeline.py) do início,
+  então a criação dos processos (spawn) e o aquecimento do detector entram na conta
+- Mede imagens/s no total e em regime (depois do primeiro resultado)
+- Mostra o tempo até o primeiro resultado e quantas imagens falharam
+
+Uso:
+    python benchmarks/bench_embeddings.py --imagens data/faces --workers 1,2,4,8 --lotes 16,32,64
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from config import DEEPFACE_CONFIG
+from src.embedding_pipeline import gerar_embeddings
+from src.model_registry import obter_modelo
+
+EXTENSOES = {".jpg", ".jpeg", ".png"}
+
+
+def listar_imagens(pasta, limite):
+    caminhos = [c for c in sorted(Path(pasta).rglob("*")) if c.suffix.lower() in EXTENSOES]
+    return caminhos[:limite] if limite else caminhos
+
+
+def medir(caminhos, model_name, detector_backend, workers, batch_size):
+    """Retorna (segundos, segundos até o 1º resultado, falhas)."""
+    inicio = time.perf_counter()
+    primeiro, falhas = None, 0
+    for _, embedding, _ in gerar_embeddings(caminhos, model_name=model_name,
+                                            detector_backend=detector_backend,
+                                            workers=workers, batch_size=batch_size):
+        if primeiro is None:
+            primeiro = time.perf_counter() - inicio
+        falhas += embedding is None
+    return time.perf_counter() - inicio, primeiro or 0.0, falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão da geração de embeddings por workers e lote")
+    parser.add_argument("--imagens", default=str(PROJECT_ROOT / "data" / "faces"))
+    parser.add_argument("--limite", type=int, default=500, help="máximo de imagens (0 = todas)")
+    parser.add_argument("--workers", default="1,2,4,8", help="processos de detecção, separados por vírgula")
+    parser.add_argument("--lotes", default="32", help="rostos por forward pass, separados por vírgula")
+    parser.add_argument("--modelo", default=DEEPFACE_CONFIG.get('model_name', 'VGG-Face'))
+    parser.add_argument("--detector", default=DEEPFACE_CONFIG.get('detector_backend', 'opencv'))
+    args = parser.parse_args()
+
+    caminhos = listar_imagens(args.imagens, args.limite)
+    if not caminhos:
+        print(f"❌ Nenhuma imagem em {args.imagens}")
+        sys.exit(1)
+
+    # O modelo é carregado uma vez, fora da medição
+    obter_modelo(args.modelo)
+    print(f"📊 {len(caminhos)} imagens, modelo {args.modelo}, detector {args.detector}\n")
+    print(f"{'workers':>7} {'lote':>5} {'total s':>8} {'1º res. s':>9} {'img/s':>7} {'regime img/s':>12} {'falhas':>6}")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        for batch_size in (int(b) for b in args.lotes.split(",")):
+            segundos, primeiro, falhas = medir(caminhos, args.modelo, args.detector, workers, batch_size)
+            regime = (len(caminhos) - 1) / (segundos - primeiro) if segundos > primeiro else 0.0
+            print(f"{workers:>7} {batch_size:>5} {segundos:>8.1f} {primeiro:>9.1f} "
+                  f"{len(caminhos) / segundos:>7.1f} {regime:>12.1f} {falhas:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+BENCH_LOOKUP.PY - Benchmark das buscas na tabela 'pessoas' com e sem índices
+- Cria uma tabela descartável (padrão: pessoas_bench) com o esquema da API e N linhas sintéticas
+- Antes dos índices: SELECT * por nome (como /buscar fazia) e a versão com colunas explícitas
+- Depois de src/migrations.py: nome, id, documento e busca por prefixo paginada (1ª e 20ª página)
+- Reporta p50/p99 (ms) por consulta; a tabela é removida ao final (exceto com --manter)
+
+Uso:
+    python benchmarks/bench_lookup.py --linhas 1000000
+    python benchmarks/bench_lookup.py --linhas 100000 --manter
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import mysql.connector
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from config import DB_CONFIG
+from src.migrations import aplicar_migracoes
+from src.pessoas import (
+    CAMPOS_PESSOA, COLUNAS_DISPONIVEIS, COLUNAS_RESUMO, SQL_INSERIR_PESSOA,
+    sql_buscar_por, sql_buscar_prefixo, paginar
+)
+
+PRENOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor",
+            "Isabela", "João", "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+              "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho"]
+
+# Esquema da API (readme), sem índices secundários
+COLUNAS_TABELA = {
+    "nome_completo": "VARCHAR(255)", "doc_identidade": "VARCHAR(50)", "titulo_eleitor": "VARCHAR(50)",
+    "certidao_militar": "VARCHAR(50)", "possui_registro_classe": "BOOLEAN",
+    "numero_registro_classe": "VARCHAR(50)", "pis_pasep": "VARCHAR(50)", "tipo_sanguineo": "VARCHAR(10)",
+    "telefone": "VARCHAR(20)", "endereco": "TEXT", "emails": "TEXT", "possui_imoveis": "BOOLEAN",
+    "tipo_imovel": "VARCHAR(50)", "registro_imovel": "VARCHAR(50)", "endereco_imovel": "TEXT",
+    "possui_veiculos": "BOOLEAN", "tipo_veiculo": "VARCHAR(50)", "marca_veiculo": "VARCHAR(50)",
+    "registro_veiculo": "VARCHAR(50)", "possui_parente": "BOOLEAN", "nome_parente": "VARCHAR(255)",
+    "doc_parente": "VARCHAR(50)", "telefone_parente": "VARCHAR(20)", "endereco_parente": "TEXT",
+}
+
+
+def na_tabela(sql, tabela):
+    """Aponta o SQL de src/pessoas.py para a tabela do benchmark."""
+    return sql.replace("pessoas", tabela, 1) if tabela != "pessoas" else sql
+
+
+def gerar_pessoa(i, rng):
+    nome = f"{rng.choice(PRENOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)} {i:07d}"
+    valores = dict.fromkeys(CAMPOS_PESSOA)
+    valores.update(
+        nome_completo=nome,
+        doc_identidade=f"RG{i:09d}",
+        telefone=f"(11) 9{i % 10**8:08d}",
+        endereco="Rua Exemplo, " + "x" * rng.randint(200, 2000),  # TEXT grande, como endereços reais
+        emails=f"pessoa{i}@exemplo.com",
+        possui_imoveis=bool(i % 2),
+        possui_veiculos=bool(i % 3),
+        possui_parente=False,
+    )
+    return tuple(valores[campo] for campo in CAMPOS_PESSOA)
+
+
+def popular(conn, tabela, linhas, lote=5000, seed=0):
+    """Cria a tabela e insere `linhas` pessoas; retorna nomes e documentos inseridos."""
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+    colunas = ", ".join(f"{nome} {tipo}" for nome, tipo in COLUNAS_TABELA.items())
+    cursor.execute(f"""
+        CREATE TABLE {tabela} (id INT AUTO_INCREMENT PRIMARY KEY, {colunas})
+        ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """)
+    inserir = na_tabela(SQL_INSERIR_PESSOA, tabela)
+    nomes, documentos = [], []
+    for inicio in range(0, linhas, lote):
+        registros = [gerar_pessoa(i, rng) for i in range(inicio, min(linhas, inicio + lote))]
+        cursor.executemany(inserir, registros)
+        conn.commit()
+        nomes.extend(r[0] for r in registros)
+        documentos.extend(r[1] for r in registros)
+        print(f"\r⏳ {min(linhas, inicio + lote)}/{linhas} linhas", end="", flush=True)
+    print()
+    cursor.close()
+    return nomes, documentos
+
+
+def medir(conn, consultas):
+    """Executa cada (sql, parâmetros) e retorna as latências em ms."""
+    cursor = conn.cursor(dictionary=True)
+    latencias = []
+    for sql, parametros in consultas:
+        inicio = time.perf_counter()
+        cursor.execute(sql, parametros)
+        cursor.fetchall()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    cursor.close()
+    return np.array(latencias)
+
+
+def resumo(nome, latencias):
+    print(f"{nome:>34} {np.percentile(latencias, 50):>9.2f} {np.percentile(latencias, 99):>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das buscas de pessoas")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=500, help="consultas por cenário indexado")
+    parser.add_argument("--consultas-sem-indice", type=int, default=20,
+                        help="consultas por cenário sem índice (cada uma lê a tabela inteira)")
+    parser.add_argument("--tabela", default="pessoas_bench")
+    parser.add_argument("--manter", action="store_true", help="não remove a tabela ao final")
+    args = parser.parse_args()
+
+    if args.tabela == "pessoas":
+        parser.error("use uma tabela descartável (a tabela é recriada)")
+
+    rng = random.Random(1)
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        nomes, documentos = popular(conn, args.tabela, args.linhas)
+        tabela = args.tabela
+
+        def por_nome(sql, n):
+            return [(na_tabela(sql, tabela), (rng.choice(nomes),)) for _ in range(n)]
+
+        def por_prefixo(prefixo, proximo=None):
+            sql, parametros = sql_buscar_prefixo(prefixo, 50, proximo)
+            return na_tabela(sql, tabela), parametros
+
+        print(f"\n📊 {args.linhas} linhas em {tabela}")
+        print(f"{'consulta':>34} {'p50(ms)':>9} {'p99(ms)':>9}")
+        n = args.consultas_sem_indice
+        resumo("nome, SELECT * (sem índice)", medir(conn, por_nome("SELECT * FROM pessoas WHERE nome_completo = %s", n)))
+        resumo("nome, colunas (sem índice)", medir(conn, por_nome(sql_buscar_por("nome_completo", COLUNAS_DISPONIVEIS), n)))
+
+        inicio = time.perf_counter()
+        criados = aplicar_migracoes(conn, tabela)
+        print(f"🔧 Índices {', '.join(criados) or '(nenhum)'} criados em {time.perf_counter() - inicio:.1f}s")
+
+        n = args.consultas
+        resumo("nome, SELECT * (índice)", medir(conn, por_nome("SELECT * FROM pessoas WHERE nome_completo = %s", n)))
+        resumo("nome, colunas (índice)", medir(conn, por_nome(sql_buscar_por("nome_completo", COLUNAS_DISPONIVEIS), n)))
+        resumo("nome, resumo (índice)", medir(conn, por_nome(sql_buscar_por("nome_completo", COLUNAS_RESUMO), n)))
+        resumo("id", medir(conn, [(na_tabela(sql_buscar_por("id"), tabela), (rng.randint(1, args.linhas),))
+                                  for _ in range(n)]))
+        resumo("documento", medir(conn, [(na_tabela(sql_buscar_por("doc_identidade"), tabela),
+                                          (rng.choice(documentos),)) for _ in range(n)]))
+
+        prefixos = [rng.choice(nomes)[:rng.randint(3, 12)] for _ in range(n)]
+        resumo("prefixo, 1ª página (50)", medir(conn, [por_prefixo(prefixo) for prefixo in prefixos]))
+
+        # 20ª página: cursor obtido percorrendo as páginas anteriores
+        cursor = conn.cursor(dictionary=True)
+        profundas = []
+        for prefixo in prefixos[:max(1, n // 10)]:
+            proximo = None
+            for _ in range(19):
+                cursor.execute(*por_prefixo(prefixo, proximo))
+                proximo = paginar(cursor.fetchall(), 50)["proximo"]
+                if proximo is None:
+                    break
+            profundas.append(por_prefixo(prefixo, proximo))
+        cursor.close()
+        resumo("prefixo, 20ª página (cursor)", medir(conn, profundas))
+    finally:
+        if not args.manter:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {args.tabela}")
+            cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+BENCH_MULTI_CAMERA.PY - Carga de N câmeras simuladas no MultiCameraServer
+- Cada câmera repete um vídeo local em loop, no ritmo de uma câmera real (--fps)
+- Os vídeos são decodificados uma vez e os frames compartilhados entre as câmeras,
+  cada uma começando em um ponto diferente: a medida é detecção + reconhecimento
+- Por câmera: fps processado, latência p50/p95 (captura -> resultado) e frames descartados
+- Inferência: lotes, rostos por lote e preenchimento médio do lote (rostos / --lote)
+
+Uso:
+    python benchmarks/bench_multi_camera.py portaria.mp4 corredor.mp4 --cameras 16 --duracao 60
+    python benchmarks/bench_multi_camera.py portaria.mp4 --cameras 16 --detectores 4,8 --lote 16,32
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.multi_camera import MultiCameraServer
+
+
+def carregar_frames(videos, maximo, largura):
+    """Decodifica até `maximo` frames de cada vídeo (redimensionados para `largura`)."""
+    frames = []
+    for video in videos:
+        cap = cv2.VideoCapture(str(video))
+        lidos = 0
+        while lidos < maximo:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if largura and frame.shape[1] != largura:
+                fator = largura / frame.shape[1]
+                frame = cv2.resize(frame, None, fx=fator, fy=fator)
+            frames.append(frame)
+            lidos += 1
+        cap.release()
+    return frames
+
+
+class CapturaEmLoop:
+    """Captura simulada: percorre os frames em loop no ritmo de `fps`."""
+
+    def __init__(self, frames, fps, inicio=0):
+        self.frames = frames
+        self.intervalo = 1.0 / fps
+        self.posicao = inicio % len(frames)
+        self.proximo = time.perf_counter()
+
+    def read(self):
+        espera = self.proximo - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        self.proximo = max(self.proximo + self.intervalo, time.perf_counter() - self.intervalo)
+        frame = self.frames[self.posicao]
+        self.posicao = (self.posicao + 1) % len(self.frames)
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def executar(frames, cameras, fps, duracao, aquecimento, detectores, lote, espera_ms):
+    """Roda o servidor por `duracao` segundos e devolve as estatísticas do período medido."""
+    passo = max(1, len(frames) // cameras)
+    fontes = [
+        (f"cam{i:02d}", lambda inicio=i * passo: CapturaEmLoop(frames, fps, inicio))
+        for i in range(cameras)
+    ]
+    servidor = MultiCameraServer(fontes, detectores=detectores, tamanho_lote=lote, espera_ms=espera_ms)
+    servidor.start()
+    try:
+        # Descarta o aquecimento (primeiros lotes, alocação do modelo)
+        time.sleep(aquecimento)
+        servidor.zerar_estatisticas()
+        time.sleep(duracao)
+        return servidor.estatisticas(), servidor.detectores
+    finally:
+        servidor.stop()
+
+
+def imprimir(estatisticas, fps, lote):
+    por_camera = estatisticas["cameras"]
+    print(f"   {'câmera':>7} {'proc. fps':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'descart.':>9}")
+    for nome, stats in por_camera.items():
+        print(f"   {nome:>7} {stats['processados_fps']:>9.1f} {stats['latencia_p50_ms']:>8.1f} "
+              f"{stats['latencia_p95_ms']:>8.1f} {stats['descartados']:>9}")
+
+    processados = np.array([stats["processados_fps"] for stats in por_camera.values()])
+    p95 = np.array([stats["latencia_p95_ms"] for stats in por_camera.values()])
+    inferencia = estatisticas["inferencia"]
+    print(f"   fps por câmera: média {processados.mean():.1f}, mínimo {processados.min():.1f} (alvo {fps:.0f})")
+    print(f"   latência p95: mediana {np.median(p95):.0f} ms, pior câmera {p95.max():.0f} ms")
+    print(f"   inferência: {inferencia['lotes']} lotes, {inferencia['faces_por_lote']} rostos/lote, "
+          f"preenchimento {inferencia['faces_por_lote'] / lote:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do servidor multicâmera com vídeos em loop")
+    parser.add_argument("videos", nargs="+", help="arquivos de vídeo com rostos")
+    parser.add_argument("--cameras", type=int, default=16)
+    parser.add_argument("--fps", type=float, default=15.0, help="fps de cada câmera simulada")
+    parser.add_argument("--duracao", type=float, default=60.0, help="segundos medidos por configuração")
+    parser.add_argument("--aquecimento", type=float, default=10.0, help="segundos descartados no início")
+    parser.add_argument("--detectores", default="0", help="threads de detecção (0 = automático), separadas por vírgula")
+    parser.add_argument("--lote", default="32", help="rostos por forward pass, separados por vírgula")
+    parser.add_argument("--espera-ms", type=float, default=10.0)
+    parser.add_argument("--largura", type=int, default=1280, help="largura dos frames (0 = original)")
+    parser.add_argument("--max-frames", type=int, default=600, help="frames decodificados por vídeo")
+    args = parser.parse_args()
+
+    frames = carregar_frames(args.videos, args.max_frames, args.largura)
+    if not frames:
+        print("❌ Nenhum frame lido dos vídeos")
+        sys.exit(1)
+    print(f"📊 {args.cameras} câmeras a {args.fps:.0f} fps, {len(frames)} frames em loop, "
+          f"{args.duracao:.0f}s por configuração")
+
+    for detectores in (int(d) for d in args.detectores.split(",")):
+        for lote in (int(l) for l in args.lote.split(",")):
+            estatisticas, usados = executar(
+                frames, args.cameras, args.fps, args.duracao, args.aquecimento,
+                detectores or None, lote, args.espera_ms
+            )
+            print(f"\n🎥 {usados} threads de detecção, lote {lote}")
+            imprimir(estatisticas, args.fps, lote)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+BENCH_QUANTIZATION.PY - Benchmark das galerias comprimidas contra a busca exata em float32
+- Galerias sintéticas (mesmo gerador de bench_ann.py)
+- float32 (referência), float16, int8 escalar e PQ (src/quantization.py)
+- Reporta memória dos vetores (MB), consultas/s (uma por vez e em lote)
+  e concordância do top-1 com o cosseno sem compressão
+
+Uso:
+    python benchmarks/bench_quantization.py --sizes 10000,100000 --dim 4096 --pq-m 64,128
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from bench_ann import gerar_galeria, gerar_consultas
+from src.gallery_index import GalleryIndex
+from src.ann_index import construir_indice_ann
+
+
+def vazao(indice, consultas, lote):
+    """Consultas por segundo buscando `lote` consultas por chamada; retorna (qps, top-1)."""
+    top1 = []
+    inicio = time.perf_counter()
+    for i in range(0, len(consultas), lote):
+        for resultado in indice.search_batch(consultas[i:i + lote], k=1):
+            top1.append(resultado[0][0] if resultado else None)
+    return len(consultas) / (time.perf_counter() - inicio), top1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark galerias quantizadas x float32")
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--lote", type=int, default=32, help="consultas por chamada na medida em lote")
+    parser.add_argument("--pq-m", default="64,256", help="sub-vetores (bytes por rosto) do PQ")
+    args = parser.parse_args()
+
+    variantes = [("float16", {}), ("int8", {})]
+    variantes += [("pq", {'m': int(m)}) for m in args.pq_m.split(",") if m]
+
+    print(f"{'N':>9} {'formato':>9} {'B/rosto':>9} {'mem(MB)':>9} {'build(s)':>9} "
+          f"{'q/s(1)':>9} {f'q/s({args.lote})':>9} {'top-1':>9}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        galeria = gerar_galeria(n, args.dim)
+        consultas = gerar_consultas(galeria, min(args.queries, n))
+        identidades = np.arange(n).astype(str)
+
+        # limiar=2.0 desativa o filtro de distância: medimos apenas a ordenação
+        exato = GalleryIndex(identidades, galeria, limiar=2.0, normalizado=True)
+        qps1, referencia = vazao(exato, consultas, 1)
+        qps_lote, _ = vazao(exato, consultas, args.lote)
+        print(f"{n:>9} {'float32':>9} {galeria.nbytes // n:>9} {galeria.nbytes / 2**20:>9.1f} {0:>9.1f} "
+              f"{qps1:>9.0f} {qps_lote:>9.0f} {1:>9.3f}")
+
+        for backend, parametros in variantes:
+            inicio = time.perf_counter()
+            indice = construir_indice_ann(identidades, galeria, backend=backend, limiar=2.0, **parametros)
+            construcao = time.perf_counter() - inicio
+
+            qps1, top1 = vazao(indice, consultas, 1)
+            qps_lote, _ = vazao(indice, consultas, args.lote)
+            concordancia = np.mean([a == b for a, b in zip(top1, referencia)])
+            nome = f"pq{parametros['m']}" if backend == "pq" else backend
+            print(f"{n:>9} {nome:>9} {indice.memoria() // n:>9} {indice.memoria() / 2**20:>9.1f} "
+                  f"{construcao:>9.1f} {qps1:>9.0f} {qps_lote:>9.0f} {concordancia:>9.3f}")
+            del indice
+
+        del exato, galeria
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+EVAL_PCA.PY - Impacto da projeção PCA (src/projection.py) na precisão do reconhecimento
+- Ajusta a PCA sobre a galeria para várias dimensões-alvo (com ou sem branqueamento)
+- Compara cada dimensão com a busca completa (ex.: 4096-d do VGG-Face):
+  concordância do top-1, concordância da decisão aceito/rejeitado (limiar recalibrado),
+  memória da galeria e consultas/s
+- Galeria real (FILES['store'] ou o pickle): cada rosto consulta os demais (leave-one-out)
+- --sintetico: galeria de bench_ann.py, reportando também o acerto do top-1
+
+Uso:
+    python benchmarks/eval_pca.py --dims 512,256,128,64
+    python benchmarks/eval_pca.py --sintetico --n 50000 --dim 4096 --dims 256,128 --whiten
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from bench_ann import gerar_galeria, gerar_consultas
+from config import FILES
+from src.gallery_index import GalleryIndex, normalizar_l2, obter_limiar
+from src.projection import ProjecaoPCA
+
+
+def carregar_galeria_real():
+    """Matriz e identidades da galeria de train.py (memmap ou pickle)."""
+    if FILES['store'].with_suffix('.emb').exists():
+        galeria = GalleryIndex.from_store(FILES['store'])
+    else:
+        galeria = GalleryIndex.from_pickle(FILES['representations'])
+    return galeria.identidades, normalizar_l2(galeria.matriz), galeria.model_name
+
+
+def vizinhos(indice, consultas, proprias, lote=64):
+    """Top-1 (identidade, distância) de cada consulta, ignorando a própria entrada."""
+    resultados, inicio = [], time.perf_counter()
+    for i in range(0, len(consultas), lote):
+        for propria, candidatos in zip(proprias[i:i + lote], indice.search_batch(consultas[i:i + lote], k=2)):
+            candidatos = [c for c in candidatos if c[0] != propria]
+            resultados.append(candidatos[0] if candidatos else (None, 2.0))
+    return resultados, len(consultas) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação da PCA em várias dimensões")
+    parser.add_argument("--dims", default="1024,512,256,128,64")
+    parser.add_argument("--whiten", action="store_true", help="avalia a PCA com branqueamento")
+    parser.add_argument("--consultas", type=int, default=1000)
+    parser.add_argument("--sintetico", action="store_true", help="usa uma galeria sintética")
+    parser.add_argument("--n", type=int, default=20000, help="tamanho da galeria sintética")
+    parser.add_argument("--dim", type=int, default=4096, help="dimensão da galeria sintética")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.sintetico:
+        galeria = gerar_galeria(args.n, args.dim)
+        identidades = np.arange(args.n).astype(str)
+        n_consultas = min(args.consultas, args.n)
+        consultas = gerar_consultas(galeria, n_consultas, seed=1)
+        # Mesmos alvos sorteados por gerar_consultas (mesma semente)
+        alvos = np.random.default_rng(1).choice(args.n, n_consultas, replace=False)
+        # A consulta é outra foto: nenhuma entrada da galeria é "ela mesma"
+        proprias = [None] * len(alvos)
+        model_name = "VGG-Face"
+    else:
+        identidades, galeria, model_name = carregar_galeria_real()
+        alvos = rng.choice(len(galeria), min(args.consultas, len(galeria)), replace=False)
+        consultas = galeria[alvos]
+        proprias = identidades[alvos]
+    limiar = obter_limiar(model_name)
+    print(f"📊 {len(galeria)} rostos de {galeria.shape[1]}-d, {len(consultas)} consultas, "
+          f"limiar {limiar:.3f}{', com branqueamento' if args.whiten else ''}")
+
+    # limiar=2.0 desativa o filtro: a decisão é avaliada à parte com o limiar de cada espaço
+    completo = GalleryIndex(identidades, galeria, limiar=2.0, model_name=model_name, normalizado=True)
+    referencia, qps = vizinhos(completo, consultas, proprias)
+    aceitos = np.array([d <= limiar for _, d in referencia])
+
+    def acerto(resultados):
+        return np.mean([r[0] == identidades[a] for r, a in zip(resultados, alvos)])
+
+    print(f"{'dim':>6} {'variância':>9} {'limiar':>7} {'mem(MB)':>8} {'q/s':>8} {'top-1':>7} "
+          f"{'decisão':>7}" + (f" {'acerto':>7}" if args.sintetico else ""))
+    linha = (f"{galeria.shape[1]:>6} {1:>9.3f} {limiar:>7.3f} {galeria.nbytes / 2**20:>8.1f} "
+             f"{qps:>8.0f} {1:>7.3f} {1:>7.3f}")
+    print(linha + (f" {acerto(referencia):>7.3f}" if args.sintetico else ""))
+
+    for dimensao in (int(d) for d in args.dims.split(",")):
+        projecao = ProjecaoPCA.ajustar(galeria, dimensao, branquear=args.whiten)
+        limiar_reduzido = projecao.calibrar_limiar(galeria, limiar)
+        reduzida = projecao.aplicar(galeria)
+        indice = GalleryIndex(identidades, reduzida, limiar=2.0, model_name=model_name)
+        indice.projecao = projecao
+
+        resultados, qps = vizinhos(indice, consultas, proprias)
+        top1 = np.mean([r[0] == ref[0] for r, ref in zip(resultados, referencia)])
+        decisao = np.mean(np.array([d <= limiar_reduzido for _, d in resultados]) == aceitos)
+        linha = (f"{projecao.saida:>6} {projecao.variancia_explicada:>9.3f} {limiar_reduzido:>7.3f} "
+                 f"{indice.matriz.nbytes / 2**20:>8.1f} {qps:>8.0f} {top1:>7.3f} {decisao:>7.3f}")
+        print(linha + (f" {acerto(resultados):>7.3f}" if args.sintetico else ""))
+
+
+if __name__ == "__main__":
+    main()
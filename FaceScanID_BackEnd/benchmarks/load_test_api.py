@@ -0,0 +1,93 @@
+"""
+LOAD_TEST_API.PY - Teste de carga comparando a API Flask e a variante ASGI
+- Dispara buscas (/buscar) e reconhecimentos (/reconhecer) em paralelo
+- Reporta requisições/s, p50/p99 e erros por rota
+- Mostra se as buscas continuam rápidas enquanto a inferência está saturada
+
+Uso (com as duas APIs no ar):
+    python api/app.py                                   # Flask em :5000
+    uvicorn api.asgi:app --port 8000                    # ASGI em :8000
+    python benchmarks/load_test_api.py --url http://127.0.0.1:5000 --imagem foto.jpg
+    python benchmarks/load_test_api.py --url http://127.0.0.1:8000 --imagem foto.jpg
+"""
+
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+import numpy as np
+
+
+def requisitar(url, dados=None, tipo=None, timeout=30):
+    """Faz uma requisição e retorna (status, latência em ms)."""
+    req = urllib.request.Request(url, data=dados, method="POST" if dados else "GET")
+    if tipo:
+        req.add_header("Content-Type", tipo)
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--nome", default="Gustavo_Koglin", help="nome usado em /buscar")
+    parser.add_argument("--imagem", default=None, help="JPEG/PNG enviado a /reconhecer")
+    parser.add_argument("--buscas", type=int, default=16, help="clientes de /buscar")
+    parser.add_argument("--reconhecimentos", type=int, default=4, help="clientes de /reconhecer")
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos de teste")
+    args = parser.parse_args()
+
+    imagem = open(args.imagem, "rb").read() if args.imagem else None
+    url_busca = f"{args.url}/buscar/{urllib.parse.quote(args.nome)}"
+    url_reconhecer = f"{args.url}/reconhecer"
+
+    latencias = defaultdict(list)
+    erros = defaultdict(int)
+    lock = threading.Lock()
+    fim = time.perf_counter() + args.duracao
+
+    def cliente(rota, url, dados=None, tipo=None):
+        while time.perf_counter() < fim:
+            status, ms = requisitar(url, dados, tipo)
+            with lock:
+                # 404 em /buscar é uma resposta válida (nome inexistente)
+                if status in (200, 404):
+                    latencias[rota].append(ms)
+                else:
+                    erros[rota] += 1
+
+    threads = [threading.Thread(target=cliente, args=("buscar", url_busca)) for _ in range(args.buscas)]
+    if imagem:
+        threads += [
+            threading.Thread(target=cliente, args=("reconhecer", url_reconhecer, imagem, "image/jpeg"))
+            for _ in range(args.reconhecimentos)
+        ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"\n📊 {args.url} - {args.duracao:.0f}s")
+    print(f"{'rota':>12} {'req/s':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'erros':>6}")
+    for rota in ("buscar", "reconhecer"):
+        if rota not in latencias and rota not in erros:
+            continue
+        lat = np.array(latencias[rota]) if latencias[rota] else np.array([np.nan])
+        print(f"{rota:>12} {len(latencias[rota]) / args.duracao:>8.1f} "
+              f"{np.nanpercentile(lat, 50):>9.1f} {np.nanpercentile(lat, 99):>9.1f} {erros[rota]:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,29 +3,111 @@ CONFIG.PY - Global Project Configuration
 - Defines constants and global configurations
 - Uses environment variables for sensitive data
 - Configures database, DeepFace, and paths
+- Importing is free of side effects: .env and database settings are read on
+  first access, directories and the DB check are explicit opt-in calls
 """
 
 import os
+from functools import cached_property
 from pathlib import Path
-from dotenv import load_dotenv
-import mysql.connector
-from mysql.connector import Error
-
-# Load environment variables
-load_dotenv()
 
 # Project root directory (more reliable way to get it)
 PROJECT_ROOT = Path(__file__).parent
 
-# Database Configuration
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASSWORD", "Gbk@2027"),
-    "database": os.getenv("DB_NAME", "FSID"),
-    "port": int(os.getenv("DB_PORT", 3306)),
-    "auth_plugin": 'mysql_native_password'
-}
+
+class Settings:
+    """Environment-backed settings, resolved (and .env loaded) on first access."""
+
+    _env_loaded = False
+
+    @classmethod
+    def load_env(cls):
+        """Load the .env file once per process."""
+        if not cls._env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            cls._env_loaded = True
+
+    def _getenv(self, name, default):
+        self.load_env()
+        return os.getenv(name, default)
+
+    # Database Configuration
+    @cached_property
+    def DB_HOST(self):
+        return self._getenv("DB_HOST", "localhost")
+
+    @cached_property
+    def DB_USER(self):
+        return self._getenv("DB_USER", "root")
+
+    @cached_property
+    def DB_PASSWORD(self):
+        return self._getenv("DB_PASSWORD", "Gbk@2027")
+
+    @cached_property
+    def DB_NAME(self):
+        return self._getenv("DB_NAME", "FSID")
+
+    @cached_property
+    def DB_PORT(self):
+        return int(self._getenv("DB_PORT", 3306))
+
+    @cached_property
+    def DB_CONFIG(self):
+        return {
+            "host": self.DB_HOST,
+            "user": self.DB_USER,
+            "password": self.DB_PASSWORD,
+            "database": self.DB_NAME,
+            "port": self.DB_PORT,
+            "auth_plugin": 'mysql_native_password'
+        }
+
+    # Connection pool (db_pool.py)
+    @cached_property
+    def DB_POOL_CONFIG(self):
+        return {
+            "pool_size": int(self._getenv("DB_POOL_SIZE", 5)),
+            "timeout": float(self._getenv("DB_POOL_TIMEOUT", 10)),    # Seconds to wait for a free connection
+            "ping_after_idle": float(self._getenv("DB_POOL_PING_AFTER_IDLE", 5))  # Health-check idle connections
+        }
+
+    # Aliases used by older modules (config.DB_HOST, db_config, host, ...)
+    @property
+    def db_config(self):
+        return self.DB_CONFIG
+
+    @property
+    def host(self):
+        return self.DB_HOST
+
+    @property
+    def user(self):
+        return self.DB_USER
+
+    @property
+    def password(self):
+        return self.DB_PASSWORD
+
+    @property
+    def name(self):
+        return self.DB_NAME
+
+    @property
+    def port(self):
+        return self.DB_PORT
+
+
+settings = Settings()
+
+
+def __getattr__(name):
+    """Module-level access to the lazy settings (config.DB_CONFIG, from config import DB_CONFIG)."""
+    if not name.startswith("_") and hasattr(Settings, name):
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Directory Structure
 DIRECTORIES = {
@@ -39,16 +121,63 @@ DIRECTORIES = {
 # File Paths
 FILES = {
     'encodings': DIRECTORIES['embeddings'] / 'deepface_encodings.pkl',
-    'representations': DIRECTORIES['embeddings'] / 'deepface_representations.pkl'
+    'representations': DIRECTORIES['embeddings'] / 'deepface_representations.pkl',
+    'ann_index': DIRECTORIES['embeddings'] / 'deepface_ann.npz',
+    'projection': DIRECTORIES['embeddings'] / 'deepface_pca.npz',
+    'manifest': DIRECTORIES['embeddings'] / 'deepface_manifest.json',
+    # Marcador gravado por train.py ao final; o reconhecimento recarrega quando ele muda
+    'gallery_version': DIRECTORIES['embeddings'] / 'deepface_gallery.version',
+    # Galeria memmap (base sem extensão: gera .emb e .ids)
+    'store': DIRECTORIES['embeddings'] / 'deepface_gallery'
 }
 
+# Face images folder (fix_images.py)
+IMAGE_DIR = DIRECTORIES['faces']
+
 # DeepFace Configuration
 DEEPFACE_CONFIG = {
     'model_name': "VGG-Face",
+    # Usado pela galeria (train.py) e pelas consultas: embeddings de detectores
+    # diferentes não são comparáveis. Alterar força o reprocessamento da galeria
     'detector_backend': "opencv",
     'distance_metric': "cosine",
     'enforce_detection': True,
-    'align': True
+    'align': True,
+    # Busca aproximada (ANN) para galerias grandes: "exact", "ivf" ou "hnsw";
+    # galerias comprimidas (src/quantization.py): "float16", "int8" ou "pq"
+    'ann_backend': "exact",
+    'ann_nlist': 0,         # Listas do IVF (0 = automático, ~sqrt(N))
+    'ann_nprobe': 8,        # IVF: listas visitadas por consulta (recall x latência)
+    'ann_ef_search': 64,    # HNSW: tamanho da fila de busca (recall x latência)
+    'pq_subvetores': 64,    # PQ: bytes por rosto (sub-vetores de 256 centróides)
+    # Redução de dimensionalidade (src/projection.py), ajustada por train.py: 0 desativa
+    'pca_dim': 0,           # Dimensões após a PCA (ex.: 256 para o VGG-Face 4096-d)
+    'pca_whiten': False,    # Branqueamento (variância unitária por componente)
+    # Busca exata agregada por pessoa (src/templates.py): "nenhum", "centroide" ou "medoides".
+    # Pessoas = pessoas.id (galeria do banco) ou nome do arquivo sem sufixo ('Maria_Silva_2.jpg')
+    'gallery_templates': "nenhum",
+    'template_medoides': 3,       # "medoides": fotos representativas por pessoa
+    'template_candidatos': 10,    # Pessoas comparadas com todas as suas fotos por consulta
+    'gallery_reload_interval': 5.0,  # Segundos entre verificações de nova galeria (0 desativa)
+    # Geração de embeddings em paralelo (train.py / generate_embeddings.py)
+    'embedding_workers': 0,       # Processos de detecção (0 = número de CPUs)
+    'embedding_batch_size': 32,   # Rostos por forward pass do modelo
+    'store_dtype': "float32",     # Matriz da galeria memmap: "float32" ou "float16"
+    # Origem da galeria: "arquivos" (data/embeddings) ou "mysql" (tabela embeddings, com pessoa_id)
+    'gallery_source': "arquivos",
+    'db_embedding_dtype': "float16",  # BLOBs da tabela embeddings: "float16" ou "int8"
+    # Detecção em vídeo (recognize.py): "direct" roda o detector_backend no frame inteiro;
+    # "cascade" roda o Haar no frame reduzido e o detector_backend só nas regiões candidatas
+    'detection_mode': "direct",
+    'detection_width': 640,       # "direct": largura da cópia usada na detecção (0 = resolução cheia)
+    'cascade_scale': 0.5,         # Redução do frame para o Haar
+    'cascade_min_face': 48,       # Menor rosto procurado (pixels do frame original)
+    'cascade_roi_margin': 0.3,    # Margem em volta de cada candidato
+    'cascade_roi_size': 224,      # Lado mínimo da região entregue ao 2º estágio
+    # Rastreamento entre detecções (recognize.py): None (só IoU), "kcf" ou "csrt"
+    # (opencv-contrib-python); com "kcf"/"csrt", o detector roda 1 a cada detection_interval frames
+    'tracker_backend': None,
+    'detection_interval': 1
 }
 
 def initialize_directories():
@@ -59,16 +188,20 @@ def initialize_directories():
 
 def test_database_connection():
     """Test database connection with error handling"""
+    import mysql.connector
+    from mysql.connector import Error
+
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = mysql.connector.connect(**settings.DB_CONFIG)
         print("✅ Database connection successful")
         conn.close()
         return True
     except Error as e:
         print(f"❌ Database connection failed: {e}")
-        print(f"Configuration used: {DB_CONFIG}")
+        print(f"Configuration used: { {k: '*****' if k == 'password' else v for k, v in settings.DB_CONFIG.items()} }")
         return False
 
-# Initialize the project environment
-initialize_directories()
-test_database_connection()
\ No newline at end of file
+if __name__ == "__main__":
+    # Explicit environment check: python config.py
+    initialize_directories()
+    test_database_connection()
@@ -1,7 +1,14 @@
 # embeddings/generate_embeddings.py
 import os
+import sys
 import pickle
-from deepface import DeepFace
+from pathlib import Path
+
+# Configuração de caminhos
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.embedding_pipeline import gerar_embeddings as gerar_embeddings_lote
 
 # Diretórios
 IMAGE_DIR = "data/faces/"       # Onde estão as fotos de rostos
@@ -16,7 +23,8 @@ def gerar_embeddings():
 
     Observação:
         O DeepFace não usa a mesma lógica de 'face_recognition'. Em 'DeepFace.represent',
-        podemos escolher o modelo (ArcFace, Facenet, VGG-Face etc.). Aqui, usamos o default.
+        podemos escolher o modelo (ArcFace, Facenet, VGG-Face etc.). Aqui, usamos o modelo
+        de DEEPFACE_CONFIG, com detecção em paralelo e inferência em lotes.
     """
     
     # Lista para armazenar todas as embeddings e o nome do arquivo
@@ -26,45 +34,39 @@ def gerar_embeddings():
     if not os.path.exists(EMBEDDINGS_DIR):
         os.makedirs(EMBEDDINGS_DIR)
 
-    # Percorre o diretório data/faces e processa cada imagem
-    for filename in os.listdir(IMAGE_DIR):
-        if filename.lower().endswith((".jpg", ".jpeg", ".png")):
-            caminho_imagem = os.path.join(IMAGE_DIR, filename)
-            print(f"📷 Processando: {filename}")
-
-            try:
-                # Usamos DeepFace.represent para obter a representação facial
-                # enforce_detection=False para evitar erro se não encontrar rosto
-                representacao = DeepFace.represent(
-                    img_path=caminho_imagem,
-                    enforce_detection=False
-                )
-
-                if representacao and len(representacao) > 0:
-                    # representacao é uma lista de dicionários. Exemplo:
-                    # [{"embedding": [...], "facial_area": {...}, ...}]
-                    emb = representacao[0].get("embedding", None)
-                    if emb is None:
-                        print(f"⚠️ Não foi possível obter embedding de {filename}.")
-                        continue
-
-                    # Nome base do arquivo sem extensão
-                    nome_pessoa = os.path.splitext(filename)[0]
-
-                    # Adiciona à lista geral
-                    todas_embeddings.append((nome_pessoa, emb))
-
-                    # Salva individualmente cada embedding
-                    emb_path = os.path.join(EMBEDDINGS_DIR, f"{nome_pessoa}.pkl")
-                    with open(emb_path, "wb") as f:
-                        pickle.dump(emb, f)
-                        print(f"✅ Embedding individual salvo em: {emb_path}")
-                else:
-                    print(f"⚠️ Nenhuma representação encontrada em {filename}. Pulando...")
-
-            except Exception as e:
-                print(f"❌ Erro ao processar {filename}: {e}")
-                continue
+    # Lista as imagens de data/faces
+    arquivos = [
+        filename for filename in os.listdir(IMAGE_DIR)
+        if filename.lower().endswith((".jpg", ".jpeg", ".png"))
+    ]
+
+    # Detecção em paralelo e inferência em lotes (mesmos padrões do DeepFace.represent)
+    resultados = gerar_embeddings_lote(
+        [os.path.join(IMAGE_DIR, filename) for filename in arquivos],
+        detector_backend="opencv"
+    ) if arquivos else []
+
+    for indice, emb, motivo in resultados:
+        filename = arquivos[indice]
+        print(f"📷 Processado: {filename}")
+
+        if emb is None:
+            print(f"⚠️ Nenhuma representação encontrada em {filename} ({motivo}). Pulando...")
+            continue
+
+        emb = emb.tolist()
+
+        # Nome base do arquivo sem extensão
+        nome_pessoa = os.path.splitext(filename)[0]
+
+        # Adiciona à lista geral
+        todas_embeddings.append((nome_pessoa, emb))
+
+        # Salva individualmente cada embedding
+        emb_path = os.path.join(EMBEDDINGS_DIR, f"{nome_pessoa}.pkl")
+        with open(emb_path, "wb") as f:
+            pickle.dump(emb, f)
+            print(f"✅ Embedding individual salvo em: {emb_path}")
 
     # Se obtivemos ao menos uma embedding, salvamos tudo em um único arquivo .pkl
     if todas_embeddings:
@@ -1,37 +1,14 @@
-
-import mysql.connector
 from mysql.connector import Error
-import os
-from dotenv import load_dotenv
+import sys
+from pathlib import Path
 from typing import Tuple, Optional
 
-# Carregar variáveis do .env
-load_dotenv()
-
-# Configuração melhorada do banco de dados
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),  # Recomendado usar usuário específico
-    "password": os.getenv("DB_PASSWORD", "Gbk@2027"),  # Nunca armazenar senha no código
-    "database": os.getenv("DB_NAME", "FSID"),
-    "port": int(os.getenv("DB_PORT", 3306)),
-    "auth_plugin": 'mysql_native_password',
-    "raise_on_warnings": True,
-    "autocommit": False  # Para controle explícito de transações
-}
+# Configuração de caminhos
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 
-def conectar_banco() -> Optional[mysql.connector.connection.MySQLConnection]:
-    """Estabelece conexão com o MySQL com tratamento aprimorado"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        print("✅ Conexão estabelecida com sucesso")
-        return conn
-    except Error as e:
-        print(f"❌ Erro ao conectar: {e}")
-        # Mostra configuração sem expor a senha
-        config_safe = {k: '*****' if k == 'password' else v for k, v in DB_CONFIG.items()}
-        print(f"Configuração usada: {config_safe}")
-        return None
+from db_pool import conexao
+from src.lookup_cache import invalidar_buscas
 
 def validar_dados_pessoa(dados: Tuple) -> bool:
     """Valida os dados antes da inserção"""
@@ -53,38 +30,34 @@ def adicionar_pessoa(dados: Tuple) -> Optional[int]:
     if not validar_dados_pessoa(dados):
         return None
     
-    conn = conectar_banco()
-    if not conn:
-        return None
-    
-    cursor = None
     try:
-        cursor = conn.cursor()
-        
-        sql = """
-            INSERT INTO pessoas (
-                nome_completo, doc_identidade, titulo_eleitor, cpf,
-                telefone, email, endereco, numero, complemento,
-                bairro, cidade, estado, cep, pais
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(sql, dados)
-        conn.commit()
-        
-        person_id = cursor.lastrowid
+        # Conexão retirada do pool compartilhado e devolvida ao final do bloco;
+        # avisos do MySQL (ex.: valor truncado) rejeitam a inserção, como antes do pool
+        with conexao(raise_on_warnings=True) as conn:
+            cursor = conn.cursor()
+            
+            sql = """
+                INSERT INTO pessoas (
+                    nome_completo, doc_identidade, titulo_eleitor, cpf,
+                    telefone, email, endereco, numero, complemento,
+                    bairro, cidade, estado, cep, pais
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            
+            cursor.execute(sql, dados)
+            conn.commit()
+            
+            person_id = cursor.lastrowid
+            cursor.close()
+        # Um "não encontrado" desse nome no cache de /buscar ficou velho
+        invalidar_buscas([dados[0]])
         print(f"✅ Pessoa adicionada com ID: {person_id}")
         return person_id
         
     except Error as e:
-        conn.rollback()
+        # Em caso de erro o pool desfaz a transação antes de reutilizar a conexão
         print(f"❌ Erro ao inserir dados: {e}")
         return None
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
 
 def adicionar_pessoa_exemplo() -> Optional[int]:
     """Adiciona dados de exemplo para teste"""
@@ -1,88 +1,77 @@
-import mysql.connector
 from mysql.connector import Error
-import os
-from dotenv import load_dotenv
+import sys
+from pathlib import Path
 
-from config import db_config, host, user, password, name, port
+# Configuração de caminhos
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 
-# Carregar variáveis do .env
-load_dotenv()
-
-# Configuração melhorada com tratamento para MySQL 8+
-DB_CONFIG = {
-    "host": host,
-    "user": user,
-    "password": password,
-    "database": name,
-    "port": port,
-    **db_config  # Desempacota os outros parâmetros de configuração
-}
+from config import DB_CONFIG
+from db_pool import conexao
+from src.migrations import aplicar_migracoes
 
 def conectar_banco():
-    """Conecta ao MySQL e retorna a conexão com tratamento aprimorado de erros."""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        print("✅ Conexão estabelecida com sucesso")
-        return conn
-    except Error as e:
-        print(f"❌ Erro ao conectar: {e}")
-        # Mostra a configuração sem expor a senha
-        config_safe = DB_CONFIG.copy()
-        config_safe['password'] = '*****' if config_safe['password'] else 'None'
-        print(f"Configuração usada: {config_safe}")
-        return None
+    """
+    Retira uma conexão do pool compartilhado (use com `with`).
+    A conexão volta ao pool ao sair do bloco.
+    """
+    return conexao()
 
 def criar_tabela():
     """Cria a tabela 'pessoas' com tratamento transacional e UTF-8."""
-    conn = conectar_banco()
-    if not conn:
-        return False
-    
-    cursor = None
     try:
-        cursor = conn.cursor()
-        
-        # Query com encoding explícito
-        create_query = """
-            CREATE TABLE IF NOT EXISTS pessoas (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                nome_completo VARCHAR(200) NOT NULL,
-                doc_identidade VARCHAR(50),
-                titulo_eleitor VARCHAR(50),
-                cpf VARCHAR(20) UNIQUE,  # Evita CPFs duplicados
-                telefone VARCHAR(30),
-                email VARCHAR(100),
-                endereco TEXT,
-                numero VARCHAR(10),
-                complemento VARCHAR(50),
-                bairro VARCHAR(50),
-                cidade VARCHAR(50),
-                estado VARCHAR(2),
-                cep VARCHAR(10),
-                pais VARCHAR(50),
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP  # Campo adicional útil
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """
-        
-        cursor.execute(create_query)
-        conn.commit()
+        with conectar_banco() as conn:
+            cursor = conn.cursor()
+            
+            # Query com encoding explícito
+            create_query = """
+                CREATE TABLE IF NOT EXISTS pessoas (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    nome_completo VARCHAR(200) NOT NULL,
+                    doc_identidade VARCHAR(50),
+                    titulo_eleitor VARCHAR(50),
+                    cpf VARCHAR(20) UNIQUE,  # Evita CPFs duplicados
+                    telefone VARCHAR(30),
+                    email VARCHAR(100),
+                    endereco TEXT,
+                    numero VARCHAR(10),
+                    complemento VARCHAR(50),
+                    bairro VARCHAR(50),
+                    cidade VARCHAR(50),
+                    estado VARCHAR(2),
+                    cep VARCHAR(10),
+                    pais VARCHAR(50),
+                    data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  # Campo adicional útil
+                    INDEX idx_pessoas_nome (nome_completo),
+                    INDEX idx_pessoas_doc (doc_identidade)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """
+            
+            cursor.execute(create_query)
+            conn.commit()
+            cursor.close()
+            # Tabelas criadas antes dos índices
+            aplicar_migracoes(conn)
         print("✅ Tabela 'pessoas' criada/verificada com sucesso")
         return True
         
     except Error as e:
         print(f"❌ Erro ao criar tabela: {e}")
-        if conn:
-            conn.rollback()
         return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
 
 def testar_conexao():
     """Testa a conexão com o banco de dados."""
-    return conectar_banco() is not None
+    try:
+        with conectar_banco():
+            print("✅ Conexão estabelecida com sucesso")
+        return True
+    except Error as e:
+        print(f"❌ Erro ao conectar: {e}")
+        # Mostra a configuração sem expor a senha
+        config_safe = DB_CONFIG.copy()
+        config_safe['password'] = '*****' if config_safe['password'] else 'None'
+        print(f"Configuração usada: {config_safe}")
+        return False
 
 if __name__ == "__main__":
     if testar_conexao():
@@ -0,0 +1,170 @@
+"""
+DB_POOL.PY - Pool de conexões compartilhado com o MySQL
+- Um único pool por processo, criado a partir de config.DB_CONFIG
+- Tamanho e timeout configuráveis (config.DB_POOL_CONFIG)
+- Verificação de saúde (ping) ao retirar conexões ociosas
+- Retirada/devolução via context manager: `with conexao() as conn: ...`
+- `conexao(raise_on_warnings=True)`: avisos do MySQL viram erro só naquele bloco
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+from config import DB_CONFIG, DB_POOL_CONFIG
+
+
+class PoolEsgotadoError(PoolError):
+    """Nenhuma conexão ficou livre dentro do timeout do pool."""
+
+
+def _conexao_saudavel(conn):
+    """Verifica se a conexão ainda responde (ping no MySQL, SELECT 1 nos demais)."""
+    try:
+        if hasattr(conn, "ping"):
+            conn.ping(reconnect=False)
+        else:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+def _avisos_como_erro(conn):
+    """Liga raise_on_warnings (mysql.connector); retorna o estado anterior ou None."""
+    if not hasattr(conn, "raise_on_warnings"):
+        return None
+    anterior = (conn.raise_on_warnings, conn.get_warnings)
+    conn.raise_on_warnings = True
+    return anterior
+
+
+def _restaurar_avisos(conn, anterior):
+    if anterior is None:
+        return
+    try:
+        conn.raise_on_warnings, conn.get_warnings = anterior
+    except Exception:
+        pass
+
+
+def _fechar(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Pool genérico de conexões DB-API. `fabrica` cria novas conexões
+    (mysql.connector.connect por padrão); no máximo `tamanho` conexões
+    ficam abertas e quem passar do limite espera até `timeout` segundos.
+    """
+
+    def __init__(self, fabrica, tamanho=5, timeout=10.0, ociosidade_ping=5.0):
+        self._fabrica = fabrica
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self.tamanho = tamanho
+        self.timeout = timeout
+        # Conexões usadas há menos que isso não são verificadas de novo
+        self.ociosidade_ping = ociosidade_ping
+
+    def obter(self):
+        """Retira uma conexão saudável do pool (ou cria uma nova)."""
+        if not self._vagas.acquire(timeout=self.timeout):
+            raise PoolEsgotadoError(f"Pool esgotado: {self.tamanho} conexões em uso")
+        try:
+            while True:
+                try:
+                    conn, ultimo_uso = self._livres.get_nowait()
+                except queue.Empty:
+                    return self._fabrica()
+                ociosa = time.monotonic() - ultimo_uso >= self.ociosidade_ping
+                if not ociosa or _conexao_saudavel(conn):
+                    return conn
+                _fechar(conn)
+        except BaseException:
+            self._vagas.release()
+            raise
+
+    def devolver(self, conn, descartar=False):
+        """Devolve a conexão ao pool, encerrando transações pendentes."""
+        try:
+            if not descartar:
+                try:
+                    if getattr(conn, "in_transaction", False):
+                        conn.rollback()
+                except Exception:
+                    descartar = True
+            if descartar:
+                _fechar(conn)
+            else:
+                self._livres.put((conn, time.monotonic()))
+        finally:
+            self._vagas.release()
+
+    @contextmanager
+    def conexao(self, raise_on_warnings=False):
+        """
+        Context manager: retira uma conexão e a devolve ao sair do bloco.
+        Com `raise_on_warnings`, avisos do MySQL levantam erro dentro do bloco;
+        a conexão volta ao pool com a configuração anterior.
+        """
+        conn = self.obter()
+        avisos = _avisos_como_erro(conn) if raise_on_warnings else None
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+                descartar = False
+            except Exception:
+                descartar = True
+            _restaurar_avisos(conn, avisos)
+            self.devolver(conn, descartar=descartar)
+            raise
+        else:
+            _restaurar_avisos(conn, avisos)
+            self.devolver(conn)
+
+    def fechar(self):
+        """Fecha todas as conexões livres."""
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except queue.Empty:
+                return
+            _fechar(conn)
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def obter_pool():
+    """Retorna o pool do processo, criando-o na primeira chamada."""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    lambda: mysql.connector.connect(**DB_CONFIG),
+                    tamanho=DB_POOL_CONFIG["pool_size"],
+                    timeout=DB_POOL_CONFIG["timeout"],
+                    ociosidade_ping=DB_POOL_CONFIG["ping_after_idle"],
+                )
+    return _pool
+
+
+def conexao(raise_on_warnings=False):
+    """Atalho para `obter_pool().conexao()`."""
+    return obter_pool().conexao(raise_on_warnings=raise_on_warnings)
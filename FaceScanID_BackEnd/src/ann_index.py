@@ -0,0 +1,254 @@
+"""
+ANN_INDEX.PY - Busca aproximada (ANN) para galerias muito grandes
+- IVF-flat implementado em NumPy (apenas CPU, sem dependências extras)
+- HNSW opcional via hnswlib, se instalado
+- Mesmo contrato de busca de GalleryIndex: (identidade, distância) por consulta
+- Galerias comprimidas (float16, int8, PQ) de quantization.py pelo mesmo caminho
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import FILES, DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import FILES, DEEPFACE_CONFIG
+
+from src.gallery_index import GalleryIndex, normalizar_l2
+from src.quantization import BACKENDS_QUANTIZADOS
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+def _kmeans_esferico(dados, n_clusters, n_iter=10, pontos_por_cluster=40, seed=0):
+    """K-means sobre vetores unitários (atribuição por produto interno)."""
+    rng = np.random.default_rng(seed)
+    amostra_max = n_clusters * pontos_por_cluster
+    if len(dados) > amostra_max:
+        dados = dados[rng.choice(len(dados), amostra_max, replace=False)]
+
+    centroides = dados[rng.choice(len(dados), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        rotulos = np.argmax(dados @ centroides.T, axis=1)
+        contagens = np.bincount(rotulos, minlength=n_clusters)
+        inicios = np.concatenate(([0], np.cumsum(contagens)[:-1]))
+        cheios = contagens > 0
+
+        somas = np.empty_like(centroides)
+        somas[cheios] = np.add.reduceat(dados[np.argsort(rotulos)], inicios[cheios], axis=0)
+        # Clusters vazios são reiniciados com pontos aleatórios
+        vazios = ~cheios
+        somas[vazios] = dados[rng.choice(len(dados), int(vazios.sum()), replace=False)]
+        centroides = normalizar_l2(somas)
+    return centroides
+
+
+def _atribuir(dados, centroides, bloco=65_536):
+    """Atribui cada vetor ao centróide mais próximo, em blocos para limitar memória."""
+    rotulos = np.empty(len(dados), dtype=np.int64)
+    for inicio in range(0, len(dados), bloco):
+        fim = inicio + bloco
+        rotulos[inicio:fim] = np.argmax(dados[inicio:fim] @ centroides.T, axis=1)
+    return rotulos
+
+
+class IVFFlatIndex(GalleryIndex):
+    """
+    Índice invertido (IVF) com listas armazenadas sem compressão.
+    Os vetores de cada lista ficam contíguos na matriz, então a varredura
+    de uma lista é uma única fatia. `nprobe` controla recall x latência.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, identidades, embeddings, nlist=0, nprobe=None,
+                 centroides=None, offsets=None, **kwargs):
+        super().__init__(identidades, embeddings, **kwargs)
+        self.nprobe = nprobe or DEEPFACE_CONFIG.get('ann_nprobe', 8)
+
+        if centroides is not None:
+            # Índice já treinado (carregado do disco): matriz já está ordenada por lista
+            self.centroides = np.asarray(centroides, dtype=np.float32)
+            self.offsets = np.asarray(offsets, dtype=np.int64)
+            return
+
+        if not len(self):
+            # Galeria vazia: nenhuma lista para treinar
+            self.centroides = np.empty((0, self.dimensao), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            return
+
+        nlist = nlist or max(1, int(np.sqrt(len(self))))
+        nlist = min(nlist, len(self))
+        self.centroides = _kmeans_esferico(self.matriz, nlist)
+        rotulos = _atribuir(self.matriz, self.centroides)
+
+        ordem = np.argsort(rotulos, kind="stable")
+        self.matriz = np.ascontiguousarray(self.matriz[ordem])
+        self.identidades = self.identidades[ordem]
+        self.offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(rotulos, minlength=nlist)))
+        ).astype(np.int64)
+
+    @property
+    def nlist(self):
+        return len(self.centroides)
+
+    def _sondar(self, consultas, nprobe):
+        """Listas visitadas por consulta: as `nprobe` de centróide mais próximo."""
+        return np.argpartition(-(consultas @ self.centroides.T), nprobe - 1, axis=1)[:, :nprobe]
+
+    def _linhas(self, sondadas):
+        """Linhas da matriz que pertencem às listas sondadas."""
+        return np.concatenate([
+            np.arange(self.offsets[l], self.offsets[l + 1]) for l in sondadas
+        ])
+
+    def search_batch(self, consultas, k=1):
+        consultas = self._preparar(consultas)
+        if not len(self):
+            return [[] for _ in range(len(consultas))]
+
+        listas = self._sondar(consultas, min(self.nprobe, self.nlist))
+
+        resultados = []
+        for consulta, sondadas in zip(consultas, listas):
+            indices = self._linhas(sondadas)
+            if not len(indices):
+                resultados.append([])
+                continue
+
+            distancias = 1.0 - self.matriz[indices] @ consulta
+            kk = min(k, len(indices))
+            melhores = np.argpartition(distancias, kk - 1)[:kk]
+            melhores = melhores[np.argsort(distancias[melhores], kind="stable")]
+            resultados.append([
+                (self.identidades[indices[i]], float(distancias[i]))
+                for i in melhores if distancias[i] <= self.limiar
+            ])
+        return resultados
+
+    def salvar(self, caminho):
+        np.savez(
+            caminho,
+            backend=self.backend,
+            model_name=self.model_name,
+            limiar=self.limiar,
+            identidades=self.identidades.astype(str),
+            matriz=self.matriz,
+            centroides=self.centroides,
+            offsets=self.offsets,
+        )
+
+    @classmethod
+    def carregar(cls, dados, caminho):
+        return cls(
+            dados['identidades'], dados['matriz'],
+            centroides=dados['centroides'], offsets=dados['offsets'], normalizado=True,
+            limiar=float(dados['limiar']), model_name=str(dados['model_name']),
+        )
+
+
+class HNSWIndex(GalleryIndex):
+    """Grafo HNSW via hnswlib (dependência opcional). `ef` controla recall x latência."""
+
+    backend = "hnsw"
+
+    def __init__(self, identidades, embeddings=None, ef=None, m=16, ef_construction=200,
+                 grafo=None, **kwargs):
+        if hnswlib is None:
+            raise ImportError("hnswlib não instalado. Use: pip install hnswlib")
+
+        if grafo is None:
+            super().__init__(identidades, embeddings, **kwargs)
+            grafo = hnswlib.Index(space="cosine", dim=self.dimensao)
+            grafo.init_index(max_elements=len(self), M=m, ef_construction=ef_construction)
+            grafo.add_items(self.matriz, np.arange(len(self)))
+        else:
+            super().__init__(identidades, np.empty((len(identidades), 0)), **kwargs)
+
+        self.grafo = grafo
+        self.ef = ef or DEEPFACE_CONFIG.get('ann_ef_search', 64)
+        # Os vetores ficam dentro do grafo; não mantém uma segunda cópia
+        self.matriz = np.empty((0, grafo.dim), dtype=np.float32)
+
+    @property
+    def dimensao(self):
+        if hasattr(self, 'grafo'):
+            return self.grafo.dim
+        return super().dimensao
+
+    def search_batch(self, consultas, k=1):
+        consultas = self._preparar(consultas)
+        if not len(self):
+            return [[] for _ in range(len(consultas))]
+
+        k = min(k, len(self))
+        self.grafo.set_ef(max(self.ef, k))
+        rotulos, distancias = self.grafo.knn_query(consultas, k=k)
+        return [
+            [(self.identidades[i], float(d)) for i, d in zip(linha_i, linha_d) if d <= self.limiar]
+            for linha_i, linha_d in zip(rotulos, distancias)
+        ]
+
+    def salvar(self, caminho):
+        caminho = Path(caminho)
+        self.grafo.save_index(str(caminho.with_suffix('.hnsw')))
+        np.savez(
+            caminho,
+            backend=self.backend,
+            model_name=self.model_name,
+            limiar=self.limiar,
+            identidades=self.identidades.astype(str),
+            dimensao=self.dimensao,
+        )
+
+    @classmethod
+    def carregar(cls, dados, caminho):
+        if hnswlib is None:
+            raise ImportError("hnswlib não instalado. Use: pip install hnswlib")
+        identidades = dados['identidades']
+        grafo = hnswlib.Index(space="cosine", dim=int(dados['dimensao']))
+        grafo.load_index(str(Path(caminho).with_suffix('.hnsw')), max_elements=len(identidades))
+        return cls(
+            identidades, grafo=grafo, limiar=float(dados['limiar']), model_name=str(dados['model_name']),
+        )
+
+
+BACKENDS = {
+    IVFFlatIndex.backend: IVFFlatIndex,
+    HNSWIndex.backend: HNSWIndex,
+    **BACKENDS_QUANTIZADOS,
+}
+
+
+def construir_indice_ann(identidades, embeddings, backend=None, **parametros):
+    """Constrói um índice ANN do backend configurado em DEEPFACE_CONFIG['ann_backend']."""
+    backend = backend or DEEPFACE_CONFIG.get('ann_backend', 'exact')
+    if backend == "exact":
+        return GalleryIndex(identidades, embeddings, **parametros)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend ANN desconhecido: {backend}")
+    if backend == "ivf":
+        parametros.setdefault('nlist', DEEPFACE_CONFIG.get('ann_nlist', 0))
+    if backend == "pq":
+        parametros.setdefault('m', DEEPFACE_CONFIG.get('pq_subvetores', 64))
+    return BACKENDS[backend](identidades, embeddings, **parametros)
+
+
+def carregar_indice_ann(caminho=None):
+    """Carrega um índice ANN salvo por train.py, despachando pelo backend gravado."""
+    caminho = Path(caminho or FILES['ann_index'])
+    with np.load(caminho, allow_pickle=False) as dados:
+        backend = str(dados['backend'])
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend ANN desconhecido em {caminho}: {backend}")
+        return BACKENDS[backend].carregar(dados, caminho)
@@ -0,0 +1,303 @@
+"""
+BULK_IMPORT.PY - Importação em massa da tabela 'pessoas'
+- Lê CSV ou NDJSON em streaming (sem carregar o arquivo na memória)
+- Valida cada linha como validar_dados_pessoa (database/add_person.py)
+- Insere em lotes com executemany, uma transação por lote
+- Queda de conexão: o lote é refeito em uma conexão nova do pool (sem rejeitar linhas)
+- Relatório com linhas/s e diagnóstico das linhas rejeitadas
+
+Uso:
+    python src/bulk_import.py pessoas.csv --lote 1000 --rejeitados rejeitados.ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+from mysql.connector import Error, InterfaceError, OperationalError
+
+# Configuração de importação segura
+try:
+    import config  # noqa: F401
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+
+from db_pool import conexao
+from src.lookup_cache import invalidar_buscas
+from src.pessoas import CAMPOS_PESSOA, SQL_INSERIR_PESSOA
+
+# Máximo de diagnósticos mantidos em memória para o resumo e a resposta HTTP
+# (o total é sempre contado; --rejeitados grava todos)
+MAX_DIAGNOSTICOS = 1000
+
+# Erros da conexão (queda, timeout), não dos dados: o lote é refeito em outra conexão
+ERROS_CONEXAO = (OperationalError, InterfaceError)
+TENTATIVAS_LOTE = 2
+
+VERDADEIROS = {"1", "true", "sim", "s", "yes", "y"}
+FALSOS = {"0", "false", "nao", "não", "n", "no"}
+
+
+class PerfilImportacao:
+    """Colunas, SQL e campos obrigatórios de um formato de cadastro."""
+
+    def __init__(self, campos, sql, obrigatorios, booleanos=()):
+        self.campos = tuple(campos)
+        self.sql = sql
+        self.obrigatorios = tuple(obrigatorios)
+        self.booleanos = set(booleanos)
+
+    def converter(self, registro):
+        """
+        Converte um registro (dict) na tupla do INSERT.
+        Retorna (valores, motivo); motivo não é None se a linha for rejeitada.
+        """
+        if not isinstance(registro, dict):
+            return None, "Registro não é um objeto"
+
+        valores = []
+        for campo in self.campos:
+            valor = registro.get(campo)
+            if isinstance(valor, str):
+                valor = valor.strip() or None
+            if campo in self.booleanos and isinstance(valor, str):
+                if valor.lower() in VERDADEIROS:
+                    valor = 1
+                elif valor.lower() in FALSOS:
+                    valor = 0
+                else:
+                    return None, f"Valor booleano inválido em '{campo}': {valor}"
+            valores.append(valor)
+
+        faltando = [campo for campo, valor in zip(self.campos, valores)
+                    if campo in self.obrigatorios and not valor]
+        if faltando:
+            return None, f"Campos obrigatórios ausentes: {', '.join(faltando)}"
+        return tuple(valores), None
+
+
+# Mesmo formato de database/add_person.py (nome completo e CPF obrigatórios)
+PERFIL_CADASTRO = PerfilImportacao(
+    campos=(
+        "nome_completo", "doc_identidade", "titulo_eleitor", "cpf",
+        "telefone", "email", "endereco", "numero", "complemento",
+        "bairro", "cidade", "estado", "cep", "pais",
+    ),
+    sql="""
+        INSERT INTO pessoas (
+            nome_completo, doc_identidade, titulo_eleitor, cpf,
+            telefone, email, endereco, numero, complemento,
+            bairro, cidade, estado, cep, pais
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    obrigatorios=("nome_completo", "cpf"),
+)
+
+# Mesmo formato do endpoint /adicionar (nome completo e documento obrigatórios)
+PERFIL_API = PerfilImportacao(
+    campos=CAMPOS_PESSOA,
+    sql=SQL_INSERIR_PESSOA,
+    obrigatorios=("nome_completo", "doc_identidade"),
+    booleanos=[campo for campo in CAMPOS_PESSOA if campo.startswith("possui_")],
+)
+
+PERFIS = {"cadastro": PERFIL_CADASTRO, "api": PERFIL_API}
+
+
+class RelatorioImportacao:
+    """
+    Contadores e diagnósticos de uma importação. Com `saida_rejeitados`
+    (arquivo de texto aberto), cada linha rejeitada também é gravada nele em
+    NDJSON à medida que aparece, sem o limite de MAX_DIAGNOSTICOS.
+    """
+
+    def __init__(self, saida_rejeitados=None):
+        self.saida_rejeitados = saida_rejeitados
+        self.inseridos = 0
+        self.total_rejeitados = 0
+        self.rejeitados = []  # [(linha, motivo)], limitado a MAX_DIAGNOSTICOS
+        self.lotes = 0
+        self.inicio = time.perf_counter()
+        self.segundos = 0.0
+
+    def rejeitar(self, linha, motivo):
+        self.total_rejeitados += 1
+        if self.saida_rejeitados is not None:
+            self.saida_rejeitados.write(json.dumps({"linha": linha, "motivo": motivo}, ensure_ascii=False) + "\n")
+        if len(self.rejeitados) < MAX_DIAGNOSTICOS:
+            self.rejeitados.append((linha, motivo))
+
+    def finalizar(self):
+        self.segundos = time.perf_counter() - self.inicio
+        return self
+
+    @property
+    def linhas_por_segundo(self):
+        return self.inseridos / self.segundos if self.segundos else 0.0
+
+    def como_dict(self):
+        return {
+            "inseridos": self.inseridos,
+            "rejeitados": self.total_rejeitados,
+            "lotes": self.lotes,
+            "segundos": round(self.segundos, 3),
+            "linhas_por_segundo": round(self.linhas_por_segundo, 1),
+            "diagnosticos": [{"linha": linha, "motivo": motivo} for linha, motivo in self.rejeitados],
+        }
+
+
+def ler_csv(arquivo):
+    """Gera (número da linha, dict) a partir de um CSV com cabeçalho."""
+    for numero, registro in enumerate(csv.DictReader(arquivo), start=2):
+        yield numero, registro
+
+
+def ler_ndjson(arquivo):
+    """Gera (número da linha, dict) a partir de um NDJSON; JSON inválido vira None."""
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError:
+            yield numero, None
+
+
+def filtrar_validos(registros, perfil, relatorio):
+    """Gera (número da linha, valores) das linhas válidas, registrando as rejeitadas."""
+    for numero, registro in registros:
+        if registro is None:
+            valores, motivo = None, "JSON inválido"
+        else:
+            valores, motivo = perfil.converter(registro)
+        if motivo:
+            relatorio.rejeitar(numero, motivo)
+        else:
+            yield numero, valores
+
+
+def _inserir_lote(cursor, conn, perfil, lote):
+    """
+    Insere um lote em uma transação; se falhar, isola as linhas problemáticas.
+    Retorna (inseridos, [(linha, motivo)]) depois do commit. Erros de conexão
+    são propagados: não dizem nada sobre as linhas.
+    """
+    try:
+        cursor.executemany(perfil.sql, [valores for _, valores in lote])
+        conn.commit()
+        return len(lote), []
+    except ERROS_CONEXAO:
+        raise
+    except Error:
+        conn.rollback()
+
+    # Algum registro do lote violou uma restrição: insere um a um para identificá-lo
+    inseridos, rejeitados = 0, []
+    for numero, valores in lote:
+        try:
+            cursor.execute(perfil.sql, valores)
+            inseridos += 1
+        except ERROS_CONEXAO:
+            raise
+        except Error as e:
+            rejeitados.append((numero, str(e)))
+    conn.commit()
+    return inseridos, rejeitados
+
+
+def _gravar_lote(perfil, lote, relatorio):
+    """
+    Grava um lote com uma conexão do pool. Se a conexão cair, ela é descartada
+    e o lote (desfeito pelo banco) é refeito em uma conexão nova; na última
+    tentativa o erro é propagado, sem rejeitar linhas válidas.
+    """
+    for tentativa in range(1, TENTATIVAS_LOTE + 1):
+        try:
+            with conexao() as conn:
+                cursor = conn.cursor()
+                inseridos, rejeitados = _inserir_lote(cursor, conn, perfil, lote)
+                cursor.close()
+        except ERROS_CONEXAO as e:
+            if tentativa == TENTATIVAS_LOTE:
+                raise
+            print(f"⚠️ Conexão perdida no lote {relatorio.lotes + 1} ({e}); tentando de novo")
+            continue
+        relatorio.inseridos += inseridos
+        for numero, motivo in rejeitados:
+            relatorio.rejeitar(numero, motivo)
+        return
+
+
+def importar_registros(registros, perfil=PERFIL_CADASTRO, tamanho_lote=1000, relatorio=None):
+    """
+    Importa registros (iterável de (número da linha, dict)) em lotes.
+    Cada lote é uma transação com executemany; retorna o RelatorioImportacao.
+    """
+    relatorio = relatorio or RelatorioImportacao()
+    fonte = filtrar_validos(registros, perfil, relatorio)
+    while True:
+        lote = list(islice(fonte, tamanho_lote))
+        if not lote:
+            break
+        _gravar_lote(perfil, lote, relatorio)
+        relatorio.lotes += 1
+
+    return relatorio.finalizar()
+
+
+def importar_stream(stream, formato, perfil=PERFIL_CADASTRO, tamanho_lote=1000, relatorio=None):
+    """Importa de um stream de texto (arquivo aberto, corpo de requisição etc.)."""
+    leitor = ler_csv if formato == "csv" else ler_ndjson
+    return importar_registros(leitor(stream), perfil=perfil, tamanho_lote=tamanho_lote, relatorio=relatorio)
+
+
+def importar_arquivo(caminho, formato=None, perfil=PERFIL_CADASTRO, tamanho_lote=1000, relatorio=None):
+    """Importa um arquivo CSV/NDJSON (formato deduzido pela extensão se omitido)."""
+    caminho = Path(caminho)
+    formato = formato or ("csv" if caminho.suffix.lower() == ".csv" else "ndjson")
+    with open(caminho, "r", encoding="utf-8", newline="") as arquivo:
+        return importar_stream(arquivo, formato, perfil=perfil, tamanho_lote=tamanho_lote, relatorio=relatorio)
+
+
+def stream_texto(stream_binario):
+    """Adapta um stream binário (ex.: request.stream) para leitura de texto UTF-8."""
+    return io.TextIOWrapper(stream_binario, encoding="utf-8", newline="")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importação em massa da tabela pessoas")
+    parser.add_argument("arquivo", help="arquivo .csv ou .ndjson")
+    parser.add_argument("--formato", choices=("csv", "ndjson"), default=None)
+    parser.add_argument("--perfil", choices=tuple(PERFIS), default="cadastro",
+                        help="cadastro: colunas de add_person.py; api: colunas de /adicionar")
+    parser.add_argument("--lote", type=int, default=1000, help="linhas por transação")
+    parser.add_argument("--rejeitados", default=None, help="salva todas as linhas rejeitadas em NDJSON")
+    args = parser.parse_args()
+
+    saida = open(args.rejeitados, "w", encoding="utf-8") if args.rejeitados else None
+    try:
+        relatorio = importar_arquivo(args.arquivo, args.formato, PERFIS[args.perfil], args.lote,
+                                     relatorio=RelatorioImportacao(saida))
+    except Error as e:
+        print(f"❌ Erro de banco de dados: {e}")
+        sys.exit(1)
+    finally:
+        if saida:
+            saida.close()
+        # Lotes anteriores a uma falha já foram gravados: "não encontrado" em cache ficou velho
+        invalidar_buscas()
+
+    print(f"✅ Importação concluída: {relatorio.inseridos} linhas em {relatorio.segundos:.1f}s "
+          f"({relatorio.linhas_por_segundo:.0f} linhas/s, {relatorio.lotes} lotes)")
+    if relatorio.total_rejeitados:
+        print(f"⚠️ {relatorio.total_rejeitados} linhas rejeitadas")
+        for linha, motivo in relatorio.rejeitados[:10]:
+            print(f"   - linha {linha}: {motivo}")
+        if args.rejeitados:
+            print(f"   Linhas rejeitadas salvas em {args.rejeitados}")
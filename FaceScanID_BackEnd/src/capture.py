@@ -14,12 +14,14 @@ from tkinter import messagebox, ttk
 
 # Configuração de importação segura
 try:
-    from config import DIRECTORIES
+    from config import DIRECTORIES, initialize_directories
 except ImportError:
     # Fallback para caso o config.py não seja encontrado
     PROJECT_ROOT = Path(__file__).parent.parent
     sys.path.append(str(PROJECT_ROOT))
-    from config import DIRECTORIES
+    from config import DIRECTORIES, initialize_directories
+
+from src.video_pipeline import abrir_camera
 
 class CaptureApp:
     def __init__(self, root):
@@ -98,8 +100,8 @@ class CaptureApp:
     def start_camera(self):
         """Inicia a câmera padrão com configurações para Windows"""
         try:
-            # Força o uso do backend DirectShow no Windows
-            self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
+            # Backend nativo do sistema (DirectShow no Windows, V4L2 no Linux)
+            self.cap = abrir_camera(self.camera_index)
             
             if not self.cap.isOpened():
                 messagebox.showerror(
@@ -173,6 +175,7 @@ class CaptureApp:
         self.root.destroy()
 
 def main():
+    initialize_directories()
     root = tk.Tk()
     app = CaptureApp(root)
     root.protocol("WM_DELETE_WINDOW", app.close_app)
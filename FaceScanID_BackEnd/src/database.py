@@ -1,28 +1,29 @@
-import mysql.connector
 from mysql.connector import Error
-import os
-from dotenv import load_dotenv
-from config import db_config, host, user, password, name, port
+import sys
+from pathlib import Path
+
+# Configuração de importação segura
+try:
+    from config import DB_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DB_CONFIG
+
+from db_pool import obter_pool
+from src.migrations import aplicar_migracoes
 
 class DatabaseManager:
     def __init__(self):
-        load_dotenv()  # Carrega variáveis do .env
-        DB_CONFIG = {
-            "host": host,
-            "user": user,
-            "password": password,
-            "database": name,
-            "port": port,
-            **db_config  # Desempacota os outros parâmetros de configuração
-        }
+        self.config = DB_CONFIG
+        self.pool = obter_pool()  # Pool compartilhado com a API e os scripts de database/
         self.test_connection()  # Testa a conexão ao inicializar
 
     def test_connection(self):
         """Testa a conexão com o banco de dados"""
         try:
-            conn = mysql.connector.connect(**self.config)
-            print("✅ Conexão estabelecida com sucesso")
-            conn.close()
+            with self.get_connection():
+                print("✅ Conexão estabelecida com sucesso")
             return True
         except Error as e:
             print(f"❌ Falha na conexão: {e}")
@@ -30,13 +31,8 @@ class DatabaseManager:
             return False
     
     def get_connection(self):
-        """Estabelece conexão com o MySQL e retorna o objeto de conexão"""
-        try:
-            conn = mysql.connector.connect(**self.config)
-            return conn
-        except Error as e:
-            print(f"❌ Erro ao conectar: {e}")
-            return None
+        """Retira uma conexão do pool (use com `with`; é devolvida ao sair)"""
+        return self.pool.conexao()
     
     def create_pessoas_table(self):
         """Cria a tabela pessoas com todas as colunas necessárias"""
@@ -56,57 +52,48 @@ class DatabaseManager:
             "estado VARCHAR(2)",
             "cep VARCHAR(10)",
             "pais VARCHAR(50)",
-            "data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP"  # Adicionado campo de data
+            "data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP",  # Adicionado campo de data
+            "INDEX idx_pessoas_nome (nome_completo)",  # Buscas por nome (igualdade e prefixo)
+            "INDEX idx_pessoas_doc (doc_identidade)"
         ]
         
-        conn = self.get_connection()
-        if not conn:
-            return False
-        
         try:
-            cursor = conn.cursor()
-            create_query = f"""
-                CREATE TABLE IF NOT EXISTS pessoas (
-                    {', '.join(columns)}
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """
-            cursor.execute(create_query)
-            conn.commit()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                create_query = f"""
+                    CREATE TABLE IF NOT EXISTS pessoas (
+                        {', '.join(columns)}
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                """
+                cursor.execute(create_query)
+                conn.commit()
+                cursor.close()
+                # Tabelas criadas antes dos índices
+                aplicar_migracoes(conn)
             print("✅ Tabela 'pessoas' criada/verificada com sucesso")
             return True
         except Error as e:
-            conn.rollback()
             print(f"❌ Erro ao criar tabela: {e}")
             return False
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
 
     def execute_query(self, query, params=None):
         """Executa uma query genérica com tratamento de erros"""
-        conn = self.get_connection()
-        if not conn:
-            return None
-            
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            
-            if query.strip().upper().startswith('SELECT'):
-                return cursor.fetchall()
-            else:
-                conn.commit()
-                return cursor.rowcount
+            with self.get_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(query, params or ())
+                
+                if query.strip().upper().startswith('SELECT'):
+                    resultado = cursor.fetchall()
+                else:
+                    conn.commit()
+                    resultado = cursor.rowcount
+                cursor.close()
+                return resultado
                 
         except Error as e:
-            conn.rollback()
             print(f"❌ Erro na query: {e}\nQuery: {query}")
             return None
-        finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
 
 if __name__ == "__main__":
     db = DatabaseManager()
@@ -0,0 +1,216 @@
+"""
+EMBEDDING_DB.PY - Embeddings da galeria no MySQL, ligados a pessoas.id
+- Tabela 'embeddings': um vetor por foto, com pessoa_id, arquivo e modelo
+- Vetores normalizados (L2) gravados como BLOB compacto: float16 (2 B/dim)
+  ou int8 com escala por vetor (1 B/dim)
+- Carregamento em blocos (paginação por id) direto para a matriz do GalleryIndex
+- Vários servidores montam a mesma galeria a partir do banco
+- Resultados de reconhecimento trazem pessoa_id: sem SELECT por nome a cada rosto
+
+Sincronização a partir da galeria gerada por train.py:
+    python src/embedding_db.py --dtype int8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from db_pool import conexao
+from src.gallery_index import GalleryIndex, normalizar_l2
+from src.migrations import SQL_CRIAR_TABELA_EMBEDDINGS, SQL_CRIAR_TABELA_VERSOES
+from src.templates import identidade_do_arquivo
+
+DTYPES_BANCO = ("float16", "int8")
+TAMANHO_BLOCO = 10_000
+
+SQL_GRAVAR_EMBEDDING = """
+    INSERT INTO embeddings (pessoa_id, arquivo, model_name, dimensao, dtype, escala, vetor)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE pessoa_id = VALUES(pessoa_id), dimensao = VALUES(dimensao),
+        dtype = VALUES(dtype), escala = VALUES(escala), vetor = VALUES(vetor)
+"""
+
+SQL_GRAVAR_VERSAO = """
+    INSERT INTO galeria_versoes (model_name, versao) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE versao = VALUES(versao)
+"""
+
+SQL_LER_VERSAO = "SELECT versao FROM galeria_versoes WHERE model_name = %s"
+
+SQL_BLOCO_EMBEDDINGS = """
+    SELECT id, pessoa_id, arquivo, dimensao, dtype, escala, vetor
+    FROM embeddings WHERE model_name = %s AND id > %s ORDER BY id LIMIT %s
+"""
+
+
+def codificar(embedding, dtype="float16"):
+    """Normaliza e compacta um embedding. Retorna (bytes, escala); escala é None em float16."""
+    if dtype not in DTYPES_BANCO:
+        raise ValueError(f"dtype não suportado no banco: {dtype}")
+    vetor = normalizar_l2(embedding).reshape(-1)
+    if dtype == "float16":
+        return vetor.astype(np.float16).tobytes(), None
+    # int8 simétrico: o maior |valor| do vetor vira 127
+    escala = float(np.abs(vetor).max()) / 127.0 or 1.0
+    return np.round(vetor / escala).astype(np.int8).tobytes(), escala
+
+
+def decodificar(vetor, dtype, escala=None):
+    """Inverso de codificar: vetor float32 (aproximadamente unitário)."""
+    if dtype == "float16":
+        return np.frombuffer(vetor, dtype=np.float16).astype(np.float32)
+    return np.frombuffer(vetor, dtype=np.int8).astype(np.float32) * np.float32(escala)
+
+
+def resolver_pessoas(conn, arquivos, bloco=1000):
+    """
+    Liga cada arquivo da galeria a pessoas.id pelo nome (feito uma vez, na
+    sincronização). O nome é o mesmo de src/templates.py: fotos adicionais
+    ('Maria_Silva_2.jpg') ligam à mesma pessoa. Retorna {arquivo: pessoa_id}
+    só com os encontrados.
+    """
+    nomes = {arquivo: identidade_do_arquivo(arquivo) for arquivo in arquivos}
+    distintos = sorted(set(nomes.values()))
+    ids = {}
+    cursor = conn.cursor()
+    for inicio in range(0, len(distintos), bloco):
+        parte = distintos[inicio:inicio + bloco]
+        cursor.execute(
+            f"SELECT id, nome_completo FROM pessoas WHERE nome_completo IN ({', '.join(['%s'] * len(parte))})",
+            parte
+        )
+        for pessoa_id, nome in cursor.fetchall():
+            # A collation do banco ignora maiúsculas; o primeiro cadastro vence
+            ids.setdefault(nome.casefold(), pessoa_id)
+    cursor.close()
+    return {arquivo: ids[nome.casefold()] for arquivo, nome in nomes.items() if nome.casefold() in ids}
+
+
+def sincronizar_embeddings(identidades, embeddings, model_name=None, dtype=None, bloco=1000):
+    """
+    Grava a galeria (mesma ordem de identidades/embeddings) na tabela
+    'embeddings' e remove as fotos que saíram dela. Retorna (gravados, sem_pessoa).
+    """
+    model_name = model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
+    dtype = dtype or DEEPFACE_CONFIG.get('db_embedding_dtype', 'float16')
+    embeddings = np.asarray(embeddings)
+    dimensao = embeddings.shape[1] if embeddings.ndim == 2 else 0
+
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_CRIAR_TABELA_EMBEDDINGS)
+        cursor.execute(SQL_CRIAR_TABELA_VERSOES)
+        pessoas = resolver_pessoas(conn, identidades)
+
+        linhas = []
+        for arquivo, embedding in zip(identidades, embeddings):
+            if arquivo in pessoas:
+                vetor, escala = codificar(embedding, dtype)
+                linhas.append((pessoas[arquivo], arquivo, model_name, dimensao, dtype, escala, vetor))
+        for inicio in range(0, len(linhas), bloco):
+            cursor.executemany(SQL_GRAVAR_EMBEDDING, linhas[inicio:inicio + bloco])
+            conn.commit()
+
+        cursor.execute("SELECT arquivo FROM embeddings WHERE model_name = %s", (model_name,))
+        removidos = sorted({linha[0] for linha in cursor.fetchall()} - set(pessoas))
+        for inicio in range(0, len(removidos), bloco):
+            parte = removidos[inicio:inicio + bloco]
+            cursor.execute(
+                f"DELETE FROM embeddings WHERE model_name = %s AND arquivo IN ({', '.join(['%s'] * len(parte))})",
+                [model_name, *parte]
+            )
+        # Nova versão: os servidores que leem a galeria do banco recarregam
+        cursor.execute(SQL_GRAVAR_VERSAO, (model_name, f"{time.time_ns():x}"))
+        conn.commit()
+        cursor.close()
+
+    sem_pessoa = [arquivo for arquivo in identidades if arquivo not in pessoas]
+    return len(linhas), sem_pessoa
+
+
+def ler_blocos(model_name=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera (pessoa_ids, arquivos, matriz float32) em blocos de até
+    `tamanho_bloco` linhas, paginando por id (sem OFFSET).
+    """
+    model_name = model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
+    ultimo_id = 0
+    with conexao() as conn:
+        cursor = conn.cursor()
+        while True:
+            cursor.execute(SQL_BLOCO_EMBEDDINGS, (model_name, ultimo_id, tamanho_bloco))
+            linhas = cursor.fetchall()
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+            yield (
+                np.array([linha[1] for linha in linhas], dtype=np.int64),
+                [linha[2] for linha in linhas],
+                np.vstack([decodificar(bytes(linha[6]), linha[4], linha[5]) for linha in linhas]),
+            )
+        cursor.close()
+
+
+def carregar_galeria_banco(model_name=None, tamanho_bloco=TAMANHO_BLOCO, dtype=None):
+    """
+    Monta um GalleryIndex a partir da tabela 'embeddings', bloco a bloco.
+    A matriz em memória usa DEEPFACE_CONFIG['store_dtype'] (float16 ocupa metade).
+    Retorna None se não houver embeddings do modelo.
+    """
+    model_name = model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
+    dtype = np.float16 if (dtype or DEEPFACE_CONFIG.get('store_dtype')) == "float16" else np.float32
+
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), MAX(dimensao) FROM embeddings WHERE model_name = %s", (model_name,))
+        total, dimensao = cursor.fetchone()
+        cursor.close()
+    if not total:
+        return None
+
+    # Matriz alocada uma vez; cada bloco é normalizado e copiado antes do próximo chegar
+    matriz = np.empty((total, dimensao), dtype=dtype)
+    pessoa_ids = np.empty(total, dtype=np.int64)
+    arquivos = []
+    for ids, nomes, bloco in ler_blocos(model_name, tamanho_bloco):
+        n = min(len(ids), total - len(arquivos))
+        inicio = len(arquivos)
+        matriz[inicio:inicio + n] = normalizar_l2(bloco[:n])
+        pessoa_ids[inicio:inicio + n] = ids[:n]
+        arquivos.extend(nomes[:n])
+        if len(arquivos) == total:
+            break
+
+    # Linhas removidas durante a leitura
+    return GalleryIndex(
+        arquivos, matriz[:len(arquivos)], model_name=model_name, normalizado=True,
+        pessoa_ids=pessoa_ids[:len(arquivos)]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grava a galeria de train.py na tabela 'embeddings'")
+    parser.add_argument("--origem", default=None, help="base da galeria memmap (padrão: FILES['store'])")
+    parser.add_argument("--dtype", choices=DTYPES_BANCO, default=None)
+    args = parser.parse_args()
+
+    from src.embedding_store import EmbeddingStore
+    store = EmbeddingStore(args.origem)
+    gravados, sem_pessoa = sincronizar_embeddings(
+        store.identidades(), np.asarray(store.matriz, dtype=np.float32),
+        model_name=store.model_name, dtype=args.dtype
+    )
+    print(f"✅ {gravados} embeddings gravados no banco ({store.model_name})")
+    for arquivo in sem_pessoa:
+        print(f"⚠️ Nenhuma pessoa cadastrada para {arquivo}")
@@ -0,0 +1,211 @@
+"""
+EMBEDDING_PIPELINE.PY - Geração paralela de embeddings em lote
+- Decodificação e detecção facial em um ProcessPoolExecutor
+- Rostos alinhados são enviados ao modelo em lotes de tamanho fixo
+- Um único modelo de reconhecimento (src/model_registry.py) faz um forward por lote
+- Ordem de saída determinística (a mesma da lista de entrada)
+"""
+
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+try:
+    from deepface.modules.preprocessing import resize_image, normalize_input
+except ImportError:
+    from deepface.commons.functions import normalize_input
+    resize_image = None
+
+from src.model_registry import obter_modelo, aquecer_detector, tamanho_entrada
+
+# Motivos de falha definitivos (a imagem não muda de resultado se reprocessada)
+FALHA_IMAGEM_INVALIDA = "imagem inválida"
+FALHA_SEM_FACE = "nenhuma face detectada"
+
+# Estado de cada processo de detecção (preenchido pelo inicializador)
+_WORKER = {}
+
+
+def redimensionar_face(face, tamanho):
+    """Redimensiona o rosto para a entrada do modelo, como o DeepFace.represent faz."""
+    if resize_image is not None:
+        # resize_image espera (largura, altura) e devolve (1, h, w, 3)
+        return resize_image(img=face, target_size=(tamanho[1], tamanho[0]))[0]
+    return cv2.resize(face, (tamanho[1], tamanho[0]))
+
+
+def _inicializar_worker(detector_backend, align, tamanho):
+    """Executado uma vez por processo: guarda a configuração e aquece o detector."""
+    _WORKER.update(detector_backend=detector_backend, align=align, tamanho=tamanho)
+    aquecer_detector(detector_backend, align)
+
+
+def _detectar(caminho):
+    """
+    Decodifica a imagem e extrai o primeiro rosto alinhado, já no tamanho
+    de entrada do modelo. Retorna (face, motivo_da_falha).
+    """
+    try:
+        img = cv2.imread(str(caminho))
+        if img is None:
+            return None, FALHA_IMAGEM_INVALIDA
+
+        # enforce_detection=False: sem rosto detectado, usa a imagem inteira
+        faces = DeepFace.extract_faces(
+            img_path=img,
+            detector_backend=_WORKER['detector_backend'],
+            enforce_detection=False,
+            align=_WORKER['align']
+        )
+        if not faces:
+            return None, FALHA_SEM_FACE
+
+        # extract_faces devolve RGB; o modelo é alimentado em BGR, como no represent
+        face = faces[0]["face"][:, :, ::-1]
+        return np.asarray(redimensionar_face(face, _WORKER['tamanho']), dtype=np.float32), None
+    except Exception as e:
+        return None, str(e)
+
+
+# Como cada modelo roda um lote, decidido no primeiro lote (id(modelo) -> modo)
+_MODOS_LOTE = {}
+
+
+def _keras_lote(modelo, lote):
+    """Saída (N, d) do modelo Keras por trás de modelo.forward."""
+    return np.asarray(modelo.model(lote, training=False), dtype=np.float64).reshape(len(lote), -1)
+
+
+def _normalizar_linhas(saida):
+    normas = np.linalg.norm(saida, axis=1, keepdims=True)
+    return saida / np.where(normas == 0, 1.0, normas)
+
+
+def _calibrar_lote(modelo, lote):
+    """
+    Escolhe como rodar um lote em `modelo`, comparando com o forward de uma imagem:
+    - "keras"/"keras_l2": o modelo Keras (modelo.model) no lote inteiro, com a
+      normalização L2 que o forward de alguns modelos aplica (ex.: VGG-Face)
+    - "forward": o forward já devolve uma linha por imagem
+    - "individual": um forward por imagem (último recurso)
+    """
+    referencia = np.asarray(modelo.forward(lote[:1]), dtype=np.float64).reshape(-1)
+    if getattr(modelo, 'model', None) is not None:
+        try:
+            saida = _keras_lote(modelo, lote[:1])
+        except Exception:
+            saida = None
+        if saida is not None and saida.shape[1] == len(referencia):
+            if np.allclose(saida[0], referencia, rtol=1e-4, atol=1e-6):
+                return "keras"
+            if np.allclose(_normalizar_linhas(saida)[0], referencia, rtol=1e-4, atol=1e-6):
+                return "keras_l2"
+    if len(lote) > 1:
+        saida = np.asarray(modelo.forward(lote), dtype=np.float64)
+        if saida.ndim == 2 and len(saida) == len(lote):
+            return "forward"
+    return "individual"
+
+
+def forward_lote(modelo, faces):
+    """Executa um único forward pass para todo o lote de rostos."""
+    lote = normalize_input(img=np.stack(faces), normalization="base")
+    if not hasattr(modelo, 'forward'):
+        return np.asarray(modelo.predict(lote, verbose=0), dtype=np.float64)
+
+    # O forward de várias versões do DeepFace (VGG-Face inclusive) só devolve a
+    # primeira imagem do lote; o modelo Keras por trás dele processa o lote todo
+    modo = _MODOS_LOTE.get(id(modelo))
+    if modo is None:
+        modo = _calibrar_lote(modelo, lote)
+        if modo != "individual" or len(lote) > 1:
+            _MODOS_LOTE[id(modelo)] = modo
+    if modo == "keras":
+        return _keras_lote(modelo, lote)
+    if modo == "keras_l2":
+        return _normalizar_linhas(_keras_lote(modelo, lote))
+    if modo == "forward":
+        return np.asarray(modelo.forward(lote), dtype=np.float64)
+    return np.stack([
+        np.asarray(modelo.forward(lote[i:i + 1]), dtype=np.float64).reshape(-1)
+        for i in range(len(faces))
+    ])
+
+
+def gerar_embeddings(caminhos, model_name=None, detector_backend=None, align=True,
+                     workers=None, batch_size=None):
+    """
+    Gera embeddings para uma lista de imagens.
+    É um gerador de (indice, embedding, motivo), na mesma ordem de `caminhos`;
+    `embedding` é None (e `motivo` descreve a falha) quando não há rosto.
+    """
+    model_name = model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
+    detector_backend = detector_backend or DEEPFACE_CONFIG.get('detector_backend', 'opencv')
+    workers = workers or DEEPFACE_CONFIG.get('embedding_workers') or os.cpu_count() or 1
+    batch_size = batch_size or DEEPFACE_CONFIG.get('embedding_batch_size', 32)
+
+    modelo = obter_modelo(model_name)
+    tamanho = tamanho_entrada(modelo)
+
+    # Limita quantas detecções ficam em voo para não acumular rostos na memória
+    limite = max(batch_size * 2, workers * 4)
+    entradas = iter(enumerate(caminhos))
+    lote_indices, lote_faces = [], []
+
+    def esvaziar_lote():
+        embeddings = forward_lote(modelo, lote_faces)
+        resultado = [(i, emb, None) for i, emb in zip(lote_indices, embeddings)]
+        lote_indices.clear()
+        lote_faces.clear()
+        return resultado
+
+    # spawn: o modelo (TensorFlow) já está carregado neste processo, e um fork
+    # herdaria suas threads e locks em estado indefinido
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_inicializar_worker,
+        initargs=(detector_backend, align, tamanho)
+    ) as executor:
+        em_voo = deque()
+        for indice, caminho in entradas:
+            em_voo.append((indice, executor.submit(_detectar, caminho)))
+            if len(em_voo) >= limite:
+                break
+
+        # Falhas só são emitidas depois do lote anterior, preservando a ordem
+        falhas = []
+        while em_voo:
+            indice, futuro = em_voo.popleft()
+            proxima = next(entradas, None)
+            if proxima is not None:
+                em_voo.append((proxima[0], executor.submit(_detectar, proxima[1])))
+
+            face, motivo = futuro.result()
+            if face is None:
+                falhas.append((indice, None, motivo))
+                continue
+
+            lote_indices.append(indice)
+            lote_faces.append(face)
+            if len(lote_faces) >= batch_size:
+                yield from sorted(esvaziar_lote() + falhas, key=lambda r: r[0])
+                falhas = []
+
+        pendentes = esvaziar_lote() if lote_faces else []
+        yield from sorted(pendentes + falhas, key=lambda r: r[0])
@@ -0,0 +1,214 @@
+"""
+EMBEDDING_STORE.PY - Armazenamento colunar da galeria com np.memmap
+- Matriz float32 (ou float16) crua, aberta via np.memmap (somente leitura)
+- Cabeçalho JSON com modelo, dimensão, dtype e normalização
+- Arquivo auxiliar com offsets + nomes das identidades (UTF-8)
+- Vários processos compartilham as mesmas páginas do sistema operacional
+
+Formato:
+    <base>.emb  -> cabeçalho JSON (TAMANHO_CABECALHO bytes) + matriz N x D
+    <base>.ids  -> int64 N, int64 offsets[N + 1], nomes UTF-8 concatenados, marca
+    A marca (bytes aleatórios) também está no cabeçalho ("marca"): os dois
+    arquivos são trocados um após o outro, e a marca mostra se são do mesmo par
+
+Conversão dos pickles antigos:
+    python src/embedding_store.py data/embeddings/deepface_representations.pkl
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import FILES, DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import FILES, DEEPFACE_CONFIG
+
+from src.gallery_index import normalizar_l2
+
+FORMATO = "FSID-EMB"
+VERSAO_FORMATO = 1
+TAMANHO_CABECALHO = 4096  # Mantém a matriz alinhada à página
+DTYPES = {"float32": np.float32, "float16": np.float16}
+TENTATIVAS_ABERTURA = 5  # Abertura durante uma regravação: espera a troca terminar
+
+
+def _caminhos(base):
+    base = Path(base)
+    return base.with_suffix('.emb'), base.with_suffix('.ids')
+
+
+def salvar_store(base, identidades, embeddings, model_name=None, dtype=None,
+                 normalizar=True, extras=None):
+    """
+    Grava a galeria no formato colunar. Os dois arquivos são escritos em
+    temporários e só então renomeados (.emb primeiro); leitores nunca veem um
+    arquivo pela metade, e a marca comum detecta um par .emb/.ids misturado.
+    """
+    dtype = dtype or DEEPFACE_CONFIG.get('store_dtype', 'float32')
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype não suportado: {dtype}")
+
+    matriz = normalizar_l2(embeddings) if normalizar else np.asarray(embeddings, dtype=np.float32)
+    matriz = np.ascontiguousarray(matriz, dtype=DTYPES[dtype])
+    quantidade, dimensao = matriz.shape if matriz.ndim == 2 else (0, 0)
+    if quantidade != len(identidades):
+        raise ValueError("Número de identidades diferente do número de embeddings")
+
+    cabecalho = {
+        "formato": FORMATO,
+        "versao": VERSAO_FORMATO,
+        "model_name": model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face'),
+        "dimensao": int(dimensao),
+        "quantidade": int(quantidade),
+        "dtype": dtype,
+        "normalizado": bool(normalizar),
+        "marca": os.urandom(8).hex(),
+        **(extras or {}),
+    }
+    bruto = json.dumps(cabecalho, ensure_ascii=False).encode('utf-8')
+    if len(bruto) >= TAMANHO_CABECALHO:
+        raise ValueError("Cabeçalho excede o tamanho reservado")
+
+    nomes = [str(nome).encode('utf-8') for nome in identidades]
+    offsets = np.zeros(len(nomes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(nome) for nome in nomes])
+
+    arquivo_emb, arquivo_ids = _caminhos(base)
+    arquivo_emb.parent.mkdir(parents=True, exist_ok=True)
+
+    temporario_ids = arquivo_ids.with_suffix('.ids.tmp')
+    with open(temporario_ids, 'wb') as f:
+        f.write(np.int64(len(nomes)).tobytes())
+        f.write(offsets.tobytes())
+        f.write(b''.join(nomes))
+        f.write(bytes.fromhex(cabecalho["marca"]))
+
+    temporario_emb = arquivo_emb.with_suffix('.emb.tmp')
+    with open(temporario_emb, 'wb') as f:
+        f.write(bruto.ljust(TAMANHO_CABECALHO, b' '))
+        f.write(matriz.tobytes())
+
+    os.replace(temporario_emb, arquivo_emb)
+    os.replace(temporario_ids, arquivo_ids)
+    return cabecalho
+
+
+def ler_cabecalho(base):
+    """Lê apenas o cabeçalho JSON do arquivo de embeddings."""
+    arquivo_emb, _ = _caminhos(base)
+    with open(arquivo_emb, 'rb') as f:
+        cabecalho = json.loads(f.read(TAMANHO_CABECALHO).decode('utf-8'))
+    if cabecalho.get("formato") != FORMATO:
+        raise ValueError(f"Arquivo não é uma galeria {FORMATO}: {arquivo_emb}")
+    if cabecalho.get("versao", 0) > VERSAO_FORMATO:
+        raise ValueError(f"Versão de formato não suportada: {cabecalho.get('versao')}")
+    return cabecalho
+
+
+class EmbeddingStore:
+    """Galeria aberta via memmap: a matriz não é copiada para a memória do processo."""
+
+    def __init__(self, base=None):
+        self.base = Path(base or FILES['store'])
+        for tentativa in range(TENTATIVAS_ABERTURA):
+            try:
+                self._abrir()
+                return
+            except ValueError:
+                # .emb já trocado e .ids ainda não: tenta de novo em seguida
+                if tentativa == TENTATIVAS_ABERTURA - 1:
+                    raise
+                time.sleep(0.05 * (tentativa + 1))
+
+    def _abrir(self):
+        self.cabecalho = ler_cabecalho(self.base)
+        arquivo_emb, arquivo_ids = _caminhos(self.base)
+
+        quantidade = self.cabecalho["quantidade"]
+        dimensao = self.cabecalho["dimensao"]
+        self.matriz = np.memmap(
+            arquivo_emb, dtype=DTYPES[self.cabecalho["dtype"]], mode='r',
+            offset=TAMANHO_CABECALHO, shape=(quantidade, dimensao)
+        ) if quantidade else np.empty((0, dimensao), dtype=DTYPES[self.cabecalho["dtype"]])
+
+        dados_ids = np.memmap(arquivo_ids, dtype=np.uint8, mode='r')
+        total = int(np.frombuffer(dados_ids[:8], dtype=np.int64)[0])
+        if total != quantidade:
+            raise ValueError(f"Arquivo de identidades inconsistente: {total} != {quantidade}")
+        fim_offsets = 8 + 8 * (total + 1)
+        self._offsets = np.frombuffer(dados_ids[8:fim_offsets], dtype=np.int64)
+        fim_nomes = fim_offsets + int(self._offsets[-1])
+        self._nomes = dados_ids[fim_offsets:fim_nomes]
+        # Galerias gravadas antes da marca não a têm
+        marca = self.cabecalho.get("marca")
+        if marca is not None and bytes(dados_ids[fim_nomes:]).hex() != marca:
+            raise ValueError("Arquivo de identidades de outra gravação da galeria")
+
+    def __len__(self):
+        return self.cabecalho["quantidade"]
+
+    @property
+    def model_name(self):
+        return self.cabecalho["model_name"]
+
+    @property
+    def normalizado(self):
+        return self.cabecalho["normalizado"]
+
+    def identidade(self, indice):
+        inicio, fim = self._offsets[indice], self._offsets[indice + 1]
+        return bytes(self._nomes[inicio:fim]).decode('utf-8')
+
+    def identidades(self):
+        dados = bytes(self._nomes)
+        offsets = self._offsets
+        return [dados[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(self))]
+
+
+def ler_pickle_legado(caminho):
+    """
+    Lê os pickles antigos: lista de dicts {"arquivo", "representacao"}
+    (train.py) ou lista de tuplas (nome, embedding) (generate_embeddings.py).
+    """
+    with open(caminho, 'rb') as f:
+        registros = pickle.load(f)
+
+    identidades, embeddings = [], []
+    for registro in registros:
+        if isinstance(registro, dict):
+            identidades.append(registro["arquivo"])
+            embeddings.append(np.asarray(registro["representacao"], dtype=np.float32))
+        else:
+            nome, embedding = registro
+            identidades.append(nome)
+            embeddings.append(np.asarray(embedding, dtype=np.float32))
+    return identidades, np.vstack(embeddings) if embeddings else np.empty((0, 0), np.float32)
+
+
+def converter_pickle(origem, destino=None, dtype=None, model_name=None):
+    """Converte um pickle legado para o formato colunar."""
+    identidades, embeddings = ler_pickle_legado(origem)
+    destino = destino or FILES['store']
+    cabecalho = salvar_store(destino, identidades, embeddings, model_name=model_name, dtype=dtype)
+    print(f"✅ {cabecalho['quantidade']} embeddings ({cabecalho['dimensao']}-d, {cabecalho['dtype']}) "
+          f"convertidos para {Path(destino).with_suffix('.emb')}")
+    return cabecalho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte pickles de embeddings para o formato memmap")
+    parser.add_argument("origem", nargs="?", default=str(FILES['representations']))
+    parser.add_argument("--destino", default=None, help="base dos arquivos .emb/.ids")
+    parser.add_argument("--float16", action="store_true", help="grava a matriz em float16")
+    args = parser.parse_args()
+    converter_pickle(args.origem, args.destino, dtype="float16" if args.float16 else None)
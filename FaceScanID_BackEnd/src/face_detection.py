@@ -0,0 +1,238 @@
+"""
+FACE_DETECTION.PY - Detecção facial em cascata
+- Localização dos arquivos cascade do OpenCV (usada também por train.py)
+- 1º estágio barato: Haar em escala de cinza, no frame reduzido
+- 2º estágio: DEEPFACE_CONFIG['detector_backend'] (o mesmo da galeria) apenas
+  nas regiões candidatas, ampliadas
+- Sem candidatos no frame, o 2º estágio nem é executado
+- Detecção em resolução reduzida: caixas remapeadas para o frame original
+  e rostos recortados (e alinhados) em alta resolução para o embedding
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from src.face_tracker import calcular_iou, caixa_da_face
+from src.model_registry import aquecer_detector
+
+
+def verificar_arquivos_cascade():
+    """Verifica e corrige os caminhos dos arquivos cascade do OpenCV."""
+    try:
+        # Verifica se os arquivos cascade existem no local padrão
+        cascade_path = Path(cv2.__file__).parent / 'data'
+        frontalface_path = cascade_path / 'haarcascade_frontalface_default.xml'
+
+        if not frontalface_path.exists():
+            print(f"⚠️ Arquivo cascade não encontrado: {frontalface_path}")
+            # Tenta encontrar em outro local comum
+            alt_path = Path(sys.prefix) / 'Lib' / 'site-packages' / 'cv2' / 'data'
+            if (alt_path / 'haarcascade_frontalface_default.xml').exists():
+                cascade_path = alt_path
+                print(f"✅ Arquivos cascade encontrados em: {cascade_path}")
+
+        return str(cascade_path / 'haarcascade_frontalface_default.xml')
+    except Exception as e:
+        print(f"❌ Erro ao verificar arquivos cascade: {e}")
+        return None
+
+
+def _remapear_area(area, deslocamento_x, deslocamento_y, fator):
+    """Converte a facial_area de uma imagem redimensionada (ROI ou cópia reduzida) para o frame."""
+    remapeada = dict(area)
+    for chave in ("x", "y", "w", "h"):
+        remapeada[chave] = int(round(area.get(chave, 0) / fator))
+    remapeada["x"] += deslocamento_x
+    remapeada["y"] += deslocamento_y
+    for olho in ("left_eye", "right_eye"):
+        if area.get(olho) is not None:
+            ox, oy = area[olho]
+            remapeada[olho] = (int(round(ox / fator)) + deslocamento_x,
+                               int(round(oy / fator)) + deslocamento_y)
+    return remapeada
+
+
+def reduzir_para_deteccao(img, largura):
+    """Cópia reduzida para a detecção (um único resize). Retorna (reduzida, fator)."""
+    if not largura or img.shape[1] <= largura:
+        return img, 1.0
+    fator = largura / float(img.shape[1])
+    return cv2.resize(img, None, fx=fator, fy=fator, interpolation=cv2.INTER_AREA), fator
+
+
+def recortar_face(img, area, align=True):
+    """
+    Recorta o rosto da imagem BGR em alta resolução, no formato do extract_faces
+    (RGB, float entre 0 e 1). Com os olhos disponíveis, gira apenas a região
+    em volta do rosto para deixá-los na horizontal.
+    """
+    altura, largura = img.shape[:2]
+    x, y, w, h = (int(area.get(chave, 0)) for chave in ("x", "y", "w", "h"))
+    olhos = (area.get("left_eye"), area.get("right_eye"))
+
+    if align and all(olho is not None for olho in olhos):
+        (x1, y1), (x2, y2) = sorted(olhos)
+        angulo = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+        borda = max(w, h) // 2
+        rx1, ry1 = max(0, x - borda), max(0, y - borda)
+        rx2, ry2 = min(largura, x + w + borda), min(altura, y + h + borda)
+        regiao = img[ry1:ry2, rx1:rx2]
+        centro = (x + w / 2.0 - rx1, y + h / 2.0 - ry1)
+        matriz = cv2.getRotationMatrix2D(centro, angulo, 1.0)
+        regiao = cv2.warpAffine(regiao, matriz, (regiao.shape[1], regiao.shape[0]))
+        face = regiao[max(0, y - ry1):y - ry1 + h, max(0, x - rx1):x - rx1 + w]
+    else:
+        face = img[max(0, y):y + h, max(0, x):x + w]
+
+    return face[:, :, ::-1].astype(np.float32) / 255.0
+
+
+def detectar_reduzido(detectar, img, largura, align=True):
+    """
+    Roda `detectar` (ex.: RecognitionService.detectar) em uma cópia reduzida
+    de `img` e devolve as faces em coordenadas de `img`, com o recorte "face"
+    refeito em alta resolução para o embedding.
+    """
+    reduzida, fator = reduzir_para_deteccao(img, largura)
+    faces = detectar(reduzida)
+    if fator == 1.0:
+        return faces
+    for face in faces:
+        face["facial_area"] = _remapear_area(face.get("facial_area", {}), 0, 0, fator)
+        face["face"] = recortar_face(img, face["facial_area"], align)
+    return faces
+
+
+def suprimir_duplicadas(faces, limiar_iou=0.5):
+    """Remove rostos repetidos (ROIs sobrepostas), mantendo o de maior confiança."""
+    mantidas = []
+    for face in sorted(faces, key=lambda f: f.get("confidence") or 0, reverse=True):
+        caixa = caixa_da_face(face)
+        if all(calcular_iou(caixa, caixa_da_face(outra)) < limiar_iou for outra in mantidas):
+            mantidas.append(face)
+    return mantidas
+
+
+class CascadeDetector:
+    """
+    Detector em dois estágios configurado por DEEPFACE_CONFIG:
+
+    - cascade_scale: fator de redução do frame para o Haar
+    - cascade_min_face: menor rosto procurado (pixels do frame original)
+    - cascade_roi_margin: margem em volta de cada candidato (fração do lado)
+    - cascade_roi_size: lado mínimo da ROI entregue ao 2º estágio (ampliada se menor)
+
+    O 2º estágio usa detector_backend, o mesmo da galeria (train.py):
+    embeddings de detectores diferentes não são comparáveis.
+    """
+
+    def __init__(self, config=None):
+        config = {**DEEPFACE_CONFIG, **(config or {})}
+        self.escala = config.get('cascade_scale', 0.5)
+        self.rosto_minimo = config.get('cascade_min_face', 48)
+        self.margem = config.get('cascade_roi_margin', 0.3)
+        self.lado_roi = config.get('cascade_roi_size', 224)
+        self.detector_backend = config.get('detector_backend', "opencv")
+        self.align = config.get('align', True)
+
+        caminho = verificar_arquivos_cascade()
+        self.haar = cv2.CascadeClassifier(caminho) if caminho else None
+        if self.haar is None or self.haar.empty():
+            print("⚠️ Haar cascade indisponível: o 2º estágio rodará no frame inteiro")
+            self.haar = None
+
+    def candidatos(self, frame):
+        """1º estágio: caixas (x, y, w, h) candidatas, em coordenadas do frame original."""
+        cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if self.escala != 1.0:
+            cinza = cv2.resize(cinza, None, fx=self.escala, fy=self.escala,
+                               interpolation=cv2.INTER_AREA)
+        cinza = cv2.equalizeHist(cinza)
+        minimo = max(12, int(self.rosto_minimo * self.escala))
+        caixas = self.haar.detectMultiScale(
+            cinza, scaleFactor=1.1, minNeighbors=4, minSize=(minimo, minimo)
+        )
+        return [tuple(int(round(v / self.escala)) for v in caixa) for caixa in caixas]
+
+    def _roi(self, frame, caixa):
+        """Recorta a região em volta do candidato, com margem, limitada ao frame."""
+        altura, largura = frame.shape[:2]
+        x, y, w, h = caixa
+        borda = int(max(w, h) * self.margem)
+        x1, y1 = max(0, x - borda), max(0, y - borda)
+        x2, y2 = min(largura, x + w + borda), min(altura, y + h + borda)
+        return frame[y1:y2, x1:x2], x1, y1
+
+    def _refinar(self, roi):
+        """2º estágio na ROI (ampliada se pequena); retorna (faces, fator de ampliação)."""
+        fator = max(1.0, self.lado_roi / float(min(roi.shape[:2])))
+        if fator > 1.0:
+            roi = cv2.resize(roi, None, fx=fator, fy=fator, interpolation=cv2.INTER_LINEAR)
+        try:
+            faces = DeepFace.extract_faces(
+                img_path=roi,
+                detector_backend=self.detector_backend,
+                enforce_detection=True,
+                align=self.align
+            )
+        except ValueError:
+            # O candidato do Haar não era um rosto
+            return [], fator
+        return faces, fator
+
+    def detectar(self, frame, confianca_minima=0.0):
+        """
+        Detecta e alinha os rostos do frame BGR. Retorna faces no formato do
+        extract_faces, com facial_area em coordenadas do frame original.
+        """
+        if self.haar is None:
+            regioes = [(frame, 0, 0)]
+        else:
+            regioes = [self._roi(frame, caixa) for caixa in self.candidatos(frame)]
+
+        faces = []
+        for roi, x1, y1 in regioes:
+            if roi.size == 0:
+                continue
+            encontradas, fator = self._refinar(roi)
+            for face in encontradas:
+                if (face.get("confidence") or 0) < confianca_minima:
+                    continue
+                face["facial_area"] = _remapear_area(face.get("facial_area", {}), x1, y1, fator)
+                faces.append(face)
+        return suprimir_duplicadas(faces)
+
+
+def criar_detector(servico, confianca_minima=0.0, detector_backend=None):
+    """
+    Detector de frames de vídeo configurado por DEEPFACE_CONFIG['detection_mode']:
+    "cascade" (CascadeDetector) ou "direct" (servico.detectar em uma cópia com
+    DEEPFACE_CONFIG['detection_width'] pixels de largura).
+    Sem `detector_backend`, usa o do serviço (DEEPFACE_CONFIG['detector_backend']),
+    o mesmo com que train.py gerou a galeria.
+    """
+    if DEEPFACE_CONFIG.get('detection_mode') == "cascade":
+        cascata = CascadeDetector()
+        aquecer_detector(cascata.detector_backend, cascata.align)
+        return lambda frame: cascata.detectar(frame, confianca_minima=confianca_minima)
+
+    largura = DEEPFACE_CONFIG.get('detection_width', 0)
+    detector_backend = detector_backend or servico.detector_backend
+    aquecer_detector(detector_backend, servico.align)
+
+    def detectar_direto(img):
+        return servico.detectar(img, detector_backend=detector_backend, confianca_minima=confianca_minima)
+
+    return lambda frame: detectar_reduzido(detectar_direto, frame, largura, align=servico.align)
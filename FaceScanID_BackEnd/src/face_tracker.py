@@ -0,0 +1,238 @@
+"""
+FACE_TRACKER.PY - Rastreamento de rostos entre frames
+- Associa as detecções de cada frame às trilhas existentes (IoU, com centróide como reserva)
+- Guarda a identidade reconhecida por trilha: o modelo só roda para trilhas novas,
+  incertas (desconhecido / detecção fraca) ou cujo resultado expirou (TTL)
+- Opcional: rastreadores KCF/CSRT do OpenCV movem as caixas entre detecções
+"""
+
+import itertools
+import threading
+import time
+
+import cv2
+
+
+def calcular_iou(a, b):
+    """IoU entre duas caixas (x, y, w, h)."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    largura = min(ax + aw, bx + bw) - max(ax, bx)
+    altura = min(ay + ah, by + bh) - max(ay, by)
+    if largura <= 0 or altura <= 0:
+        return 0.0
+    intersecao = largura * altura
+    return intersecao / float(aw * ah + bw * bh - intersecao)
+
+
+def distancia_centroides(a, b):
+    """Distância entre os centros de duas caixas, relativa ao tamanho da maior."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return (dx * dx + dy * dy) ** 0.5 / max(aw, ah, bw, bh, 1)
+
+
+def caixa_da_face(face):
+    """Caixa (x, y, w, h) de uma face do extract_faces."""
+    area = face.get("facial_area", {})
+    return tuple(int(area.get(chave, 0)) for chave in ("x", "y", "w", "h"))
+
+
+def _criar_rastreador_opencv(tipo):
+    """Cria um rastreador KCF/CSRT (API nova ou cv2.legacy); None se indisponível."""
+    nome = f"Tracker{tipo.upper()}_create"
+    for modulo in (cv2, getattr(cv2, "legacy", None)):
+        fabrica = getattr(modulo, nome, None) if modulo is not None else None
+        if fabrica is not None:
+            return fabrica()
+    return None
+
+
+class Track:
+    """Uma trilha: caixa atual, último reconhecimento e quando ele foi feito."""
+
+    def __init__(self, track_id, caixa, agora):
+        self.track_id = track_id
+        self.caixa = caixa
+        self.visto_em = agora
+        self.confianca = 0.0
+        self.resultado = None
+        self.reconhecido_em = None
+        self.rastreador_opencv = None
+
+    def resultado_atual(self):
+        """Resultado em cache com a caixa atual (identidade None se nunca reconhecido)."""
+        resultado = dict(self.resultado) if self.resultado else {
+            "identidade": None, "pessoa_id": None, "distancia": None, "candidatos": []
+        }
+        x, y, w, h = self.caixa
+        resultado.update(
+            bbox={"x": x, "y": y, "w": w, "h": h},
+            confianca=self.confianca,
+            track_id=self.track_id,
+        )
+        return resultado
+
+
+class FaceTracker:
+    """
+    Rastreador de múltiplos rostos com cache de identidade por trilha.
+
+    - limiar_iou: IoU mínimo para associar uma detecção a uma trilha
+    - limiar_centroide: distância máxima (relativa) na associação por centróide
+    - ttl: segundos até reconfirmar uma identidade conhecida
+    - ttl_incerto: segundos até tentar de novo um desconhecido ou detecção fraca
+    - confianca_minima: detecções abaixo disso são tratadas como incertas
+    - max_ausencia: segundos sem detecção até descartar a trilha
+    - rastreador_opencv: None, "kcf" ou "csrt" (move as caixas em prever())
+    """
+
+    def __init__(self, limiar_iou=0.3, limiar_centroide=0.5, ttl=3.0, ttl_incerto=0.5,
+                 confianca_minima=0.9, max_ausencia=1.0, rastreador_opencv=None):
+        self.limiar_iou = limiar_iou
+        self.limiar_centroide = limiar_centroide
+        self.ttl = ttl
+        self.ttl_incerto = ttl_incerto
+        self.confianca_minima = confianca_minima
+        self.max_ausencia = max_ausencia
+        self.rastreador_opencv = rastreador_opencv
+
+        if rastreador_opencv and _criar_rastreador_opencv(rastreador_opencv) is None:
+            print(f"⚠️ Rastreador OpenCV '{rastreador_opencv}' indisponível "
+                  f"(instale opencv-contrib-python); usando apenas IoU")
+            self.rastreador_opencv = None
+
+        self.tracks = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.faces_atendidas = 0
+        self.reconhecimentos = 0
+
+    def _associar(self, caixas):
+        """Associa caixas a trilhas: IoU guloso e, para as sobras, centróide."""
+        pares = {}
+        livres = set(self.tracks)
+        pendentes = set(range(len(caixas)))
+
+        candidatos = sorted(
+            ((calcular_iou(track.caixa, caixas[i]), track_id, i)
+             for track_id, track in self.tracks.items() for i in pendentes),
+            reverse=True
+        )
+        for iou, track_id, i in candidatos:
+            if iou < self.limiar_iou:
+                break
+            if track_id in livres and i in pendentes:
+                pares[i] = track_id
+                livres.discard(track_id)
+                pendentes.discard(i)
+
+        candidatos = sorted(
+            (distancia_centroides(self.tracks[track_id].caixa, caixas[i]), track_id, i)
+            for track_id in livres for i in pendentes
+        )
+        for distancia, track_id, i in candidatos:
+            if distancia > self.limiar_centroide:
+                break
+            if track_id in livres and i in pendentes:
+                pares[i] = track_id
+                livres.discard(track_id)
+                pendentes.discard(i)
+        return pares
+
+    def _expirar(self, agora):
+        """Descarta as trilhas sem detecção há mais de max_ausencia segundos."""
+        for track_id in [t for t, track in self.tracks.items()
+                         if agora - track.visto_em > self.max_ausencia]:
+            del self.tracks[track_id]
+
+    def expirar(self, agora=None):
+        """Expira trilhas em frames sem nenhum rosto (anotar([]) faz o mesmo)."""
+        with self._lock:
+            self._expirar(time.monotonic() if agora is None else agora)
+
+    def precisa_reconhecer(self, track, agora):
+        """Trilha nova, incerta ou com resultado expirado?"""
+        if track.resultado is None or track.reconhecido_em is None:
+            return True
+        idade = agora - track.reconhecido_em
+        incerta = track.resultado.get("identidade") is None or track.confianca < self.confianca_minima
+        return idade > (self.ttl_incerto if incerta else self.ttl)
+
+    def anotar(self, faces, reconhecer, frame=None, agora=None):
+        """
+        Atualiza as trilhas com as faces do frame e retorna um resultado por face.
+        `reconhecer(faces)` (ex.: RecognitionService.identificar) só é chamado
+        para as faces cujas trilhas precisam de um novo reconhecimento; faces
+        sem recorte (vindas de prever()) nunca são enviadas ao modelo.
+        `agora` permite usar o tempo do vídeo (em segundos) no lugar do relógio.
+        """
+        agora = time.monotonic() if agora is None else agora
+        caixas = [caixa_da_face(face) for face in faces]
+
+        with self._lock:
+            # Antes de associar: uma trilha expirada não pode emprestar sua identidade
+            # a outra pessoa que apareça na mesma posição
+            self._expirar(agora)
+            pares = self._associar(caixas)
+            trilhas = []
+            for i, (face, caixa) in enumerate(zip(faces, caixas)):
+                track = self.tracks.get(pares.get(i))
+                if track is None:
+                    track = Track(next(self._ids), caixa, agora)
+                    self.tracks[track.track_id] = track
+                track.caixa = caixa
+                track.visto_em = agora
+                if face.get("confidence") is not None:
+                    track.confianca = float(face["confidence"])
+                if frame is not None and self.rastreador_opencv and "face" in face:
+                    track.rastreador_opencv = _criar_rastreador_opencv(self.rastreador_opencv)
+                    track.rastreador_opencv.init(frame, caixa)
+                trilhas.append(track)
+
+            pendentes = [
+                (track, face) for track, face in zip(trilhas, faces)
+                if "face" in face and self.precisa_reconhecer(track, agora)
+            ]
+
+        if pendentes:
+            resultados = reconhecer([face for _, face in pendentes])
+            with self._lock:
+                for (track, _), resultado in zip(pendentes, resultados):
+                    track.resultado = resultado
+                    track.reconhecido_em = agora
+                self.reconhecimentos += len(pendentes)
+
+        with self._lock:
+            self.faces_atendidas += len(trilhas)
+            return [track.resultado_atual() for track in trilhas]
+
+    def prever(self, frame):
+        """
+        Move as caixas com os rastreadores OpenCV, sem rodar o detector.
+        Retorna faces no formato do extract_faces (sem o recorte "face").
+        """
+        with self._lock:
+            faces = []
+            for track in self.tracks.values():
+                if track.rastreador_opencv is None:
+                    continue
+                ok, caixa = track.rastreador_opencv.update(frame)
+                if ok:
+                    x, y, w, h = (int(v) for v in caixa)
+                    faces.append({"facial_area": {"x": x, "y": y, "w": w, "h": h},
+                                  "confidence": track.confianca})
+            return faces
+
+    def estatisticas(self):
+        """Faces atendidas, chamadas ao modelo e a redução obtida com o cache."""
+        with self._lock:
+            reducao = self.faces_atendidas / self.reconhecimentos if self.reconhecimentos else 0.0
+            return {
+                "trilhas": len(self.tracks),
+                "faces": self.faces_atendidas,
+                "reconhecimentos": self.reconhecimentos,
+                "reducao": round(reducao, 1),
+            }
@@ -0,0 +1,234 @@
+"""
+GALLERY_INDEX.PY - Índice em memória da galeria de rostos
+- Carrega uma única vez as representações geradas por train.py
+- Mantém uma matriz float32 normalizada (L2) e um vetor de identidades
+- Responde consultas top-k por cosseno com um único produto matricial
+- Pode usar diretamente a matriz memmap de embedding_store.py (sem cópia)
+- Galerias do banco (embedding_db.py) sabem o pessoas.id de cada identidade
+- Com uma projeção PCA (projection.py), consultas são reduzidas antes da busca
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import FILES, DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import FILES, DEEPFACE_CONFIG
+
+# Limiares de distância de cosseno usados pelo DeepFace.find (deepface >= 0.0.80)
+LIMIARES_COSSENO = {
+    'VGG-Face': 0.68,
+    'Facenet': 0.40,
+    'Facenet512': 0.30,
+    'ArcFace': 0.68,
+    'Dlib': 0.07,
+    'SFace': 0.593,
+    'OpenFace': 0.10,
+    'DeepFace': 0.23,
+    'DeepID': 0.015,
+    'GhostFaceNet': 0.65,
+}
+
+
+def obter_limiar(model_name, distance_metric="cosine"):
+    """Retorna o mesmo limiar de distância que o DeepFace.find aplicaria."""
+    try:
+        from deepface.modules.verification import find_threshold
+        return find_threshold(model_name, distance_metric)
+    except ImportError:
+        pass
+    try:
+        from deepface.commons.distance import findThreshold
+        return findThreshold(model_name, distance_metric)
+    except ImportError:
+        return LIMIARES_COSSENO.get(model_name, 0.40)
+
+
+def normalizar_l2(matriz):
+    """Normaliza as linhas de uma matriz para norma unitária (float32)."""
+    matriz = np.asarray(matriz, dtype=np.float32)
+    normas = np.linalg.norm(matriz, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas
+
+
+# Linhas por bloco ao multiplicar matrizes armazenadas em float16
+BLOCO_CONVERSAO = 65_536
+
+
+class GalleryIndex:
+    """Galeria de embeddings com busca exata por similaridade de cosseno."""
+
+    def __init__(self, identidades, embeddings, limiar=None, model_name=None, normalizado=False,
+                 pessoa_ids=None):
+        self.model_name = model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
+        self.limiar = limiar if limiar is not None else obter_limiar(
+            self.model_name, DEEPFACE_CONFIG.get('distance_metric', 'cosine')
+        )
+        self.identidades = np.asarray(identidades, dtype=object)
+        # ProjecaoPCA aplicada às consultas (galeria já no espaço reduzido)
+        self.projecao = None
+        # identidade -> pessoas.id (vazio quando a galeria vem dos arquivos)
+        self.pessoas = dict(zip(self.identidades, np.asarray(pessoa_ids).tolist())) if pessoa_ids is not None else {}
+        if not len(self.identidades):
+            self.matriz = np.empty((0, 0), dtype=np.float32)
+        elif normalizado:
+            # Já normalizada (ex.: memmap do embedding_store): usa sem copiar
+            self.matriz = embeddings
+        else:
+            self.matriz = normalizar_l2(embeddings)
+
+    @classmethod
+    def from_pickle(cls, caminho=None, **kwargs):
+        """Carrega o pickle de representações de train.py (lista de dicts)."""
+        caminho = Path(caminho or FILES['representations'])
+        with open(caminho, 'rb') as f:
+            registros = pickle.load(f)
+
+        identidades = [r["arquivo"] for r in registros]
+        embeddings = [np.asarray(r["representacao"], dtype=np.float32) for r in registros]
+        if embeddings:
+            embeddings = np.vstack(embeddings)
+        return cls(identidades, embeddings, **kwargs)
+
+    @classmethod
+    def from_store(cls, base=None, **kwargs):
+        """Abre a galeria no formato colunar (memmap) de embedding_store.py."""
+        from src.embedding_store import EmbeddingStore
+        store = EmbeddingStore(base)
+        kwargs.setdefault('model_name', store.model_name)
+        return cls(store.identidades(), store.matriz, normalizado=store.normalizado, **kwargs)
+
+    def __len__(self):
+        return len(self.identidades)
+
+    @property
+    def dimensao(self):
+        return self.matriz.shape[1] if len(self) else 0
+
+    def _preparar(self, consultas):
+        """Consultas como matriz normalizada, projetadas se a galeria usa PCA."""
+        consultas = np.atleast_2d(consultas)
+        if self.projecao is not None and consultas.shape[1] == self.projecao.entrada:
+            consultas = self.projecao.aplicar(consultas)
+        return normalizar_l2(consultas)
+
+    def _similaridades(self, consultas):
+        """Produto interno consultas x galeria (float16 é convertido em blocos)."""
+        if self.matriz.dtype == np.float32:
+            return consultas @ self.matriz.T
+        saida = np.empty((len(consultas), len(self)), dtype=np.float32)
+        for inicio in range(0, len(self), BLOCO_CONVERSAO):
+            bloco = self.matriz[inicio:inicio + BLOCO_CONVERSAO].astype(np.float32)
+            saida[:, inicio:inicio + len(bloco)] = consultas @ bloco.T
+        return saida
+
+    def search_batch(self, consultas, k=1):
+        """
+        Busca os k vizinhos mais próximos para várias consultas de uma vez.
+        Retorna, para cada consulta, uma lista de (identidade, distância)
+        ordenada por distância e já filtrada pelo limiar do modelo.
+        """
+        consultas = self._preparar(consultas)
+        if not len(self):
+            return [[] for _ in range(len(consultas))]
+
+        k = min(k, len(self))
+        distancias = 1.0 - self._similaridades(consultas)
+
+        if k < len(self):
+            candidatos = np.argpartition(distancias, k - 1, axis=1)[:, :k]
+        else:
+            candidatos = np.tile(np.arange(len(self)), (len(consultas), 1))
+
+        resultados = []
+        for linha, idx in zip(distancias, candidatos):
+            # Ordenação estável: empates seguem a ordem da galeria, como no DeepFace.find
+            idx = idx[np.argsort(linha[idx], kind="stable")]
+            resultados.append([
+                (self.identidades[i], float(linha[i]))
+                for i in idx if linha[i] <= self.limiar
+            ])
+        return resultados
+
+    def search(self, embedding, k=1):
+        """Busca os k vizinhos mais próximos de um único embedding."""
+        return self.search_batch(embedding, k)[0]
+
+
+def carregar_galeria(caminho=None):
+    """
+    Carrega a galeria, retornando None se ainda não foi treinada.
+    Sem `caminho`, a ordem de preferência é: tabela 'embeddings' do MySQL
+    (se DEEPFACE_CONFIG['gallery_source'] for "mysql"), índice ANN (se
+    DEEPFACE_CONFIG['ann_backend'] não for "exact"), galeria memmap
+    (FILES['store']) e, por fim, o pickle de representações.
+    Com `caminho`, um .pkl é lido como pickle e o resto como galeria memmap.
+    Se train.py salvou uma projeção PCA (FILES['projection']), a galeria e
+    as consultas passam a usar o espaço reduzido.
+    Com DEEPFACE_CONFIG['gallery_templates'], a busca exata é agregada por
+    pessoa (src/templates.py): templates primeiro, fotos só dos candidatos.
+    """
+    galeria = _carregar_galeria(caminho)
+    if galeria is not None and FILES['projection'].exists():
+        from src.projection import carregar_projecao, projetar_galeria
+        projecao = carregar_projecao()
+        if projecao is not None:
+            galeria = projetar_galeria(galeria, projecao)
+            if galeria.projecao is not None:
+                print(f"✅ Projeção PCA aplicada: {projecao.entrada} -> {projecao.saida} dimensões")
+    if galeria is not None and DEEPFACE_CONFIG.get('gallery_templates', "nenhum") != "nenhum":
+        from src.templates import agrupar_galeria
+        agrupada = agrupar_galeria(galeria, DEEPFACE_CONFIG['gallery_templates'])
+        if agrupada is not galeria:
+            print(f"✅ Galeria agregada por pessoa ({agrupada.modo}): {agrupada.nlist} pessoas, "
+                  f"{len(agrupada.centroides)} templates, {agrupada.fotos_por_pessoa:.1f} fotos/pessoa")
+        galeria = agrupada
+    return galeria
+
+
+def _carregar_galeria(caminho=None):
+    if caminho is None and DEEPFACE_CONFIG.get('gallery_source') == "mysql":
+        try:
+            from src.embedding_db import carregar_galeria_banco
+            galeria = carregar_galeria_banco()
+            if galeria is not None:
+                print(f"✅ Galeria carregada do banco: {len(galeria)} rostos ({galeria.dimensao}-d)")
+                return galeria
+            print("⚠️ Tabela 'embeddings' vazia, usando os arquivos da galeria")
+        except Exception as e:
+            print(f"⚠️ Falha ao carregar a galeria do banco, usando os arquivos: {e}")
+
+    if caminho is None:
+        backend = DEEPFACE_CONFIG.get('ann_backend', 'exact')
+        if backend != "exact" and FILES['ann_index'].exists():
+            try:
+                from src.ann_index import carregar_indice_ann
+                galeria = carregar_indice_ann(FILES['ann_index'])
+                print(f"✅ Índice ANN ({backend}) carregado: {len(galeria)} rostos")
+                return galeria
+            except Exception as e:
+                print(f"⚠️ Falha ao carregar índice ANN, usando busca exata: {e}")
+
+        caminho = FILES['store'] if FILES['store'].with_suffix('.emb').exists() \
+            else FILES['representations']
+
+    caminho = Path(caminho)
+    memmap = caminho.suffix != '.pkl'
+    if not (caminho.with_suffix('.emb') if memmap else caminho).exists():
+        print(f"⚠️ Representações não encontradas em {caminho}. Execute src/train.py")
+        return None
+    try:
+        galeria = GalleryIndex.from_store(caminho) if memmap else GalleryIndex.from_pickle(caminho)
+        print(f"✅ Galeria carregada: {len(galeria)} rostos ({galeria.dimensao}-d)")
+        return galeria
+    except Exception as e:
+        print(f"❌ Erro ao carregar galeria: {e}")
+        return None
@@ -0,0 +1,157 @@
+"""
+GALLERY_RELOAD.PY - Recarga a quente da galeria, sem reiniciar o processo
+- train.py grava um marcador de versão (FILES['gallery_version']) depois de todos os artefatos
+- Uma thread verifica a versão a cada DEEPFACE_CONFIG['gallery_reload_interval'] segundos
+- A nova galeria é montada em segundo plano (carregar_galeria) e trocada de uma vez:
+  consultas em andamento terminam no índice antigo, as seguintes já usam o novo
+- Falhas ao carregar mantêm a galeria atual em uso
+- Recarga forçada: RecognitionService.recarregar_galeria / rotas /admin/galeria das APIs
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Configuração de importação segura
+try:
+    from config import FILES, DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import FILES, DEEPFACE_CONFIG
+
+from src.gallery_index import carregar_galeria
+
+
+def marcar_versao(rostos, model_name=None, caminho=None):
+    """Grava o marcador de versão da galeria (temporário + rename). Retorna a versão."""
+    caminho = Path(caminho or FILES['gallery_version'])
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    marcador = {
+        "versao": f"{time.time_ns():x}",
+        "rostos": int(rostos),
+        "model_name": model_name or DEEPFACE_CONFIG.get('model_name', 'VGG-Face'),
+        "gerada_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    temporario = caminho.with_suffix('.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(marcador, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return marcador["versao"]
+
+
+def _assinatura_arquivos():
+    """Tamanho/mtime dos arquivos lidos por carregar_galeria (galerias sem marcador)."""
+    arquivos = [FILES['store'].with_suffix('.emb'), FILES['store'].with_suffix('.ids'),
+                FILES['representations'], FILES['ann_index'], FILES['projection']]
+    partes = []
+    for arquivo in arquivos:
+        try:
+            info = arquivo.stat()
+            partes.append(f"{info.st_size:x}.{info.st_mtime_ns:x}")
+        except OSError:
+            partes.append("-")
+    return "arquivos:" + ":".join(partes)
+
+
+# Última versão lida do banco, mantida enquanto ele estiver inacessível
+_ultima_versao_banco = "banco:?"
+
+
+def _assinatura_banco():
+    """
+    Versão gravada por sincronizar_embeddings em 'galeria_versoes' (leitura
+    pela chave primária). Com o banco fora do ar, repete a última conhecida.
+    """
+    global _ultima_versao_banco
+    try:
+        from db_pool import conexao
+        from src.embedding_db import SQL_LER_VERSAO
+        with conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_LER_VERSAO, (DEEPFACE_CONFIG.get('model_name', 'VGG-Face'),))
+            linha = cursor.fetchone()
+            cursor.close()
+    except Exception:
+        # Banco indisponível não é uma nova versão: não dispara recarga
+        return _ultima_versao_banco
+    _ultima_versao_banco = f"banco:{linha[0] if linha else '-'}"
+    return _ultima_versao_banco
+
+
+def versao_galeria():
+    """Versão atual da galeria em disco (e no banco, se for a origem)."""
+    try:
+        with open(FILES['gallery_version'], 'r', encoding='utf-8') as f:
+            versao = json.load(f)["versao"]
+    except (OSError, ValueError, KeyError):
+        versao = _assinatura_arquivos()
+    if DEEPFACE_CONFIG.get('gallery_source') == "mysql":
+        versao = f"{versao}|{_assinatura_banco()}"
+    return versao
+
+
+class GalleryReloader:
+    """
+    Mantém a galeria de um RecognitionService atualizada. `pedidos` (opcional,
+    ex.: multiprocessing.Value compartilhado com os workers da API ASGI) força
+    uma recarga quando é incrementado por outro processo.
+    """
+
+    def __init__(self, servico, intervalo=None, pedidos=None):
+        self.servico = servico
+        self.intervalo = DEEPFACE_CONFIG.get('gallery_reload_interval', 5.0) if intervalo is None else intervalo
+        self.pedidos = pedidos
+        self._pedidos_vistos = pedidos.value if pedidos is not None else 0
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia a verificação periódica em uma thread daemon (intervalo 0 desativa)."""
+        if self.intervalo and self._thread is None:
+            self._thread = threading.Thread(target=self._vigiar, name="recarga-galeria", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def _vigiar(self):
+        while not self._parar.wait(self.intervalo):
+            forcar = False
+            if self.pedidos is not None and self.pedidos.value != self._pedidos_vistos:
+                self._pedidos_vistos = self.pedidos.value
+                forcar = True
+            try:
+                self.recarregar(forcar=forcar)
+            except Exception as e:
+                print(f"⚠️ Falha ao verificar a galeria: {e}")
+
+    def recarregar(self, forcar=False):
+        """
+        Carrega a galeria de novo se a versão mudou (ou sempre, com `forcar`)
+        e a troca no serviço. Retorna True se a galeria foi trocada.
+        """
+        if forcar and self.pedidos is not None:
+            # Este processo já atende ao pedido; a thread não recarrega de novo
+            self._pedidos_vistos = self.pedidos.value
+        # Uma recarga por vez; a galeria antiga continua atendendo enquanto isso
+        with self._lock:
+            versao = versao_galeria()
+            if not forcar and versao == self.servico.versao_galeria:
+                return False
+
+            inicio = time.perf_counter()
+            galeria = carregar_galeria()
+            if galeria is None:
+                print("⚠️ Nova galeria indisponível, mantendo a atual")
+                return False
+            self.servico.trocar_galeria(galeria, versao)
+            print(f"🔄 Galeria recarregada: {len(galeria)} rostos em "
+                  f"{time.perf_counter() - inicio:.1f}s (versão {versao})")
+            return True
@@ -0,0 +1,283 @@
+"""
+LOOKUP_CACHE.PY - Cache das respostas de /buscar (LRU limitado + TTL)
+- Chave: o mesmo nome enviado ao MySQL (underscores viram espaços), sem diferença
+  de caixa, como na collation _ci; espaços não são alterados, pois o banco os compara
+- Guarda também os "não encontrado", invalidados quando /adicionar grava o nome
+- Em memória, por processo; opcionalmente em um arquivo SQLite local
+  compartilhado pelos workers da API (gunicorn/uvicorn --workers N)
+- Geração de invalidação guardada junto das entradas: uma busca que começou
+  antes de uma invalidação em qualquer processo não grava o resultado antigo
+- invalidar_buscas: para quem grava em 'pessoas' fora da API
+  (src/bulk_import.py, database/add_person.py)
+- Contadores de acertos, faltas, expirações, remoções por LRU e invalidações
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.pessoas import normalizar_nome_url
+
+
+def normalizar_chave(nome_completo):
+    """
+    Chave do cache: só as transformações que a consulta também aplica
+    (underscores -> espaços; caixa, ignorada pela collation _ci). Colapsar
+    espaços aqui faria 'Ana  Silva' reaproveitar a resposta de 'Ana Silva'.
+    """
+    return normalizar_nome_url(nome_completo).casefold()
+
+
+class _MemoriaLRU:
+    """Entradas (expira_em, valor) em um OrderedDict, da menos para a mais recente."""
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._geracao = 0
+
+    def geracao(self):
+        return self._geracao
+
+    def ler(self, chave, agora):
+        """Retorna (encontrado, expirado, valor)."""
+        item = self._itens.get(chave)
+        if item is None:
+            return False, False, None
+        expira_em, valor = item
+        if expira_em <= agora:
+            del self._itens[chave]
+            return False, True, None
+        self._itens.move_to_end(chave)
+        return True, False, valor
+
+    def gravar(self, chave, valor, expira_em, geracao=None):
+        """
+        Grava e retorna quantas entradas foram removidas por falta de espaço.
+        Com `geracao` diferente da atual (houve invalidação), não grava.
+        """
+        if geracao is not None and geracao != self._geracao:
+            return 0
+        self._itens[chave] = (expira_em, valor)
+        self._itens.move_to_end(chave)
+        removidas = 0
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+            removidas += 1
+        return removidas
+
+    def remover(self, chave):
+        """Remove a entrada e avança a geração; retorna se ela existia."""
+        self._geracao += 1
+        return self._itens.pop(chave, None) is not None
+
+    def limpar(self):
+        self._geracao += 1
+        self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class _SQLiteLRU:
+    """
+    Mesmo contrato de _MemoriaLRU em um arquivo SQLite (modo WAL), visível
+    para todos os processos da máquina. Valores serializados com pickle para
+    manter tipos do MySQL (datas, decimais) iguais aos do cache em memória.
+    """
+
+    def __init__(self, capacidade, caminho):
+        self.capacidade = capacidade
+        self.caminho = str(caminho)
+        self._local = threading.local()
+        with self._conexao() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    chave TEXT PRIMARY KEY,
+                    valor BLOB,
+                    expira_em REAL,
+                    acesso REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_acesso ON cache (acesso)")
+            conn.execute("CREATE TABLE IF NOT EXISTS geracao (id INTEGER PRIMARY KEY, valor INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO geracao (id, valor) VALUES (1, 0)")
+
+    def _conexao(self):
+        # Uma conexão por thread (sqlite3 não compartilha conexões entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def geracao(self):
+        return self._conexao().execute("SELECT valor FROM geracao WHERE id = 1").fetchone()[0]
+
+    def _avancar_geracao(self, conn):
+        conn.execute("UPDATE geracao SET valor = valor + 1 WHERE id = 1")
+
+    def ler(self, chave, agora):
+        with self._conexao() as conn:
+            linha = conn.execute("SELECT valor, expira_em FROM cache WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return False, False, None
+            if linha[1] <= agora:
+                conn.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+                return False, True, None
+            conn.execute("UPDATE cache SET acesso = ? WHERE chave = ?", (agora, chave))
+        return True, False, pickle.loads(linha[0])
+
+    def gravar(self, chave, valor, expira_em, geracao=None):
+        with self._conexao() as conn:
+            # Trava de escrita antes de conferir a geração: uma invalidação de
+            # outro processo não pode acontecer entre a conferência e a gravação
+            conn.execute("BEGIN IMMEDIATE")
+            if geracao is not None and geracao != self.geracao():
+                return 0
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, expira_em, acesso) VALUES (?, ?, ?, ?)",
+                (chave, pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL), expira_em, time.time())
+            )
+            excesso = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.capacidade
+            if excesso <= 0:
+                return 0
+            conn.execute("""
+                DELETE FROM cache WHERE chave IN (
+                    SELECT chave FROM cache ORDER BY acesso LIMIT ?
+                )
+            """, (excesso,))
+        return excesso
+
+    def remover(self, chave):
+        with self._conexao() as conn:
+            self._avancar_geracao(conn)
+            return conn.execute("DELETE FROM cache WHERE chave = ?", (chave,)).rowcount > 0
+
+    def limpar(self):
+        with self._conexao() as conn:
+            self._avancar_geracao(conn)
+            conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        return self._conexao().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class LookupCache:
+    """
+    Cache de buscas por nome com capacidade máxima e validade (TTL) em segundos.
+
+    `arquivo_compartilhado` (ex.: /tmp/facescan_busca.sqlite) troca o
+    armazenamento em memória por um SQLite local, para que uma inserção em
+    um worker invalide a entrada para todos. A geração de invalidação fica
+    no armazenamento; os contadores são do processo.
+    """
+
+    def __init__(self, capacidade=1024, ttl=60.0, arquivo_compartilhado=None):
+        self.capacidade = max(1, capacidade)
+        self.ttl = ttl
+        if arquivo_compartilhado:
+            self._armazenamento = _SQLiteLRU(self.capacidade, arquivo_compartilhado)
+        else:
+            self._armazenamento = _MemoriaLRU(self.capacidade)
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.expirados = 0
+        self.removidos_lru = 0
+        self.invalidacoes = 0
+
+    @property
+    def geracao(self):
+        """Muda a cada invalidação: uma busca que começou antes dela não grava."""
+        return self._armazenamento.geracao()
+
+    def obter(self, nome_completo):
+        """Retorna (encontrado, valor); valor None é um "não encontrado" guardado."""
+        chave = normalizar_chave(nome_completo)
+        with self._lock:
+            encontrado, expirado, valor = self._armazenamento.ler(chave, time.time())
+            if encontrado:
+                self.acertos += 1
+            else:
+                self.faltas += 1
+                self.expirados += expirado
+        return encontrado, valor
+
+    def guardar(self, nome_completo, valor, geracao=None):
+        """
+        Guarda o resultado da busca (o registro ou None). Com `geracao` (lida
+        antes da consulta ao banco), não grava se houve invalidação no meio.
+        """
+        chave = normalizar_chave(nome_completo)
+        with self._lock:
+            self.removidos_lru += self._armazenamento.gravar(chave, valor, time.time() + self.ttl, geracao)
+
+    def invalidar(self, nome_completo):
+        """Descarta a entrada do nome (ex.: após inserir uma pessoa com ele)."""
+        chave = normalizar_chave(nome_completo)
+        with self._lock:
+            self.invalidacoes += self._armazenamento.remover(chave)
+
+    def limpar(self):
+        """Descarta todas as entradas (ex.: após uma importação em massa)."""
+        with self._lock:
+            self._armazenamento.limpar()
+            self.invalidacoes += 1
+
+    def estatisticas(self):
+        """Contadores para monitoramento."""
+        with self._lock:
+            consultas = self.acertos + self.faltas
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+                "expirados": self.expirados,
+                "removidos_lru": self.removidos_lru,
+                "invalidacoes": self.invalidacoes,
+                "entradas": len(self._armazenamento),
+                "capacidade": self.capacidade,
+                "ttl": self.ttl,
+                "compartilhado": isinstance(self._armazenamento, _SQLiteLRU),
+                "pid": os.getpid(),
+            }
+
+
+def criar_cache_de_ambiente():
+    """
+    Cache configurado pelas variáveis de ambiente da API:
+    CACHE_BUSCA_TAMANHO (0 desativa), CACHE_BUSCA_TTL (s) e CACHE_BUSCA_ARQUIVO.
+    """
+    capacidade = int(os.getenv("CACHE_BUSCA_TAMANHO", 1024))
+    if capacidade <= 0:
+        return None
+    return LookupCache(
+        capacidade=capacidade,
+        ttl=float(os.getenv("CACHE_BUSCA_TTL", 60)),
+        arquivo_compartilhado=os.getenv("CACHE_BUSCA_ARQUIVO") or None
+    )
+
+
+def invalidar_buscas(nomes=None):
+    """
+    Invalida no cache compartilhado (CACHE_BUSCA_ARQUIVO) os `nomes` gravados
+    em 'pessoas' fora da API, ou tudo se `nomes` for None. Sem arquivo
+    compartilhado, cada worker tem o próprio cache em memória, inacessível
+    daqui: as entradas saem pelo TTL.
+    """
+    if not os.getenv("CACHE_BUSCA_ARQUIVO"):
+        return
+    cache = criar_cache_de_ambiente()
+    if cache is None:
+        return
+    if nomes is None:
+        cache.limpar()
+    else:
+        for nome in nomes:
+            cache.invalidar(nome)
@@ -0,0 +1,125 @@
+"""
+MIGRATIONS.PY - Migrações de esquema da tabela 'pessoas'
+- Índices para as buscas da API: nome (igualdade e prefixo), CPF e documento
+- Tabela 'embeddings' (src/embedding_db.py), ligada a pessoas.id, e 'galeria_versoes'
+- Idempotente: só cria o que falta e ignora colunas que o esquema não tem
+  (o esquema da API não tem 'cpf'; o de database/database.py não tem os campos da API)
+- Executada por criar_tabela()/create_pessoas_table() ou diretamente:
+
+Uso:
+    python src/migrations.py
+"""
+
+import sys
+from pathlib import Path
+
+from mysql.connector import Error
+
+# Configuração de importação segura
+try:
+    from db_pool import conexao
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from db_pool import conexao
+
+# (nome do índice, coluna): índices secundários da tabela 'pessoas'.
+# O InnoDB inclui a chave primária (id) em cada índice, então
+# ORDER BY nome_completo, id também é atendido pelo índice do nome.
+INDICES_PESSOAS = (
+    ("idx_pessoas_nome", "nome_completo"),
+    ("idx_pessoas_cpf", "cpf"),
+    ("idx_pessoas_doc", "doc_identidade"),
+)
+
+# Embeddings da galeria, um por foto, compactados (float16 ou int8 + escala)
+SQL_CRIAR_TABELA_EMBEDDINGS = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        pessoa_id INT NOT NULL,
+        arquivo VARCHAR(255) NOT NULL,
+        model_name VARCHAR(50) NOT NULL,
+        dimensao INT NOT NULL,
+        dtype VARCHAR(10) NOT NULL,
+        escala FLOAT NULL,
+        vetor BLOB NOT NULL,
+        atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        UNIQUE KEY uk_embeddings_modelo_arquivo (model_name, arquivo),
+        INDEX idx_embeddings_pessoa (pessoa_id),
+        CONSTRAINT fk_embeddings_pessoa FOREIGN KEY (pessoa_id)
+            REFERENCES pessoas (id) ON DELETE CASCADE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# Versão da galeria no banco, por modelo: gravada por sincronizar_embeddings e
+# consultada pela recarga a quente (src/gallery_reload.py) com uma leitura por chave
+SQL_CRIAR_TABELA_VERSOES = """
+    CREATE TABLE IF NOT EXISTS galeria_versoes (
+        model_name VARCHAR(50) PRIMARY KEY,
+        versao VARCHAR(32) NOT NULL,
+        atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+def colunas_existentes(cursor, tabela):
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (tabela,)
+    )
+    return {linha[0] for linha in cursor.fetchall()}
+
+
+def colunas_indexadas(cursor, tabela):
+    """Colunas que já são a 1ª coluna de algum índice (PRIMARY e UNIQUE incluídos)."""
+    cursor.execute(
+        "SELECT COLUMN_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND SEQ_IN_INDEX = 1",
+        (tabela,)
+    )
+    return {linha[0] for linha in cursor.fetchall()}
+
+
+def aplicar_migracoes(conn, tabela="pessoas"):
+    """
+    Cria os índices de INDICES_PESSOAS que faltam na tabela e, para a
+    tabela 'pessoas', a tabela 'embeddings'. Retorna a lista dos índices criados.
+    """
+    cursor = conn.cursor()
+    try:
+        colunas = colunas_existentes(cursor, tabela)
+        indexadas = colunas_indexadas(cursor, tabela)
+        criados = []
+        for nome, coluna in INDICES_PESSOAS:
+            if coluna not in colunas or coluna in indexadas:
+                continue
+            # Online no InnoDB (ALGORITHM=INPLACE): leituras e escritas continuam
+            cursor.execute(f"CREATE INDEX {nome} ON {tabela} ({coluna}) ALGORITHM=INPLACE LOCK=NONE")
+            criados.append(nome)
+        if tabela == "pessoas":
+            cursor.execute(SQL_CRIAR_TABELA_EMBEDDINGS)
+            cursor.execute(SQL_CRIAR_TABELA_VERSOES)
+        conn.commit()
+        return criados
+    finally:
+        cursor.close()
+
+
+def migrar(tabela="pessoas"):
+    """Aplica as migrações usando uma conexão do pool."""
+    try:
+        with conexao() as conn:
+            criados = aplicar_migracoes(conn, tabela)
+        if criados:
+            print(f"✅ Índices criados em '{tabela}': {', '.join(criados)}")
+        else:
+            print(f"✅ Índices de '{tabela}' já estão atualizados")
+        return True
+    except Error as e:
+        print(f"❌ Erro ao migrar '{tabela}': {e}")
+        return False
+
+
+if __name__ == "__main__":
+    migrar()
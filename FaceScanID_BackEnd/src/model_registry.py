@@ -0,0 +1,115 @@
+"""
+MODEL_REGISTRY.PY - Modelos do DeepFace carregados uma única vez por processo
+- Modelo de reconhecimento (DEEPFACE_CONFIG['model_name']) construído sob demanda e mantido em cache
+- Detectores inicializados uma vez (o DeepFace guarda a instância após a 1ª detecção)
+- Aquecimento com inferências de teste: a 1ª imagem real não paga a carga
+- Tempo de carga de cada componente registrado e reportado
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from deepface import DeepFace
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+_modelos = {}
+_detectores = set()
+_aquecidos = set()
+_tempos = {}
+_lock = threading.RLock()
+
+
+def tamanho_entrada(modelo):
+    """Retorna (altura, largura) esperados pelo modelo de reconhecimento."""
+    forma = tuple(modelo.input_shape)
+    if len(forma) == 4:  # Modelo Keras puro: (None, h, w, c)
+        forma = forma[1:3]
+    return forma[:2]
+
+
+def obter_modelo(model_name=None):
+    """Retorna o modelo de reconhecimento do processo, construindo-o na 1ª chamada."""
+    model_name = model_name or DEEPFACE_CONFIG['model_name']
+    modelo = _modelos.get(model_name)
+    if modelo is None:
+        with _lock:
+            if model_name not in _modelos:
+                inicio = time.perf_counter()
+                _modelos[model_name] = DeepFace.build_model(model_name)
+                _tempos[f"modelo {model_name}"] = time.perf_counter() - inicio
+            modelo = _modelos[model_name]
+    return modelo
+
+
+def aquecer_detector(detector_backend=None, align=None):
+    """Inicializa o detector com uma detecção de teste (uma vez por processo)."""
+    detector_backend = detector_backend or DEEPFACE_CONFIG['detector_backend']
+    if detector_backend in _detectores:
+        return
+    with _lock:
+        if detector_backend in _detectores:
+            return
+        inicio = time.perf_counter()
+        try:
+            DeepFace.extract_faces(
+                img_path=np.zeros((224, 224, 3), dtype=np.uint8),
+                detector_backend=detector_backend,
+                enforce_detection=False,
+                align=DEEPFACE_CONFIG['align'] if align is None else align
+            )
+        except Exception as e:
+            print(f"⚠️ Falha no aquecimento do detector {detector_backend}: {e}")
+        _tempos[f"detector {detector_backend}"] = time.perf_counter() - inicio
+        _detectores.add(detector_backend)
+
+
+def aquecer(model_name=None, detector_backend=None, align=None):
+    """
+    Carrega modelo e detector e executa uma inferência de teste no modelo.
+    Chamadas repetidas não refazem nada. Retorna os tempos de carga (s).
+    """
+    model_name = model_name or DEEPFACE_CONFIG['model_name']
+    modelo = obter_modelo(model_name)
+    aquecer_detector(detector_backend, align)
+
+    if model_name not in _aquecidos:
+        with _lock:
+            if model_name not in _aquecidos:
+                inicio = time.perf_counter()
+                altura, largura = tamanho_entrada(modelo)
+                lote = np.zeros((1, altura, largura, 3), dtype=np.float32)
+                try:
+                    if hasattr(modelo, 'forward'):
+                        modelo.forward(lote)
+                    else:
+                        modelo.predict(lote, verbose=0)
+                except Exception as e:
+                    print(f"⚠️ Falha no aquecimento do modelo {model_name}: {e}")
+                _tempos[f"aquecimento {model_name}"] = time.perf_counter() - inicio
+                _aquecidos.add(model_name)
+                print(f"✅ {relatorio_de_carga()}")
+    return tempos_de_carga()
+
+
+def tempos_de_carga():
+    """Tempos (s) de construção/aquecimento de cada componente já carregado."""
+    with _lock:
+        return dict(_tempos)
+
+
+def relatorio_de_carga():
+    """Resumo legível dos tempos de carga do processo."""
+    tempos = tempos_de_carga()
+    partes = ", ".join(f"{nome} {segundos:.1f}s" for nome, segundos in tempos.items())
+    return f"Modelos prontos em {sum(tempos.values()):.1f}s ({partes}) (pid {os.getpid()})"
@@ -0,0 +1,371 @@
+"""
+MULTI_CAMERA.PY - Servidor de reconhecimento para várias câmeras
+- Um único modelo e uma única galeria para todas as câmeras do processo
+- Uma thread de captura por câmera, guardando só o frame mais recente
+- Poucas threads de detecção atendem as câmeras em rodízio (sem frames acumulados)
+- Rostos de todas as câmeras agrupados em lotes: um forward pass e uma busca por lote
+- Rastreamento por câmera e estatísticas de fps/latência por câmera
+
+Uso:
+    python src/multi_camera.py rtsp://cam1/stream rtsp://cam2/stream portaria=rtsp://cam3/stream \\
+        --detectores 4 --lote 32 --saida eventos.jsonl
+"""
+
+import argparse
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from src.recognition_service import obter_servico
+from src.face_detection import criar_detector
+from src.face_tracker import FaceTracker
+from src.recognize_headless import linha_json, tipo_da_fonte
+from src.video_pipeline import StageStats, abrir_captura
+
+CONFIANCA_MINIMA = 0.85
+ESPERA_RECONEXAO = 2.0
+
+
+class InferenceBatcher:
+    """
+    Agrupa os rostos enviados por várias threads em lotes: um único forward
+    pass (RecognitionService.identificar) e uma única busca na galeria por lote.
+    identificar() bloqueia quem chamou até o lote dele ser processado.
+    """
+
+    def __init__(self, servico, tamanho_lote=32, espera_ms=10):
+        self.servico = servico
+        self.tamanho_lote = tamanho_lote
+        self.espera = espera_ms / 1000.0
+        self._fila = queue.Queue()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="inferencia-lotes", daemon=True)
+        self.lotes = 0
+        self.faces = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._parar.set()
+        self._thread.join(timeout=2.0)
+
+    def identificar(self, faces):
+        """Reconhece as faces no próximo lote; mesma saída de RecognitionService.identificar."""
+        if not faces:
+            return []
+        futuro = Future()
+        self._fila.put((faces, futuro))
+        return futuro.result()
+
+    def _coletar(self):
+        """Espera o primeiro pedido e junta outros até encher o lote ou vencer o prazo."""
+        try:
+            pedidos = [self._fila.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        total = len(pedidos[0][0])
+        prazo = time.monotonic() + self.espera
+        while total < self.tamanho_lote:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                pedido = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            pedidos.append(pedido)
+            total += len(pedido[0])
+        return pedidos
+
+    def _executar(self):
+        while not self._parar.is_set():
+            pedidos = self._coletar()
+            if not pedidos:
+                continue
+            todas = [face for faces, _ in pedidos for face in faces]
+            try:
+                resultados = self.servico.identificar(todas)
+            except Exception as e:
+                for _, futuro in pedidos:
+                    futuro.set_exception(e)
+                continue
+
+            self.lotes += 1
+            self.faces += len(todas)
+            inicio = 0
+            for faces, futuro in pedidos:
+                futuro.set_result(resultados[inicio:inicio + len(faces)])
+                inicio += len(faces)
+
+
+class CameraStream:
+    """
+    Uma câmera: captura em thread própria, rastreador e estatísticas.
+    `fonte` é o que abrir_captura aceita ou uma função sem argumentos que
+    devolve um objeto com read()/release() (ex.: vídeo em loop nos benchmarks).
+    """
+
+    def __init__(self, nome, fonte, confianca_minima=CONFIANCA_MINIMA):
+        self.nome = nome
+        self.fonte = fonte
+        self.ao_vivo = not callable(fonte) and tipo_da_fonte(fonte) == "stream"
+        self.tracker = FaceTracker(confianca_minima=confianca_minima)
+        self.captura = StageStats()
+        self.processamento = StageStats()
+        self.latencias = deque(maxlen=500)
+        self.descartados = 0
+        self.encerrada = False
+
+        self._lock = threading.Lock()
+        self._frame = None  # (número, instante, frame)
+        # Na fila ou em processamento: uma câmera nunca é detectada em duas threads
+        self._agendada = False
+        self._thread = None
+
+    def start(self, prontas, parar):
+        self._thread = threading.Thread(
+            target=self._capturar, args=(prontas, parar), name=f"captura-{self.nome}", daemon=True
+        )
+        self._thread.start()
+
+    def _capturar(self, prontas, parar):
+        numero = 0
+        while not parar.is_set():
+            cap = self.fonte() if callable(self.fonte) else abrir_captura(self.fonte)
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                numero += 1
+                with self._lock:
+                    if self._frame is not None:
+                        # O anterior ainda não foi processado: fica só o mais recente
+                        self.descartados += 1
+                    self._frame = (numero, time.time(), frame)
+                    avisar = not self._agendada
+                    self._agendada = True
+                if avisar:
+                    prontas.put(self)
+                self.captura.registrar(time.perf_counter() - inicio)
+            cap.release()
+
+            if not self.ao_vivo:
+                break
+            print(f"⚠️ [{self.nome}] sem frames; reconectando em {ESPERA_RECONEXAO:.0f}s")
+            parar.wait(ESPERA_RECONEXAO)
+        self.encerrada = True
+
+    def retirar_frame(self):
+        """Entrega o frame mais recente à detecção (None se já foi retirado)."""
+        with self._lock:
+            item, self._frame = self._frame, None
+            return item
+
+    def concluir(self, prontas):
+        """Fim do processamento: volta para a fila se chegou um frame novo."""
+        with self._lock:
+            if self._frame is not None:
+                prontas.put(self)
+            else:
+                self._agendada = False
+
+    def registrar(self, instante_captura):
+        latencia = time.time() - instante_captura
+        self.processamento.registrar(latencia)
+        self.latencias.append(latencia)
+
+    def zerar_estatisticas(self):
+        """Recomeça a contagem de fps, latências e descartes (ex.: após o aquecimento)."""
+        with self._lock:
+            self.captura = StageStats()
+            self.processamento = StageStats()
+            self.latencias.clear()
+            self.descartados = 0
+
+    def estatisticas(self):
+        latencias = np.array(self.latencias) * 1000 if self.latencias else np.zeros(1)
+        return {
+            "captura_fps": round(self.captura.fps, 1),
+            "processados_fps": round(self.processamento.fps, 1),
+            "latencia_p50_ms": round(float(np.percentile(latencias, 50)), 1),
+            "latencia_p95_ms": round(float(np.percentile(latencias, 95)), 1),
+            "descartados": self.descartados,
+            "modelo": self.tracker.estatisticas()["reconhecimentos"],
+        }
+
+
+class MultiCameraServer:
+    """
+    K câmeras, D threads de detecção e um único InferenceBatcher.
+    `ao_reconhecer(camera, numero, instante, faces)` recebe cada frame processado.
+    """
+
+    def __init__(self, fontes, detectores=None, tamanho_lote=32, espera_ms=10,
+                 confianca_minima=CONFIANCA_MINIMA, ao_reconhecer=None):
+        self.servico = obter_servico()
+        self.detectar = criar_detector(self.servico, confianca_minima)
+        self.batcher = InferenceBatcher(self.servico, tamanho_lote, espera_ms)
+        self.cameras = [CameraStream(nome, fonte, confianca_minima) for nome, fonte in fontes]
+        self.detectores = detectores or max(1, min(len(self.cameras), (os.cpu_count() or 2) // 2))
+        self.ao_reconhecer = ao_reconhecer
+
+        self._prontas = queue.Queue()
+        self._parar = threading.Event()
+        self._threads = []
+
+    @property
+    def ativo(self):
+        return not self._parar.is_set() and not all(camera.encerrada for camera in self.cameras)
+
+    def start(self):
+        self.batcher.start()
+        for camera in self.cameras:
+            camera.start(self._prontas, self._parar)
+        self._threads = [
+            threading.Thread(target=self._detectar, name=f"deteccao-{i}", daemon=True)
+            for i in range(self.detectores)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._parar.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self.batcher.stop()
+
+    def _detectar(self):
+        while not self._parar.is_set():
+            try:
+                camera = self._prontas.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            item = camera.retirar_frame()
+            try:
+                if item is not None:
+                    self._processar(camera, *item)
+            finally:
+                camera.concluir(self._prontas)
+
+    def _processar(self, camera, numero, instante, frame):
+        try:
+            faces = self.detectar(frame)
+            # Frames sem rostos também passam pelo rastreador, que expira as trilhas
+            anotacoes = camera.tracker.anotar(faces, self.batcher.identificar, frame)
+        except Exception as e:
+            print(f"Erro em [{camera.nome}]: {e}")
+            return
+        camera.registrar(instante)
+        if self.ao_reconhecer is not None:
+            self.ao_reconhecer(camera, numero, instante, anotacoes)
+
+    def zerar_estatisticas(self):
+        for camera in self.cameras:
+            camera.zerar_estatisticas()
+        self.batcher.lotes = self.batcher.faces = 0
+
+    def estatisticas(self):
+        """Estatísticas por câmera e do lote de inferência compartilhado."""
+        return {
+            "cameras": {camera.nome: camera.estatisticas() for camera in self.cameras},
+            "inferencia": {
+                "lotes": self.batcher.lotes,
+                "faces": self.batcher.faces,
+                "faces_por_lote": round(self.batcher.faces / self.batcher.lotes, 1) if self.batcher.lotes else 0.0,
+            },
+        }
+
+
+def ler_fontes(argumentos):
+    """Aceita 'url' ou 'nome=url'; sem nome, as câmeras viram cam0, cam1, ..."""
+    fontes = []
+    for indice, argumento in enumerate(argumentos):
+        nomeada = re.match(r"^([\w-]+)=(.+)$", argumento)
+        if nomeada and "://" not in nomeada.group(1):
+            fontes.append((nomeada.group(1), nomeada.group(2)))
+        else:
+            fontes.append((f"cam{indice}", argumento))
+    return fontes
+
+
+def imprimir_estatisticas(estatisticas):
+    print(f"\n📊 {'câmera':>12} {'captura':>8} {'proc.':>7} {'p50(ms)':>8} {'p95(ms)':>8} "
+          f"{'descart.':>9} {'modelo':>7}")
+    for nome, stats in estatisticas["cameras"].items():
+        print(f"   {nome:>12} {stats['captura_fps']:>8.1f} {stats['processados_fps']:>7.1f} "
+              f"{stats['latencia_p50_ms']:>8.1f} {stats['latencia_p95_ms']:>8.1f} "
+              f"{stats['descartados']:>9} {stats['modelo']:>7}")
+    inferencia = estatisticas["inferencia"]
+    print(f"   inferência: {inferencia['lotes']} lotes, {inferencia['faces_por_lote']} rostos/lote")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconhecimento facial em várias câmeras")
+    parser.add_argument("fontes", nargs="+", help="URLs RTSP/HTTP, /dev/videoN, índices ou vídeos (nome=url)")
+    parser.add_argument("--detectores", type=int, default=0, help="threads de detecção (0 = automático)")
+    parser.add_argument("--lote", type=int, default=DEEPFACE_CONFIG.get('embedding_batch_size', 32),
+                        help="rostos por forward pass")
+    parser.add_argument("--espera-ms", type=float, default=10.0, help="espera máxima para completar um lote")
+    parser.add_argument("--saida", default=None, help="arquivo .jsonl (padrão: stdout)")
+    parser.add_argument("--intervalo-stats", type=float, default=10.0, help="segundos entre relatórios")
+    args = parser.parse_args()
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    # Mensagens e estatísticas vão para o stderr; o stdout fica só com o JSON
+    sys.stdout = sys.stderr
+    lock_saida = threading.Lock()
+
+    def ao_reconhecer(camera, numero, instante, faces):
+        if faces:
+            linha = linha_json(camera.nome, faces, frame=numero, timestamp=instante)
+            with lock_saida:
+                saida.write(linha + "\n")
+                saida.flush()
+
+    servidor = MultiCameraServer(
+        ler_fontes(args.fontes),
+        detectores=args.detectores or None,
+        tamanho_lote=args.lote,
+        espera_ms=args.espera_ms,
+        ao_reconhecer=ao_reconhecer
+    ).start()
+    print(f"✅ {len(servidor.cameras)} câmeras, {servidor.detectores} threads de detecção")
+
+    try:
+        proximo = time.monotonic() + args.intervalo_stats
+        while servidor.ativo:
+            time.sleep(0.5)
+            if time.monotonic() >= proximo:
+                imprimir_estatisticas(servidor.estatisticas())
+                proximo += args.intervalo_stats
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.stop()
+        imprimir_estatisticas(servidor.estatisticas())
+        if saida is not sys.__stdout__:
+            saida.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+PESSOAS.PY - Consultas da tabela 'pessoas' compartilhadas pelas APIs
+- SQL de busca e inserção usados pela API Flask (api/app.py) e ASGI (api/asgi.py)
+- Extração dos campos enviados no JSON de /adicionar
+- Colunas sempre explícitas (sem SELECT *), todas atendidas pelos índices de src/migrations.py
+- Colunas lidas do information_schema (EsquemaPessoas): funciona com o esquema da API
+  e com o de database/database.py
+- Busca por prefixo do nome paginada por cursor (nome, id), sem OFFSET
+"""
+
+import base64
+import json
+
+# Campos aceitos por /adicionar, na ordem das colunas do INSERT
+CAMPOS_PESSOA = (
+    "nome_completo",
+    "doc_identidade",
+    "titulo_eleitor",
+    "certidao_militar",
+    "possui_registro_classe",
+    "numero_registro_classe",
+    "pis_pasep",
+    "tipo_sanguineo",
+    "telefone",
+    "endereco",
+    "emails",
+    "possui_imoveis",
+    "tipo_imovel",
+    "registro_imovel",
+    "endereco_imovel",
+    "possui_veiculos",
+    "tipo_veiculo",
+    "marca_veiculo",
+    "registro_veiculo",
+    "possui_parente",
+    "nome_parente",
+    "doc_parente",
+    "telefone_parente",
+    "endereco_parente",
+)
+
+# Colunas do esquema da API (readme); as rotas usam as da tabela em uso (EsquemaPessoas)
+COLUNAS_DISPONIVEIS = ("id",) + CAMPOS_PESSOA
+
+# Tipos TEXT/BLOB: ficam fora da página da linha no InnoDB e custam uma leitura
+# extra cada; só são devolvidos quando pedidos em ?campos=
+TIPOS_TEXTO = {"tinytext", "text", "mediumtext", "longtext", "tinyblob", "blob", "mediumblob", "longblob"}
+COLUNAS_TEXTO = ("endereco", "emails", "endereco_imovel", "endereco_parente")
+
+# Colunas devolvidas por padrão pela busca de uma pessoa e pela listagem (esquema da API)
+COLUNAS_PESSOA = tuple(coluna for coluna in COLUNAS_DISPONIVEIS if coluna not in COLUNAS_TEXTO)
+COLUNAS_RESUMO = ("id", "nome_completo", "doc_identidade")
+
+# Busca por chave: só o que pode ser consultado pelos índices
+CHAVES_BUSCA = {"id": "id", "cpf": "cpf", "documento": "doc_identidade"}
+
+# Colunas da tabela, na ordem do SELECT *, para saber o que o esquema em uso
+# atende (o esquema da API não tem 'cpf'; o de database/database.py não tem 'emails')
+SQL_COLUNAS_PESSOAS = (
+    "SELECT COLUMN_NAME AS coluna, DATA_TYPE AS tipo FROM information_schema.COLUMNS "
+    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'pessoas' ORDER BY ORDINAL_POSITION"
+)
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+
+def sql_buscar_por(coluna, colunas=COLUNAS_PESSOA):
+    """SELECT das `colunas` da pessoa com `coluna` = %s (no máximo uma linha)."""
+    return f"SELECT {', '.join(colunas)} FROM pessoas WHERE {coluna} = %s LIMIT 1"
+
+
+SQL_INSERIR_PESSOA = f"""
+    INSERT INTO pessoas (
+        {', '.join(CAMPOS_PESSOA)}
+    ) VALUES ({', '.join(['%s'] * len(CAMPOS_PESSOA))})
+"""
+
+
+class EsquemaPessoas:
+    """
+    Colunas da tabela 'pessoas' em uso, a partir das linhas de SQL_COLUNAS_PESSOAS.
+    As consultas só pedem colunas que existem, qualquer que seja o DDL que criou a tabela.
+    """
+
+    def __init__(self, linhas):
+        linhas = list(linhas)
+        # Todas as colunas, na ordem da tabela: ?campos= aceita qualquer uma
+        self.colunas = tuple(linha["coluna"] for linha in linhas)
+        # Padrão de /pessoas: tudo menos TEXT/BLOB
+        self.colunas_pessoa = tuple(
+            linha["coluna"] for linha in linhas if str(linha["tipo"]).lower() not in TIPOS_TEXTO
+        )
+        self.colunas_resumo = tuple(coluna for coluna in COLUNAS_RESUMO if coluna in self.colunas)
+        # Chaves de /pessoas/<chave>/ cuja coluna existe
+        self.chaves = {chave: coluna for chave, coluna in CHAVES_BUSCA.items() if coluna in self.colunas}
+        # /buscar devolve o cadastro completo, como o SELECT * original
+        self.sql_buscar_por_nome = sql_buscar_por("nome_completo", self.colunas)
+
+
+def normalizar_nome_url(nome_completo):
+    """Converte o nome recebido na URL (underscores) para o formato do banco."""
+    return nome_completo.replace("_", " ")
+
+
+def extrair_campos(dados):
+    """
+    Extrai os campos de /adicionar na ordem do INSERT.
+    Retorna (valores, erro); erro é uma mensagem se faltar campo obrigatório.
+    """
+    dados = dados or {}
+    valores = tuple(dados.get(campo) for campo in CAMPOS_PESSOA)
+
+    # Verifica se pelo menos nome_completo e doc_identidade foram fornecidos
+    if not dados.get("nome_completo") or not dados.get("doc_identidade"):
+        return valores, "Campo 'nome_completo' e 'doc_identidade' são obrigatórios"
+    return valores, None
+
+
+def projetar_colunas(campos, padrao, disponiveis=COLUNAS_DISPONIVEIS):
+    """
+    Colunas pedidas em ?campos=a,b (na ordem de `disponiveis`), ou `padrao`.
+    Levanta ValueError para colunas desconhecidas.
+    """
+    if not campos:
+        return padrao
+    pedidas = {campo.strip() for campo in campos.split(",") if campo.strip()}
+    desconhecidas = pedidas - set(disponiveis)
+    if desconhecidas:
+        raise ValueError(f"Campos desconhecidos: {', '.join(sorted(desconhecidas))}")
+    return tuple(coluna for coluna in disponiveis if coluna in pedidas)
+
+
+def codificar_cursor(linha):
+    """Cursor opaco da próxima página: (nome, id) da última linha devolvida."""
+    bruto = json.dumps([linha["nome_completo"], linha["id"]], ensure_ascii=False)
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor):
+    """Inverso de codificar_cursor; levanta ValueError se o cursor for inválido."""
+    try:
+        nome, identificador = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(nome), int(identificador)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Cursor inválido") from e
+
+
+def sql_buscar_prefixo(prefixo, limite=LIMITE_PADRAO, cursor=None, colunas=COLUNAS_RESUMO):
+    """
+    Pessoas cujo nome começa com `prefixo`, em ordem de (nome, id).
+    Retorna (sql, parâmetros); busca uma linha a mais que `limite` para saber
+    se há próxima página. O LIKE 'prefixo%' e o ORDER BY usam idx_pessoas_nome.
+    """
+    # 'nome_completo' e 'id' são necessários para montar o cursor
+    colunas = tuple(dict.fromkeys(("id", "nome_completo") + tuple(colunas)))
+    escapado = prefixo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    condicoes = ["nome_completo LIKE %s"]
+    parametros = [escapado + "%"]
+    if cursor:
+        nome, identificador = decodificar_cursor(cursor)
+        condicoes.append("(nome_completo > %s OR (nome_completo = %s AND id > %s))")
+        parametros += [nome, nome, identificador]
+    sql = (
+        f"SELECT {', '.join(colunas)} FROM pessoas WHERE {' AND '.join(condicoes)} "
+        f"ORDER BY nome_completo, id LIMIT %s"
+    )
+    return sql, parametros + [limite + 1]
+
+
+def paginar(linhas, limite):
+    """Monta a resposta da listagem a partir das linhas (limite + 1) do banco."""
+    linhas = list(linhas)
+    proximo = codificar_cursor(linhas[limite - 1]) if len(linhas) > limite else None
+    return {"resultados": linhas[:limite], "proximo": proximo}
+
+
+def ler_limite(valor):
+    """Limite da página (?limite=), entre 1 e LIMITE_MAXIMO; ValueError se inválido."""
+    try:
+        limite = int(valor) if valor not in (None, "") else LIMITE_PADRAO
+    except (TypeError, ValueError) as e:
+        raise ValueError("Parâmetro 'limite' deve ser um inteiro") from e
+    return max(1, min(LIMITE_MAXIMO, limite))
@@ -0,0 +1,166 @@
+"""
+PROJECTION.PY - Redução de dimensionalidade (PCA) dos embeddings da galeria
+- Ajustada por train.py sobre a galeria (DEEPFACE_CONFIG['pca_dim'], ex.: 4096 -> 256)
+- Branqueamento opcional (DEEPFACE_CONFIG['pca_whiten']): componentes com variância unitária
+- Salva em FILES['projection'], ao lado das representações (que continuam com 4096-d)
+- Aplicada à galeria ao carregar e a cada consulta (GalleryIndex.search_batch)
+- O limiar de distância é recalibrado no espaço reduzido (cossenos mudam após centralizar)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import FILES
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import FILES
+
+from src.gallery_index import GalleryIndex, BLOCO_CONVERSAO, normalizar_l2
+
+
+class ProjecaoPCA:
+    """Projeção linear x -> (x - media) @ componentes [* escalas], sobre vetores unitários."""
+
+    def __init__(self, media, componentes, escalas=None, limiar=None, variancia_explicada=None):
+        self.media = np.asarray(media, dtype=np.float32)
+        self.componentes = np.ascontiguousarray(componentes, dtype=np.float32)
+        self.escalas = None if escalas is None else np.asarray(escalas, dtype=np.float32)
+        self.limiar = None if limiar is None else float(limiar)
+        self.variancia_explicada = None if variancia_explicada is None else float(variancia_explicada)
+
+    @property
+    def entrada(self):
+        return self.componentes.shape[0]
+
+    @property
+    def saida(self):
+        return self.componentes.shape[1]
+
+    @property
+    def branqueada(self):
+        return self.escalas is not None
+
+    @classmethod
+    def ajustar(cls, embeddings, dimensao, branquear=False, amostra=50_000, seed=0):
+        """Ajusta a PCA sobre (uma amostra de) os embeddings normalizados."""
+        embeddings = np.asarray(embeddings)
+        if len(embeddings) > amostra:
+            rng = np.random.default_rng(seed)
+            embeddings = embeddings[np.sort(rng.choice(len(embeddings), amostra, replace=False))]
+        dados = normalizar_l2(embeddings).astype(np.float64)
+        media = dados.mean(axis=0)
+        dados -= media
+
+        n, dim = dados.shape
+        if n > dim:
+            # Covariância D x D (64 MB em 4096-d) é mais barata que o SVD N x D
+            variancias, vetores = np.linalg.eigh(dados.T @ dados / max(n - 1, 1))
+            ordem = np.argsort(variancias)[::-1]
+            variancias, vetores = variancias[ordem], vetores[:, ordem]
+        else:
+            _, valores, vt = np.linalg.svd(dados, full_matrices=False)
+            variancias, vetores = valores ** 2 / max(n - 1, 1), vt.T
+        variancias = np.maximum(variancias, 0.0)
+
+        dimensao = min(dimensao, vetores.shape[1])
+        escalas = 1.0 / np.sqrt(variancias[:dimensao] + 1e-8) if branquear else None
+        total = variancias.sum()
+        return cls(
+            media, vetores[:, :dimensao], escalas,
+            variancia_explicada=variancias[:dimensao].sum() / total if total else 1.0,
+        )
+
+    def aplicar(self, embeddings):
+        """Projeta vetores (N x entrada) para N x saida, em blocos (aceita float16/memmap)."""
+        embeddings = np.atleast_2d(embeddings)
+        saida = np.empty((len(embeddings), self.saida), dtype=np.float32)
+        for inicio in range(0, len(embeddings), BLOCO_CONVERSAO):
+            bloco = normalizar_l2(embeddings[inicio:inicio + BLOCO_CONVERSAO]) - self.media
+            saida[inicio:inicio + len(bloco)] = bloco @ self.componentes
+        if self.escalas is not None:
+            saida *= self.escalas
+        return saida
+
+    def calibrar_limiar(self, embeddings, limiar, amostra=2000, seed=0):
+        """
+        Limiar equivalente no espaço reduzido: a mesma fração de pares de uma
+        amostra da galeria que o limiar original aceita (casamento de quantis).
+        """
+        embeddings = np.asarray(embeddings)
+        rng = np.random.default_rng(seed)
+        if len(embeddings) > amostra:
+            embeddings = embeddings[np.sort(rng.choice(len(embeddings), amostra, replace=False))]
+        originais = normalizar_l2(embeddings)
+        reduzidos = normalizar_l2(self.aplicar(embeddings))
+        pares = ~np.eye(len(originais), dtype=bool)
+        distancias = (1.0 - originais @ originais.T)[pares]
+        fracao = np.mean(distancias <= limiar) if len(distancias) else 0.0
+        if fracao in (0.0, 1.0):
+            # Amostra sem pares aceitos (ou só com eles): não há como calibrar
+            self.limiar = float(limiar)
+        else:
+            self.limiar = float(np.quantile((1.0 - reduzidos @ reduzidos.T)[pares], fracao))
+        return self.limiar
+
+    def salvar(self, caminho=None):
+        caminho = Path(caminho or FILES['projection'])
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        dados = {'media': self.media, 'componentes': self.componentes}
+        if self.escalas is not None:
+            dados['escalas'] = self.escalas
+        if self.limiar is not None:
+            dados['limiar'] = self.limiar
+        if self.variancia_explicada is not None:
+            dados['variancia_explicada'] = self.variancia_explicada
+        np.savez(caminho, **dados)
+
+    @classmethod
+    def carregar(cls, caminho=None):
+        with np.load(Path(caminho or FILES['projection']), allow_pickle=False) as dados:
+            return cls(
+                dados['media'], dados['componentes'],
+                dados['escalas'] if 'escalas' in dados else None,
+                float(dados['limiar']) if 'limiar' in dados else None,
+                float(dados['variancia_explicada']) if 'variancia_explicada' in dados else None,
+            )
+
+
+def carregar_projecao(caminho=None):
+    """Carrega a projeção salva por train.py, ou None se não houver."""
+    caminho = Path(caminho or FILES['projection'])
+    if not caminho.exists():
+        return None
+    try:
+        return ProjecaoPCA.carregar(caminho)
+    except Exception as e:
+        print(f"⚠️ Projeção PCA inválida em {caminho}, usando os embeddings completos: {e}")
+        return None
+
+
+def projetar_galeria(galeria, projecao):
+    """
+    Liga a projeção à galeria. Galerias com a dimensão original (memmap,
+    pickle, banco) são projetadas para um novo GalleryIndex; índices salvos
+    já no espaço reduzido (ANN/quantizados de train.py) só passam a projetar
+    as consultas. Retorna a galeria inalterada se as dimensões não batem.
+    """
+    if galeria is None or projecao is None or not len(galeria):
+        return galeria
+    if galeria.dimensao == projecao.entrada:
+        pessoa_ids = [galeria.pessoas[i] for i in galeria.identidades] if galeria.pessoas else None
+        galeria = GalleryIndex(
+            galeria.identidades, projecao.aplicar(galeria.matriz),
+            limiar=projecao.limiar if projecao.limiar is not None else galeria.limiar,
+            model_name=galeria.model_name, pessoa_ids=pessoa_ids,
+        )
+    if galeria.dimensao != projecao.saida:
+        print(f"⚠️ Projeção PCA ({projecao.entrada}->{projecao.saida}) incompatível com a galeria "
+              f"({galeria.dimensao}-d); consultas sem projeção")
+        return galeria
+    galeria.projecao = projecao
+    return galeria
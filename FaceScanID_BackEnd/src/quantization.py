@@ -0,0 +1,245 @@
+"""
+QUANTIZATION.PY - Galerias comprimidas para caber na memória de cada worker
+- float16: 2 B/dim, mesma busca exata do GalleryIndex (convertida em blocos)
+- int8 escalar por dimensão: 1 B/dim (mínimo e passo por dimensão, treinados na galeria)
+- PQ (product quantization): M bytes por vetor; distância assimétrica (ADC)
+  com a consulta sem compressão contra os códigos, via tabelas de produto interno
+- Mesmo contrato de busca de GalleryIndex e salvos como os índices de ann_index.py
+  (DEEPFACE_CONFIG['ann_backend'] = "float16", "int8" ou "pq")
+
+VGG-Face (4096-d): float32 16 KB/rosto, float16 8 KB, int8 4 KB, PQ com M=64 apenas 64 B.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from src.gallery_index import GalleryIndex, BLOCO_CONVERSAO
+
+
+class Float16Index(GalleryIndex):
+    """Matriz normalizada em float16 (metade da memória, distâncias praticamente iguais)."""
+
+    backend = "float16"
+
+    def __init__(self, identidades, embeddings, normalizado=False, **kwargs):
+        super().__init__(identidades, embeddings, normalizado=normalizado, **kwargs)
+        self.matriz = np.ascontiguousarray(self.matriz, dtype=np.float16)
+
+    def memoria(self):
+        """Bytes ocupados pelos vetores da galeria."""
+        return self.matriz.nbytes
+
+    def salvar(self, caminho):
+        np.savez(
+            caminho,
+            backend=self.backend,
+            model_name=self.model_name,
+            limiar=self.limiar,
+            identidades=self.identidades.astype(str),
+            matriz=self.matriz,
+        )
+
+    @classmethod
+    def carregar(cls, dados, caminho):
+        return cls(
+            dados['identidades'], dados['matriz'], normalizado=True,
+            limiar=float(dados['limiar']), model_name=str(dados['model_name']),
+        )
+
+
+class ScalarInt8Index(GalleryIndex):
+    """
+    Quantização escalar por dimensão: x ~ minimo + passo * codigo (codigo uint8).
+    O produto interno com a consulta q é q·minimo + (q * passo)·codigo, então a
+    busca multiplica a consulta pelos códigos sem reconstruir a galeria.
+    """
+
+    backend = "int8"
+
+    def __init__(self, identidades, embeddings=None, codigos=None, minimo=None, passo=None, **kwargs):
+        if codigos is None:
+            super().__init__(identidades, embeddings, **kwargs)
+            matriz = self.matriz
+            self.minimo = matriz.min(axis=0) if len(matriz) else np.zeros(0, np.float32)
+            maximo = matriz.max(axis=0) if len(matriz) else np.zeros(0, np.float32)
+            self.passo = np.maximum(maximo - self.minimo, 1e-12).astype(np.float32) / 255.0
+            self.codigos = np.empty(matriz.shape, dtype=np.uint8)
+            for inicio in range(0, len(matriz), BLOCO_CONVERSAO):
+                bloco = (matriz[inicio:inicio + BLOCO_CONVERSAO] - self.minimo) / self.passo
+                self.codigos[inicio:inicio + len(bloco)] = np.clip(np.rint(bloco), 0, 255)
+        else:
+            super().__init__(identidades, np.empty((len(identidades), 0)), normalizado=True, **kwargs)
+            self.codigos = np.asarray(codigos, dtype=np.uint8)
+            self.minimo = np.asarray(minimo, dtype=np.float32)
+            self.passo = np.asarray(passo, dtype=np.float32)
+        # Só os códigos ficam na memória
+        self.matriz = np.empty((0, self.codigos.shape[1] if self.codigos.ndim == 2 else 0), np.float32)
+
+    @property
+    def dimensao(self):
+        return self.codigos.shape[1] if len(self) else 0
+
+    def memoria(self):
+        return self.codigos.nbytes + self.minimo.nbytes + self.passo.nbytes
+
+    def _similaridades(self, consultas):
+        base = consultas @ self.minimo
+        escaladas = consultas * self.passo
+        saida = np.empty((len(consultas), len(self)), dtype=np.float32)
+        for inicio in range(0, len(self), BLOCO_CONVERSAO):
+            bloco = self.codigos[inicio:inicio + BLOCO_CONVERSAO].astype(np.float32)
+            saida[:, inicio:inicio + len(bloco)] = escaladas @ bloco.T
+        return saida + base[:, None]
+
+    def salvar(self, caminho):
+        np.savez(
+            caminho,
+            backend=self.backend,
+            model_name=self.model_name,
+            limiar=self.limiar,
+            identidades=self.identidades.astype(str),
+            codigos=self.codigos,
+            minimo=self.minimo,
+            passo=self.passo,
+        )
+
+    @classmethod
+    def carregar(cls, dados, caminho):
+        return cls(
+            dados['identidades'], codigos=dados['codigos'], minimo=dados['minimo'], passo=dados['passo'],
+            limiar=float(dados['limiar']), model_name=str(dados['model_name']),
+        )
+
+
+def _kmeans(dados, n_clusters, n_iter=10, seed=0):
+    """K-means euclidiano simples (sub-vetores do PQ não são unitários)."""
+    rng = np.random.default_rng(seed)
+    centroides = dados[rng.choice(len(dados), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        # argmin ||x - c||² = argmax (x·c - ||c||²/2)
+        rotulos = np.argmax(dados @ centroides.T - 0.5 * (centroides ** 2).sum(axis=1), axis=1)
+        contagens = np.bincount(rotulos, minlength=n_clusters)
+        cheios = contagens > 0
+        # Somas por cluster com os pontos ordenados por rótulo (um reduceat)
+        ordem = np.argsort(rotulos, kind="stable")
+        inicios = np.concatenate(([0], np.cumsum(contagens)[:-1]))[cheios]
+        centroides[cheios] = np.add.reduceat(dados[ordem], inicios, axis=0) / contagens[cheios, None]
+        # Clusters vazios são reiniciados com pontos aleatórios
+        vazios = ~cheios
+        if vazios.any():
+            centroides[vazios] = dados[rng.choice(len(dados), int(vazios.sum()), replace=False)]
+    return centroides
+
+
+class PQIndex(GalleryIndex):
+    """
+    Product quantization: o vetor é dividido em M sub-vetores e cada um vira
+    o índice (1 byte) do centróide mais próximo no seu livro de códigos.
+    Busca ADC: para cada consulta, uma tabela M x ksub de produtos internos
+    entre os sub-vetores da consulta e os centróides; a similaridade com um
+    rosto é a soma de M entradas da tabela.
+    """
+
+    backend = "pq"
+
+    def __init__(self, identidades, embeddings=None, m=None, ksub=256, amostra=None,
+                 codigos=None, livros=None, dimensao=None, **kwargs):
+        if codigos is None:
+            super().__init__(identidades, embeddings, **kwargs)
+            matriz = self.matriz
+            self._dimensao = matriz.shape[1] if len(matriz) else 0
+            m = m or DEEPFACE_CONFIG.get('pq_subvetores', 64)
+            m = max(1, min(m, self._dimensao or 1))
+            # Dimensão completada com zeros até um múltiplo de M
+            dsub = -(-self._dimensao // m)
+            ksub = min(ksub, len(matriz)) or 1
+            self.livros = np.zeros((m, ksub, dsub), dtype=np.float32)
+            self.codigos = np.empty((len(matriz), m), dtype=np.uint8)
+
+            rng = np.random.default_rng(0)
+            amostra = amostra or ksub * 32
+            treino = matriz[rng.choice(len(matriz), amostra, replace=False)] if len(matriz) > amostra else matriz
+            for sub in range(m):
+                fatia = slice(sub * dsub, min((sub + 1) * dsub, self._dimensao))
+                largura = fatia.stop - fatia.start
+                if largura <= 0 or not len(matriz):
+                    continue
+                self.livros[sub, :, :largura] = _kmeans(np.ascontiguousarray(treino[:, fatia]), ksub)
+                livro = self.livros[sub, :, :largura]
+                normas = 0.5 * (livro ** 2).sum(axis=1)
+                for inicio in range(0, len(matriz), BLOCO_CONVERSAO):
+                    bloco = matriz[inicio:inicio + BLOCO_CONVERSAO, fatia]
+                    self.codigos[inicio:inicio + len(bloco), sub] = np.argmax(bloco @ livro.T - normas, axis=1)
+        else:
+            super().__init__(identidades, np.empty((len(identidades), 0)), normalizado=True, **kwargs)
+            self.codigos = np.asarray(codigos, dtype=np.uint8)
+            self.livros = np.asarray(livros, dtype=np.float32)
+            self._dimensao = int(dimensao)
+        self.matriz = np.empty((0, self._dimensao), np.float32)
+
+    @property
+    def dimensao(self):
+        return self._dimensao if len(self) else 0
+
+    @property
+    def m(self):
+        return self.livros.shape[0]
+
+    def memoria(self):
+        return self.codigos.nbytes + self.livros.nbytes
+
+    def tabelas(self, consultas):
+        """Tabelas ADC (consultas x M x ksub) de produtos internos."""
+        m, ksub, dsub = self.livros.shape
+        completas = np.zeros((len(consultas), m * dsub), dtype=np.float32)
+        completas[:, :self._dimensao] = consultas
+        return np.einsum('qmd,mkd->qmk', completas.reshape(len(consultas), m, dsub), self.livros)
+
+    def _similaridades(self, consultas):
+        tabelas = self.tabelas(consultas)
+        m, ksub, _ = self.livros.shape
+        deslocamentos = (np.arange(m) * ksub).astype(np.intp)
+        saida = np.empty((len(consultas), len(self)), dtype=np.float32)
+        for inicio in range(0, len(self), BLOCO_CONVERSAO):
+            # Índices na tabela achatada: um gather de M entradas por rosto
+            indices = self.codigos[inicio:inicio + BLOCO_CONVERSAO].astype(np.intp) + deslocamentos
+            for q, tabela in enumerate(tabelas):
+                saida[q, inicio:inicio + len(indices)] = tabela.ravel()[indices].sum(axis=1)
+        return saida
+
+    def salvar(self, caminho):
+        np.savez(
+            caminho,
+            backend=self.backend,
+            model_name=self.model_name,
+            limiar=self.limiar,
+            identidades=self.identidades.astype(str),
+            codigos=self.codigos,
+            livros=self.livros,
+            dimensao=self._dimensao,
+        )
+
+    @classmethod
+    def carregar(cls, dados, caminho):
+        return cls(
+            dados['identidades'], codigos=dados['codigos'], livros=dados['livros'],
+            dimensao=int(dados['dimensao']),
+            limiar=float(dados['limiar']), model_name=str(dados['model_name']),
+        )
+
+
+BACKENDS_QUANTIZADOS = {
+    Float16Index.backend: Float16Index,
+    ScalarInt8Index.backend: ScalarInt8Index,
+    PQIndex.backend: PQIndex,
+}
@@ -0,0 +1,300 @@
+"""
+RECOGNITION_SERVICE.PY - Serviço de reconhecimento compartilhado por processo
+- Carrega o modelo do DeepFace e a galeria uma única vez por processo
+- Aquecimento via src/model_registry.py para evitar latência na 1ª requisição
+- Usado pela API (api/app.py) para reconhecer imagens enviadas por HTTP
+- Modo em lote: todos os rostos de várias imagens em um único forward pass
+- Detecção e identificação separadas, para pipelines de vídeo (src/video_pipeline.py)
+- Galeria recarregada a quente quando train.py termina (src/gallery_reload.py)
+"""
+
+import base64
+import binascii
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from src.gallery_index import carregar_galeria
+from src.gallery_reload import GalleryReloader, versao_galeria
+from src.embedding_pipeline import redimensionar_face, forward_lote
+from src.model_registry import obter_modelo, aquecer, tamanho_entrada
+
+_servico = None
+_lock = threading.Lock()
+# Contador compartilhado de pedidos de recarga (workers de api/asgi.py)
+_pedidos_recarga = None
+
+
+def decodificar_imagem(dados):
+    """Decodifica bytes JPEG/PNG em uma imagem BGR (None se inválida)."""
+    if not dados:
+        return None
+    return cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def ler_ndjson(corpo):
+    """
+    Lê um lote NDJSON, uma imagem por linha: {"id": ..., "imagem": "<base64>"}.
+    Retorna [(id, bytes)]; linhas inválidas (inclusive JSON que não é um
+    objeto, como [1, 2] ou "abc") viram bytes None.
+    """
+    itens = []
+    for numero, linha in enumerate(corpo.splitlines()):
+        if not linha.strip():
+            continue
+        try:
+            item = json.loads(linha)
+            if not isinstance(item, dict):
+                raise ValueError("linha não é um objeto JSON")
+            itens.append((item.get("id", numero), base64.b64decode(item["imagem"])))
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            itens.append((numero, None))
+    return itens
+
+
+def decodificar_ndjson(corpo):
+    """Como ler_ndjson, mas já decodificando as imagens (None se inválidas)."""
+    return [(identificador, decodificar_imagem(dados)) for identificador, dados in ler_ndjson(corpo)]
+
+
+class RecognitionService:
+    """Modelo e galeria residentes em memória, prontos para reconhecer."""
+
+    def __init__(self):
+        inicio = time.perf_counter()
+        self.model_name = DEEPFACE_CONFIG['model_name']
+        self.detector_backend = DEEPFACE_CONFIG['detector_backend']
+        self.align = DEEPFACE_CONFIG['align']
+
+        # Modelo e detector carregados e aquecidos uma única vez por processo
+        self.modelo = obter_modelo(self.model_name)
+        self.tamanho = tamanho_entrada(self.modelo)
+        # Versão lida antes de carregar: mudanças durante a carga disparam nova recarga
+        self.versao_galeria = versao_galeria()
+        self.galeria = carregar_galeria()
+        self.galeria_carregada_em = time.time()
+        self.recargas = 0
+        self.tempos_de_carga = aquecer(self.model_name, self.detector_backend, self.align)
+        self.recarregador = GalleryReloader(self, pedidos=_pedidos_recarga).iniciar()
+        print(f"✅ Serviço de reconhecimento pronto em {time.perf_counter() - inicio:.1f}s "
+              f"(pid {os.getpid()})")
+
+    @property
+    def pessoas(self):
+        galeria = self.galeria
+        return galeria.pessoas if galeria is not None else {}
+
+    def trocar_galeria(self, galeria, versao):
+        """
+        Troca a galeria em uso. A atribuição é atômica: cada consulta lê
+        self.galeria uma única vez, então as que já começaram terminam no
+        índice antigo (liberado quando a última delas acaba).
+        """
+        self.galeria = galeria
+        self.versao_galeria = versao
+        self.galeria_carregada_em = time.time()
+        self.recargas += 1
+
+    def recarregar_galeria(self, forcar=True):
+        """Recarrega a galeria agora (por padrão, mesmo sem mudança de versão)."""
+        return self.recarregador.recarregar(forcar=forcar)
+
+    def estado_galeria(self):
+        """Versão, tamanho e tipo da galeria em uso neste processo."""
+        galeria = self.galeria
+        return {
+            "versao": self.versao_galeria,
+            "rostos": len(galeria) if galeria is not None else 0,
+            "dimensao": galeria.dimensao if galeria is not None else 0,
+            "indice": type(galeria).__name__ if galeria is not None else None,
+            "carregada_em": datetime.fromtimestamp(self.galeria_carregada_em).isoformat(timespec="seconds"),
+            "recargas": self.recargas,
+            "verificacao_s": self.recarregador.intervalo,
+            "pid": os.getpid(),
+        }
+
+    def reconhecer(self, img, k=1):
+        """
+        Detecta e reconhece todos os rostos de uma imagem BGR.
+        Retorna uma lista de dicts com bbox, identidade e distância
+        (identidade None quando o rosto não corresponde a ninguém da galeria).
+        """
+        try:
+            reps = DeepFace.represent(
+                img_path=img,
+                model_name=self.model_name,
+                detector_backend=self.detector_backend,
+                enforce_detection=True,
+                align=self.align
+            )
+        except ValueError:
+            # Nenhum rosto detectado
+            return []
+
+        if not reps:
+            return []
+
+        embeddings = np.array([rep["embedding"] for rep in reps], dtype=np.float32)
+        galeria = self.galeria  # A mesma galeria do início ao fim, mesmo durante uma recarga
+        if galeria is not None:
+            resultados = galeria.search_batch(embeddings, k=k)
+        else:
+            resultados = [[] for _ in reps]
+
+        pessoas = galeria.pessoas if galeria is not None else {}
+        return [
+            _montar_face(rep.get("facial_area", {}), rep.get("face_confidence"), candidatos, pessoas)
+            for rep, candidatos in zip(reps, resultados)
+        ]
+
+    def detectar(self, img, detector_backend=None, confianca_minima=0.0):
+        """
+        Detecta e alinha os rostos de uma imagem BGR (saída do extract_faces).
+        Retorna lista vazia se nenhum rosto for encontrado.
+        """
+        try:
+            faces = DeepFace.extract_faces(
+                img_path=img,
+                detector_backend=detector_backend or self.detector_backend,
+                enforce_detection=True,
+                align=self.align
+            )
+        except ValueError:
+            # Nenhum rosto detectado
+            return []
+        return [face for face in faces if (face.get("confidence") or 0) >= confianca_minima]
+
+    def identificar(self, faces, k=1):
+        """
+        Reconhece rostos já detectados (saída de detectar) com um único forward
+        pass e uma única consulta à galeria. Retorna um dict por rosto.
+        """
+        if not faces:
+            return []
+
+        # extract_faces devolve RGB; o modelo é alimentado em BGR
+        entradas = [redimensionar_face(face["face"][:, :, ::-1], self.tamanho) for face in faces]
+        embeddings = forward_lote(self.modelo, entradas)
+        galeria = self.galeria  # A mesma galeria do início ao fim, mesmo durante uma recarga
+        if galeria is not None:
+            candidatos = galeria.search_batch(embeddings, k=k)
+        else:
+            candidatos = [[] for _ in faces]
+
+        pessoas = galeria.pessoas if galeria is not None else {}
+        return [
+            _montar_face(face.get("facial_area", {}), face.get("confidence"), encontrados, pessoas)
+            for face, encontrados in zip(faces, candidatos)
+        ]
+
+    def reconhecer_lote(self, imagens, k=1):
+        """
+        Reconhece várias imagens BGR de uma vez: detecta os rostos de todas,
+        gera os embeddings em um único forward pass e consulta a galeria com
+        um único produto matricial. Retorna um dict por imagem, na ordem de
+        entrada, com "faces" e "error" (uma imagem ruim não derruba o lote).
+        """
+        resultados = [{"faces": [], "error": None} for _ in imagens]
+        faces, origens = [], []
+
+        for indice, img in enumerate(imagens):
+            if img is None:
+                resultados[indice]["error"] = "Imagem ausente ou inválida"
+                continue
+            try:
+                detectadas = self.detectar(img)
+            except Exception as e:
+                resultados[indice]["error"] = str(e)
+                continue
+            faces.extend(detectadas)
+            origens.extend([indice] * len(detectadas))
+
+        for indice, face in zip(origens, self.identificar(faces, k=k)):
+            resultados[indice]["faces"].append(face)
+        return resultados
+
+
+def _montar_face(area, confianca, candidatos, pessoas=None):
+    """
+    Monta a resposta de um rosto (identidade None se não houver correspondência).
+    `pessoas` ({arquivo: pessoas.id}, galerias do banco) preenche pessoa_id.
+    """
+    pessoas = pessoas or {}
+    return {
+        "bbox": {chave: int(area.get(chave, 0)) for chave in ("x", "y", "w", "h")},
+        "confianca": float(confianca or 0),
+        "identidade": os.path.splitext(candidatos[0][0])[0] if candidatos else None,
+        "pessoa_id": pessoas.get(candidatos[0][0]) if candidatos else None,
+        "distancia": candidatos[0][1] if candidatos else None,
+        "candidatos": [
+            {"arquivo": arquivo, "pessoa_id": pessoas.get(arquivo), "distancia": distancia}
+            for arquivo, distancia in candidatos
+        ]
+    }
+
+
+def obter_servico():
+    """Retorna o serviço do processo atual, criando-o na primeira chamada."""
+    global _servico
+    if _servico is None:
+        with _lock:
+            if _servico is None:
+                _servico = RecognitionService()
+    return _servico
+
+
+def aquecer_em_segundo_plano():
+    """Inicia o carregamento do serviço sem bloquear a inicialização do servidor."""
+    threading.Thread(target=obter_servico, name="aquecimento-modelo", daemon=True).start()
+
+
+# Tarefas para pools de processos (ex.: api/asgi.py): recebem bytes, não imagens,
+# para que a decodificação também saia do processo que atende as requisições
+def reconhecer_bytes(dados):
+    """Decodifica e reconhece uma imagem; None se os bytes forem inválidos."""
+    img = decodificar_imagem(dados)
+    if img is None:
+        return None
+    return obter_servico().reconhecer(img)
+
+
+def reconhecer_lote_bytes(lista_dados):
+    """Decodifica e reconhece um lote de imagens (bytes ou None por item)."""
+    return obter_servico().reconhecer_lote([
+        decodificar_imagem(dados) if dados else None for dados in lista_dados
+    ])
+
+
+def inicializar_worker(pedidos=None):
+    """Initializer dos pools: liga o contador de pedidos de recarga e carrega o serviço."""
+    global _pedidos_recarga
+    _pedidos_recarga = pedidos
+    obter_servico()
+
+
+def recarregar_galeria(forcar=True):
+    """Recarrega a galeria deste processo e retorna o novo estado."""
+    servico = obter_servico()
+    servico.recarregar_galeria(forcar=forcar)
+    return servico.estado_galeria()
+
+
+def estado_galeria():
+    """Estado da galeria deste processo (versão, rostos, pid...)."""
+    return obter_servico().estado_galeria()
@@ -3,24 +3,30 @@ RECOGNIZE.PY - Versão Melhorada
 - Reconhecimento facial em tempo real com OpenCV e DeepFace
 - Interface aprimorada com Tkinter
 - Controles de câmera e zoom
+- Captura, detecção e reconhecimento em threads (src/video_pipeline.py):
+  a interface só desenha o frame mais recente e nunca espera pelo modelo
+- Rastreamento de rostos (src/face_tracker.py): cada pessoa é reconhecida
+  uma vez por trilha, não a cada frame
 """
 
 import cv2
-import os
 import tkinter as tk
 from tkinter import ttk, messagebox
 from pathlib import Path
 import sys
-from deepface import DeepFace
-import numpy as np
 
 # Configuração de importação segura
 try:
-    from config import DIRECTORIES, FILES, DEEPFACE_CONFIG
+    from config import DIRECTORIES, FILES, DEEPFACE_CONFIG, initialize_directories
 except ImportError:
     PROJECT_ROOT = Path(__file__).parent.parent
     sys.path.append(str(PROJECT_ROOT))
-    from config import DIRECTORIES, FILES, DEEPFACE_CONFIG
+    from config import DIRECTORIES, FILES, DEEPFACE_CONFIG, initialize_directories
+
+from src.recognition_service import obter_servico
+from src.video_pipeline import FramePipeline, abrir_camera
+from src.face_tracker import FaceTracker
+from src.face_detection import criar_detector
 
 class FaceRecognitionApp:
     def __init__(self, root):
@@ -30,6 +36,21 @@ class FaceRecognitionApp:
         self.cap = None
         self.camera_on = False
         self.recognized_faces = []
+        self.pipeline = None
+        
+        # Modelo e galeria carregados uma única vez (gerada por train.py)
+        self.service = obter_servico()
+        self.detection_confidence = 0.85
+        
+        # "cascade" ou "direct" em resolução reduzida, conforme DEEPFACE_CONFIG
+        self.detector = criar_detector(self.service, self.detection_confidence)
+        
+        # Identidade em cache por trilha; "kcf"/"csrt" + detection_interval > 1
+        # rastreiam os rostos entre detecções sem rodar o detector
+        self.tracker = None
+        self.tracker_backend = DEEPFACE_CONFIG.get('tracker_backend')
+        self.detection_interval = max(1, int(DEEPFACE_CONFIG.get('detection_interval', 1)))
+        self.frames_detected = 0
         
         # Configurações da câmera
         self.camera_index = 0  # Câmera padrão
@@ -124,12 +145,10 @@ class FaceRecognitionApp:
     
     def start_camera(self):
         """Inicia a câmera com configurações otimizadas"""
-        self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
-        
-        # Configurações da câmera
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera_width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera_height)
-        self.cap.set(cv2.CAP_PROP_FPS, self.camera_fps)
+        # Backend nativo do sistema (DirectShow no Windows, V4L2 no Linux)
+        self.cap = abrir_camera(
+            self.camera_index, self.camera_width, self.camera_height, self.camera_fps
+        )
         
         if not self.cap.isOpened():
             messagebox.showerror(
@@ -138,6 +157,22 @@ class FaceRecognitionApp:
             )
             return
         
+        # Captura, detecção e reconhecimento rodam fora do loop do Tk
+        self.tracker = FaceTracker(
+            confianca_minima=self.detection_confidence,
+            rastreador_opencv=self.tracker_backend
+        )
+        self.frames_detected = 0
+        self.pipeline = FramePipeline(
+            ler_frame=self.cap.read,
+            detectar=self.detect_faces,
+            identificar=lambda frame, faces: self.tracker.anotar(faces, self.service.identificar, frame),
+            preprocessar=lambda frame: self.apply_zoom(frame, self.zoom_factor)
+        ).start()
+        
+        cv2.namedWindow("Reconhecimento Facial", cv2.WINDOW_NORMAL)
+        cv2.resizeWindow("Reconhecimento Facial", self.camera_width, self.camera_height)
+        
         self.camera_on = True
         self.btn_start.config(text="Parar Câmera")
         self.status_var.set("Câmera: LIGADA")
@@ -146,6 +181,11 @@ class FaceRecognitionApp:
     def stop_camera(self):
         """Para a câmera e libera recursos"""
         self.camera_on = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            print(f"📊 Pipeline: {self.pipeline.estatisticas()}")
+            print(f"📊 Rastreamento: {self.tracker.estatisticas()}")
+            self.pipeline = None
         if self.cap is not None:
             self.cap.release()
         cv2.destroyAllWindows()
@@ -153,88 +193,64 @@ class FaceRecognitionApp:
         self.status_var.set("Câmera: DESLIGADA")
     
     def update_camera(self):
-        """Atualiza o feed da câmera com reconhecimento facial"""
+        """Exibe o frame mais recente com o último reconhecimento disponível"""
         if not self.camera_on:
             return
         
-        ret, self.frame = self.cap.read()
-        if not ret:
-            print("Erro ao capturar frame")
+        if not self.pipeline.ativo:
+            print(self.pipeline.erro or "Pipeline de vídeo encerrado")
             self.stop_camera()
             return
         
-        # Aplica zoom
-        frame = self.apply_zoom(self.frame, self.zoom_factor)
+        self.frame = self.pipeline.ultimo_frame()
+        frame, self.recognized_faces = self.pipeline.ultimo_resultado()
         
-        try:
-            # Converte para RGB (DeepFace trabalha com RGB)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Detecta rostos
-            self.recognized_faces = DeepFace.extract_faces(
-                img_path=rgb_frame,
-                detector_backend="mtcnn",
-                enforce_detection=False,
-                align=True
-            )
-            
-            # Processa cada rosto detectado
+        if frame is not None:
+            # Desenha em uma cópia: o frame pode estar em uso pelos outros estágios
+            frame = frame.copy()
             for face in self.recognized_faces:
-                if 'facial_area' in face and face['confidence'] > 0.85:
-                    self.process_face(frame, face)
+                self.draw_face(frame, face)
             
-        except Exception as e:
-            print(f"Erro durante reconhecimento: {str(e)}")
+            # Exibe o frame (a janela redimensionável escala o recorte do zoom)
+            cv2.imshow("Reconhecimento Facial", frame)
+            cv2.waitKey(1)
         
-        # Exibe o frame
-        cv2.imshow("Reconhecimento Facial", frame)
-        
-        # Agenda próxima atualização
-        self.root.after(10, self.update_camera)
+        # Agenda próxima atualização (no ritmo da câmera)
+        self.root.after(max(1, 1000 // self.camera_fps), self.update_camera)
+    
+    def detect_faces(self, frame):
+        """Detecta rostos (executado na thread de detecção)"""
+        self.frames_detected += 1
+        if self.tracker.rastreador_opencv and self.frames_detected % self.detection_interval:
+            # Entre detecções, os rastreadores OpenCV movem as caixas
+            return self.tracker.prever(frame)
+        return self.detector(frame)
     
-    def process_face(self, frame, face):
-        """Processa e desenha informações para cada rosto detectado"""
-        facial_area = face['facial_area']
-        x, y, w, h = facial_area['x'], facial_area['y'], facial_area['w'], facial_area['h']
+    def draw_face(self, frame, face):
+        """Desenha o retângulo e a identidade de um rosto reconhecido"""
+        bbox = face['bbox']
+        x, y, w, h = bbox['x'], bbox['y'], bbox['w'], bbox['h']
         
         # Desenha retângulo ao redor do rosto
         cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
         
-        # Tenta reconhecer a pessoa
-        try:
-            # Extrai a região do rosto
-            face_region = frame[y:y+h, x:x+w]
-            
-            # Faz o reconhecimento
-            results = DeepFace.find(
-                img_path=face_region,
-                db_path=str(DIRECTORIES['faces']),
-                enforce_detection=False,
-                silent=True
+        # Mostra resultado
+        if face['identidade']:
+            cv2.putText(
+                frame, face['identidade'], (x, y-10),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2
             )
-            
-            # Mostra resultado
-            if results and not results[0].empty:
-                identity = os.path.splitext(os.path.basename(results[0]['identity'][0]))[0]
-                cv2.putText(
-                    frame, identity, (x, y-10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2
-                )
-            else:
-                cv2.putText(
-                    frame, "Desconhecido", (x, y-10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2
-                )
-                
-        except Exception as e:
-            print(f"Erro no reconhecimento: {str(e)}")
+        else:
             cv2.putText(
-                frame, "Erro", (x, y-10),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2
+                frame, "Desconhecido", (x, y-10),
+                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2
             )
     
     def apply_zoom(self, frame, zoom_factor):
-        """Aplica zoom mantendo proporções"""
+        """
+        Aplica zoom recortando o centro do frame, sem redimensionar: a detecção
+        reduz o recorte uma única vez e a janela escala a exibição
+        """
         if zoom_factor == 1.0:
             return frame
             
@@ -249,8 +265,7 @@ class FaceRecognitionApp:
         x2 = min(width, center_x + new_width // 2)
         y2 = min(height, center_y + new_height // 2)
         
-        cropped = frame[y1:y2, x1:x2]
-        return cv2.resize(cropped, (width, height))
+        return frame[y1:y2, x1:x2]
     
     def adjust_zoom(self, increment):
         """Ajusta o zoom"""
@@ -273,6 +288,7 @@ class FaceRecognitionApp:
         self.root.destroy()
 
 def main():
+    initialize_directories()
     root = tk.Tk()
     app = FaceRecognitionApp(root)
     root.protocol("WM_DELETE_WINDOW", app.close_app)
@@ -0,0 +1,287 @@
+"""
+RECOGNIZE_HEADLESS.PY - Reconhecimento sem interface (servidores e vídeos gravados)
+- Fontes: arquivo de vídeo, pasta de imagens, URL RTSP/HTTP, dispositivo V4L2 ou índice de câmera
+- Mesma detecção e reconhecimento do recognize.py, sem Tkinter nem cv2.imshow
+- Saída em JSON lines (um frame por linha) no stdout ou em arquivo
+- Modo tempo real: ritmo da fonte, frames atrasados são descartados
+- Modo vazão máxima: todos os frames, vídeo dividido em trechos entre processos
+
+Uso:
+    python src/recognize_headless.py gravacao.mp4 --workers 8 --saida resultados.jsonl
+    python src/recognize_headless.py data/faces/
+    python src/recognize_headless.py rtsp://camera-01/stream --tempo-real
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from src.recognition_service import obter_servico
+from src.face_detection import criar_detector
+from src.face_tracker import FaceTracker
+from src.video_pipeline import FramePipeline, abrir_captura
+
+EXTENSOES_IMAGEM = {".jpg", ".jpeg", ".png", ".bmp"}
+CONFIANCA_MINIMA = 0.85
+FRAMES_POR_TRECHO = 600
+
+# Reconhecedor de cada processo (preenchido por _inicializar_worker)
+_WORKER = {}
+
+
+class HeadlessRecognizer:
+    """Detecção + reconhecimento de frames soltos, com rastreamento opcional."""
+
+    def __init__(self, rastrear=True, confianca_minima=CONFIANCA_MINIMA):
+        self.servico = obter_servico()
+        self.detectar = criar_detector(self.servico, confianca_minima)
+        self.tracker = FaceTracker(confianca_minima=confianca_minima) if rastrear else None
+
+    def identificar(self, frame, faces, instante=None):
+        if self.tracker is not None:
+            return self.tracker.anotar(faces, self.servico.identificar, frame, agora=instante)
+        return self.servico.identificar(faces)
+
+    def processar(self, frame, instante=None):
+        """
+        Retorna os rostos reconhecidos em um frame BGR. `instante` (segundos
+        no vídeo) marca o tempo do rastreamento quando não se usa o relógio.
+        """
+        faces = self.detectar(frame)
+        # Sem rostos, o rastreador ainda expira as trilhas de quem saiu
+        return self.identificar(frame, faces, instante)
+
+
+def _resumir_faces(faces):
+    """Campos de cada rosto emitidos na saída."""
+    return [
+        {chave: face[chave] for chave in ("bbox", "confianca", "identidade", "pessoa_id", "distancia", "track_id")
+         if chave in face}
+        for face in faces
+    ]
+
+
+def linha_json(fonte, faces, frame=None, timestamp=None, arquivo=None):
+    """Serializa o resultado de um frame (ou imagem) em uma linha JSON."""
+    registro = {"fonte": fonte}
+    if frame is not None:
+        registro["frame"] = frame
+    if timestamp is not None:
+        registro["timestamp"] = round(timestamp, 3)
+    if arquivo is not None:
+        registro["arquivo"] = arquivo
+    registro["faces"] = _resumir_faces(faces)
+    return json.dumps(registro, ensure_ascii=False)
+
+
+def tipo_da_fonte(fonte):
+    """'pasta', 'arquivo' (vídeo gravado) ou 'stream' (câmera, V4L2, RTSP/HTTP)."""
+    caminho = Path(fonte)
+    if caminho.is_dir():
+        return "pasta"
+    if caminho.is_file() and not str(fonte).startswith("/dev/"):
+        return "arquivo"
+    return "stream"
+
+
+def listar_imagens(pasta):
+    return [
+        str(caminho) for caminho in sorted(Path(pasta).rglob("*"))
+        if caminho.suffix.lower() in EXTENSOES_IMAGEM
+    ]
+
+
+def _inicializar_worker(rastrear):
+    """Executado uma vez por processo: logs no stderr e modelo carregado."""
+    sys.stdout = sys.stderr
+    _WORKER["reconhecedor"] = HeadlessRecognizer(rastrear=rastrear)
+
+
+def processar_imagens(fonte, caminhos):
+    """Reconhece uma lista de imagens; retorna as linhas JSON, na ordem recebida."""
+    reconhecedor = _WORKER["reconhecedor"]
+    linhas = []
+    for caminho in caminhos:
+        img = cv2.imread(caminho)
+        if img is None:
+            print(f"⚠️ Imagem inválida: {caminho}")
+            continue
+        linhas.append(linha_json(fonte, reconhecedor.processar(img), arquivo=os.path.relpath(caminho, fonte)))
+    return linhas
+
+
+def processar_trecho(fonte, inicio, fim, passo, fps, todos_frames):
+    """Reconhece os frames [inicio, fim) de um vídeo gravado (um a cada `passo`)."""
+    reconhecedor = _WORKER["reconhecedor"]
+    if reconhecedor.tracker is not None:
+        # Trilhas não atravessam trechos
+        reconhecedor.tracker = FaceTracker(confianca_minima=reconhecedor.tracker.confianca_minima)
+
+    cap = abrir_captura(fonte)
+    if inicio:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, inicio)
+    linhas = []
+    numero = inicio
+    while fim is None or numero < fim:
+        if (numero - inicio) % passo:
+            # grab() avança sem decodificar o frame
+            if not cap.grab():
+                break
+            numero += 1
+            continue
+        ok, frame = cap.read()
+        if not ok:
+            break
+        faces = reconhecedor.processar(frame, instante=numero / fps)
+        if faces or todos_frames:
+            linhas.append(linha_json(fonte, faces, frame=numero, timestamp=numero / fps))
+        numero += 1
+    cap.release()
+    return linhas
+
+
+def executar_vazao_maxima(fonte, tipo, escrever, workers, passo, rastrear, todos_frames):
+    """Processa todos os frames o mais rápido possível, dividindo o trabalho entre processos."""
+    if tipo == "pasta":
+        caminhos = listar_imagens(fonte)
+        tamanho = max(1, min(64, len(caminhos) // (workers * 4) or 1))
+        tarefas = [(processar_imagens, fonte, caminhos[i:i + tamanho])
+                   for i in range(0, len(caminhos), tamanho)]
+    else:
+        cap = abrir_captura(fonte)
+        if not cap.isOpened():
+            raise RuntimeError(f"Não foi possível abrir {fonte}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total <= 0:
+            # Duração desconhecida: um único trecho até o fim
+            workers, trechos = 1, [(0, None)]
+        else:
+            trechos = [(i, min(total, i + FRAMES_POR_TRECHO)) for i in range(0, total, FRAMES_POR_TRECHO)]
+        tarefas = [(processar_trecho, fonte, inicio, fim, passo, fps, todos_frames)
+                   for inicio, fim in trechos]
+
+    if workers <= 1:
+        _inicializar_worker(rastrear)
+        for funcao, *args in tarefas:
+            for linha in funcao(*args):
+                escrever(linha)
+        return
+
+    # spawn: este processo já importou o DeepFace/TensorFlow, e um fork
+    # herdaria suas threads e locks em estado indefinido
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_inicializar_worker, initargs=(rastrear,)) as executor:
+        futuros = [executor.submit(funcao, *args) for funcao, *args in tarefas]
+        # Resultados escritos na ordem dos trechos
+        for futuro in futuros:
+            for linha in futuro.result():
+                escrever(linha)
+
+
+def executar_tempo_real(fonte, tipo, escrever, rastrear, todos_frames):
+    """
+    Acompanha a fonte no ritmo dela (vídeos gravados são lidos na velocidade
+    original); se o reconhecimento não acompanhar, frames são descartados.
+    """
+    reconhecedor = HeadlessRecognizer(rastrear=rastrear)
+    cap = abrir_captura(fonte)
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir {fonte}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    inicio = time.monotonic()
+
+    def ler_frame():
+        if tipo == "arquivo":
+            # Não lê mais rápido que o vídeo original
+            atraso = cap.get(cv2.CAP_PROP_POS_FRAMES) / fps - (time.monotonic() - inicio)
+            if atraso > 0:
+                time.sleep(atraso)
+        return cap.read()
+
+    def ao_reconhecer(numero, instante, faces):
+        if faces or todos_frames:
+            # Vídeos gravados: posição no vídeo; streams: horário da captura
+            timestamp = (numero - 1) / fps if tipo == "arquivo" else instante
+            escrever(linha_json(fonte, faces, frame=numero, timestamp=timestamp))
+
+    pipeline = FramePipeline(
+        ler_frame=ler_frame,
+        detectar=reconhecedor.detectar,
+        identificar=reconhecedor.identificar,
+        ao_reconhecer=ao_reconhecer
+    ).start()
+    try:
+        while pipeline.ativo:
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        cap.release()
+        print(f"📊 Pipeline: {pipeline.estatisticas()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconhecimento facial sem interface (JSON lines)")
+    parser.add_argument("fonte", help="vídeo, pasta de imagens, URL RTSP/HTTP, /dev/videoN ou índice da câmera")
+    parser.add_argument("--saida", default=None, help="arquivo .jsonl (padrão: stdout)")
+    parser.add_argument("--tempo-real", action="store_true",
+                        help="ritmo da fonte, descartando frames atrasados (padrão para streams)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processos no modo vazão máxima (0 = número de CPUs)")
+    parser.add_argument("--passo", type=int, default=1, help="processa 1 a cada N frames do vídeo")
+    parser.add_argument("--sem-rastreamento", action="store_true",
+                        help="reconhece todos os rostos de todos os frames")
+    parser.add_argument("--todos-frames", action="store_true",
+                        help="emite também os frames sem rostos")
+    args = parser.parse_args()
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    # Mensagens de progresso vão para o stderr; o stdout fica só com o JSON
+    sys.stdout = sys.stderr
+
+    def escrever(linha):
+        saida.write(linha + "\n")
+        saida.flush()
+
+    tipo = tipo_da_fonte(args.fonte)
+    rastrear = not args.sem_rastreamento and tipo != "pasta"
+    inicio = time.perf_counter()
+    try:
+        if args.tempo_real or tipo == "stream":
+            if tipo == "pasta":
+                parser.error("--tempo-real não se aplica a pastas de imagens")
+            executar_tempo_real(args.fonte, tipo, escrever, rastrear, args.todos_frames)
+        else:
+            workers = args.workers or DEEPFACE_CONFIG.get('embedding_workers') or os.cpu_count() or 1
+            executar_vazao_maxima(args.fonte, tipo, escrever, workers, max(1, args.passo),
+                                  rastrear, args.todos_frames)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if saida is not sys.__stdout__:
+            saida.close()
+
+    print(f"✅ Concluído em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+TEMPLATES.PY - Galeria agregada por pessoa (centróide ou k-medoides)
+- Agrupa as fotos da galeria por pessoa: pessoas.id (galerias do banco) ou
+  o nome do arquivo sem o sufixo numérico ('Maria Silva_2.jpg' -> 'maria silva')
+- Cada pessoa vira 1 centróide ou até DEEPFACE_CONFIG['template_medoides'] fotos representativas
+- Busca em dois estágios: consulta contra os templates e, só para as
+  DEEPFACE_CONFIG['template_candidatos'] pessoas mais próximas, contra todas as suas fotos
+- Mesmo contrato de GalleryIndex: (arquivo, distância), então o top-1 continua sendo uma foto
+- Ativada em carregar_galeria por DEEPFACE_CONFIG['gallery_templates'] ("centroide" ou "medoides")
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Configuração de importação segura
+try:
+    from config import DEEPFACE_CONFIG
+except ImportError:
+    PROJECT_ROOT = Path(__file__).parent.parent
+    sys.path.append(str(PROJECT_ROOT))
+    from config import DEEPFACE_CONFIG
+
+from src.ann_index import IVFFlatIndex
+from src.embedding_store import salvar_store
+from src.gallery_index import GalleryIndex, BLOCO_CONVERSAO, normalizar_l2
+
+MODOS_TEMPLATE = ("centroide", "medoides")
+
+# Sufixos de fotos adicionais da mesma pessoa: '_2', ' (3)', '-01', ' 4'
+SUFIXO_FOTO = re.compile(r"([\s_\-.]+\d+|\s*\(\d+\))$")
+
+
+def identidade_do_arquivo(arquivo):
+    """Chave da pessoa a partir do arquivo ('Maria_Silva_2.jpg' -> 'maria silva')."""
+    nome = Path(str(arquivo)).stem
+    nome = SUFIXO_FOTO.sub("", nome) or nome
+    return " ".join(nome.replace("_", " ").split()).casefold()
+
+
+def _medoides(fotos, m, n_iter=5):
+    """Índices de até `m` fotos representativas (k-medoides por cosseno)."""
+    if len(fotos) <= m:
+        return np.arange(len(fotos))
+    similaridades = fotos @ fotos.T
+    # Início: a foto mais central, depois as mais distantes das já escolhidas
+    escolhidas = [int(np.argmax(similaridades.sum(axis=1)))]
+    while len(escolhidas) < m:
+        escolhidas.append(int(np.argmin(similaridades[:, escolhidas].max(axis=1))))
+    escolhidas = np.array(escolhidas)
+    for _ in range(n_iter):
+        rotulos = np.argmax(similaridades[:, escolhidas], axis=1)
+        novas = escolhidas.copy()
+        for cluster in range(m):
+            membros = np.flatnonzero(rotulos == cluster)
+            if len(membros):
+                novas[cluster] = membros[np.argmax(similaridades[np.ix_(membros, membros)].sum(axis=1))]
+        if np.array_equal(novas, escolhidas):
+            break
+        escolhidas = novas
+    return np.unique(escolhidas)
+
+
+class TemplateIndex(IVFFlatIndex):
+    """
+    IVF em que cada lista é uma pessoa: os centróides do IVF são os templates
+    e `nprobe` é o número de pessoas reavaliadas com todas as fotos.
+    """
+
+    backend = "templates"
+
+    def __init__(self, identidades, embeddings, grupos=None, modo=None, medoides=None,
+                 candidatos=None, normalizado=False, pessoa_ids=None, **kwargs):
+        modo = modo or DEEPFACE_CONFIG.get('gallery_templates')
+        if modo in (None, "nenhum"):
+            modo = "centroide"
+        if modo not in MODOS_TEMPLATE:
+            raise ValueError(f"Modo de template desconhecido: {modo}")
+        medoides = medoides or DEEPFACE_CONFIG.get('template_medoides', 3)
+        candidatos = candidatos or DEEPFACE_CONFIG.get('template_candidatos', 10)
+
+        identidades = np.asarray(identidades, dtype=object)
+        if grupos is None:
+            grupos = pessoa_ids if pessoa_ids is not None else [identidade_do_arquivo(i) for i in identidades]
+        grupos = np.asarray([str(g) for g in grupos], dtype=object)
+
+        # Cada pessoa é uma fatia contígua de `ordem`; a matriz fica como veio
+        # (memmap, float16...) e é lida através dessa permutação, sem cópia
+        ordem = np.argsort(grupos, kind="stable")
+        nomes, inicios, contagens = np.unique(grupos[ordem], return_index=True, return_counts=True)
+        offsets = np.append(inicios, len(ordem)).astype(np.int64)
+
+        super().__init__(
+            identidades, embeddings, nprobe=candidatos, centroides=np.empty((0, 0)), offsets=offsets,
+            normalizado=normalizado, pessoa_ids=pessoa_ids, **kwargs
+        )
+        self.ordem = ordem.astype(np.int64)
+        self.modo = modo
+        self.grupos = nomes
+
+        if modo == "centroide":
+            self.centroides = self._centroides(np.repeat(np.arange(len(nomes)), contagens))
+            pessoa_do_template = np.arange(len(nomes))
+        else:
+            templates, pessoa_do_template = [], []
+            for pessoa, (inicio, n) in enumerate(zip(inicios, contagens)):
+                fotos = self._fotos(inicio, inicio + n)
+                escolhidas = _medoides(fotos, medoides)
+                templates.append(fotos[escolhidas])
+                pessoa_do_template.extend([pessoa] * len(escolhidas))
+            self.centroides = np.vstack(templates) if templates else np.empty((0, self.dimensao), np.float32)
+            pessoa_do_template = np.asarray(pessoa_do_template, dtype=np.int64)
+
+        # Templates em ordem de pessoa: o início de cada pessoa na lista de templates
+        self.inicios_templates = np.searchsorted(pessoa_do_template, np.arange(len(nomes))).astype(np.int64)
+
+    def _fotos(self, inicio, fim):
+        """Fotos das posições [inicio, fim) da ordem por pessoa, em float32."""
+        return np.asarray(self.matriz[self.ordem[inicio:fim]], dtype=np.float32)
+
+    def _centroides(self, pessoa_da_posicao):
+        """Média normalizada das fotos de cada pessoa, somada em blocos."""
+        somas = np.zeros((self.nlist, self.dimensao), dtype=np.float32)
+        for inicio in range(0, len(self), BLOCO_CONVERSAO):
+            pessoas = pessoa_da_posicao[inicio:inicio + BLOCO_CONVERSAO]
+            trocas = np.flatnonzero(np.r_[True, pessoas[1:] != pessoas[:-1]])
+            somas[pessoas[trocas]] += np.add.reduceat(self._fotos(inicio, inicio + len(pessoas)), trocas, axis=0)
+        return normalizar_l2(somas)
+
+    @property
+    def nlist(self):
+        return len(self.grupos)
+
+    @property
+    def fotos_por_pessoa(self):
+        return len(self) / self.nlist if self.nlist else 0.0
+
+    def _sondar(self, consultas, nprobe):
+        """As `nprobe` pessoas cujo template mais próximo é o mais similar à consulta."""
+        similaridades = consultas @ self.centroides.T
+        if len(self.centroides) != self.nlist:
+            similaridades = np.maximum.reduceat(similaridades, self.inicios_templates, axis=1)
+        return np.argpartition(-similaridades, nprobe - 1, axis=1)[:, :nprobe]
+
+    def _linhas(self, sondadas):
+        return self.ordem[super()._linhas(sondadas)]
+
+    def salvar(self, caminho):
+        """
+        Grava a galeria plana no formato de embedding_store: os templates
+        são recalculados por agrupar_galeria quando ela é carregada.
+        """
+        return salvar_store(caminho, self.identidades, self.matriz, model_name=self.model_name,
+                            normalizar=False)
+
+
+def agrupar_galeria(galeria, modo=None, **parametros):
+    """
+    Agrega uma galeria de busca exata (GalleryIndex) por pessoa, usando
+    pessoas.id quando a galeria veio do banco. Índices ANN/quantizados não
+    guardam a matriz completa e são devolvidos sem alteração.
+    """
+    if galeria is None or not len(galeria) or type(galeria) is not GalleryIndex:
+        return galeria
+    pessoa_ids = [galeria.pessoas[i] for i in galeria.identidades] if galeria.pessoas else None
+    agrupada = TemplateIndex(
+        galeria.identidades, galeria.matriz, modo=modo, normalizado=True, pessoa_ids=pessoa_ids,
+        limiar=galeria.limiar, model_name=galeria.model_name, **parametros
+    )
+    agrupada.projecao = galeria.projecao
+    return agrupada
@@ -3,48 +3,206 @@ TRAIN.PY - Versão Final Corrigida
 - Corrige problemas com arquivos cascade do OpenCV
 - Configuração otimizada para detecção de faces
 - Tratamento robusto de erros
+- Modo incremental: só gera embeddings de imagens novas ou alteradas
 """
 
 import os
+import argparse
+import hashlib
+import json
 import pickle
 import shutil
-from deepface import DeepFace
 from pathlib import Path
 import sys
 import numpy as np
 from tqdm import tqdm
 import tempfile
-import cv2
 
 # Configuração de caminhos
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
-from config import DIRECTORIES, FILES, DEEPFACE_CONFIG
+from config import DIRECTORIES, FILES, DEEPFACE_CONFIG, initialize_directories
+from src.ann_index import construir_indice_ann
+from src.gallery_index import obter_limiar
+from src.gallery_reload import marcar_versao
+from src.projection import ProjecaoPCA
+from src.embedding_store import salvar_store
+from src.embedding_pipeline import gerar_embeddings, FALHA_IMAGEM_INVALIDA, FALHA_SEM_FACE
+from src.face_detection import verificar_arquivos_cascade
+from src.model_registry import relatorio_de_carga
+
+def salvar_projecao(todas_reps, pca_dim=None):
+    """
+    Ajusta e salva a projeção PCA (DEEPFACE_CONFIG['pca_dim'] dimensões) em
+    FILES['projection']. Sem PCA, remove uma projeção antiga para que o
+    reconhecimento não a aplique a uma galeria nova. Retorna a projeção ou None.
+    """
+    pca_dim = DEEPFACE_CONFIG.get('pca_dim', 0) if pca_dim is None else pca_dim
+    if not pca_dim:
+        FILES['projection'].unlink(missing_ok=True)
+        return None
 
-def verificar_arquivos_cascade():
-    """Verifica e corrige os caminhos dos arquivos cascade do OpenCV."""
     try:
-        # Verifica se os arquivos cascade existem no local padrão
-        cascade_path = Path(cv2.__file__).parent / 'data'
-        frontalface_path = cascade_path / 'haarcascade_frontalface_default.xml'
-        eye_path = cascade_path / 'haarcascade_eye.xml'
-        
-        if not frontalface_path.exists():
-            print(f"⚠️ Arquivo cascade não encontrado: {frontalface_path}")
-            # Tenta encontrar em outro local comum
-            alt_path = Path(sys.prefix) / 'Lib' / 'site-packages' / 'cv2' / 'data'
-            if (alt_path / 'haarcascade_frontalface_default.xml').exists():
-                cascade_path = alt_path
-                print(f"✅ Arquivos cascade encontrados em: {cascade_path}")
-        
-        return str(cascade_path / 'haarcascade_frontalface_default.xml')
+        embeddings = np.vstack([r["representacao"] for r in todas_reps])
+        projecao = ProjecaoPCA.ajustar(embeddings, pca_dim, branquear=DEEPFACE_CONFIG.get('pca_whiten', False))
+        projecao.calibrar_limiar(embeddings, obter_limiar(
+            DEEPFACE_CONFIG.get('model_name', 'VGG-Face'), DEEPFACE_CONFIG.get('distance_metric', 'cosine')
+        ))
+        projecao.salvar(FILES['projection'])
+        print(f"   - Projeção PCA {projecao.entrada} -> {projecao.saida} "
+              f"({projecao.variancia_explicada:.1%} da variância, limiar {projecao.limiar:.3f}) "
+              f"salva em: {FILES['projection']}")
+        return projecao
     except Exception as e:
-        print(f"❌ Erro ao verificar arquivos cascade: {e}")
+        print(f"⚠️ Não foi possível ajustar a projeção PCA: {e}")
+        FILES['projection'].unlink(missing_ok=True)
         return None
 
-def gerar_representacoes():
-    """Gera e salva embeddings faciais com DeepFace."""
+def salvar_indice_ann(todas_reps, projecao=None):
+    """
+    Constrói o índice ANN configurado em DEEPFACE_CONFIG['ann_backend'].
+    Com `projecao`, o índice é construído já no espaço reduzido.
+    Com busca exata ou se a construção falhar, remove um índice antigo, que
+    não corresponderia mais à galeria.
+    """
+    backend = DEEPFACE_CONFIG.get('ann_backend', 'exact')
+    if backend == "exact":
+        FILES['ann_index'].unlink(missing_ok=True)
+        return False
+
+    try:
+        embeddings = np.vstack([r["representacao"] for r in todas_reps])
+        parametros = {}
+        if projecao is not None:
+            embeddings = projecao.aplicar(embeddings)
+            parametros['limiar'] = projecao.limiar
+        indice = construir_indice_ann(
+            [r["arquivo"] for r in todas_reps], embeddings, backend=backend, **parametros
+        )
+        indice.salvar(FILES['ann_index'])
+        print(f"   - Índice ANN ({backend}) salvo em: {FILES['ann_index']}")
+        return True
+    except Exception as e:
+        print(f"⚠️ Não foi possível gerar o índice ANN ({backend}): {e}")
+        FILES['ann_index'].unlink(missing_ok=True)
+        return False
+
+def salvar_no_banco(todas_reps, model_name):
+    """Grava as representações na tabela 'embeddings', ligadas a pessoas.id."""
+    try:
+        from src.embedding_db import sincronizar_embeddings
+        gravados, sem_pessoa = sincronizar_embeddings(
+            [r["arquivo"] for r in todas_reps],
+            np.vstack([r["representacao"] for r in todas_reps]) if todas_reps else np.empty((0, 0)),
+            model_name=model_name
+        )
+        print(f"   - Embeddings no banco: {gravados}")
+        for arquivo in sem_pessoa:
+            print(f"⚠️ Nenhuma pessoa cadastrada para {arquivo} (fora da galeria do banco)")
+        return True
+    except Exception as e:
+        print(f"⚠️ Não foi possível gravar os embeddings no banco: {e}")
+        return False
+
+def calcular_hash(caminho, tamanho_bloco=1 << 20):
+    """Calcula o SHA-256 do conteúdo de um arquivo."""
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+# Chave do manifesto com a configuração dos artefatos derivados (não é uma imagem)
+CHAVE_ARTEFATOS = "_artefatos"
+
+def configuracao_artefatos(pca_dim, banco):
+    """
+    Configuração com que pickle, store, projeção, índice ANN e tabela do banco
+    são gerados. Se mudar, o modo incremental refaz os artefatos (reaproveitando
+    os embeddings) em vez de manter a galeria anterior.
+    """
+    return {
+        'model_name': DEEPFACE_CONFIG.get('model_name', 'VGG-Face'),
+        'store_dtype': DEEPFACE_CONFIG.get('store_dtype', 'float32'),
+        'pca_dim': pca_dim,
+        'pca_whiten': DEEPFACE_CONFIG.get('pca_whiten', False),
+        'ann_backend': DEEPFACE_CONFIG.get('ann_backend', 'exact'),
+        'ann_nlist': DEEPFACE_CONFIG.get('ann_nlist', 0),
+        'pq_subvetores': DEEPFACE_CONFIG.get('pq_subvetores', 64),
+        'banco': bool(banco),
+        'db_embedding_dtype': DEEPFACE_CONFIG.get('db_embedding_dtype', 'float16'),
+    }
+
+def carregar_manifesto():
+    """
+    Carrega o manifesto do último treino.
+    Retorna ({arquivo: metadados}, configuração dos artefatos ou None).
+    """
+    if not FILES['manifest'].exists():
+        return {}, None
+    try:
+        with open(FILES['manifest'], 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Manifesto inválido, reprocessando tudo: {e}")
+        return {}, None
+    return manifesto, manifesto.pop(CHAVE_ARTEFATOS, None)
+
+def salvar_manifesto(manifesto, artefatos=None):
+    """Salva o manifesto de forma atômica (arquivo temporário + rename)."""
+    FILES['manifest'].parent.mkdir(parents=True, exist_ok=True)
+    temporario = FILES['manifest'].with_suffix('.tmp')
+    conteudo = {**manifesto, CHAVE_ARTEFATOS: artefatos} if artefatos else manifesto
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporario, FILES['manifest'])
+
+def carregar_representacoes_existentes():
+    """Carrega o pickle atual como {arquivo: representacao} para reaproveitamento."""
+    if not FILES['representations'].exists():
+        return {}
+    try:
+        with open(FILES['representations'], 'rb') as f:
+            return {r["arquivo"]: r["representacao"] for r in pickle.load(f)}
+    except Exception as e:
+        print(f"⚠️ Não foi possível ler representações existentes: {e}")
+        return {}
+
+def arquivo_inalterado(arquivo, info, entrada, model_name, detector_backend, existentes):
+    """
+    Verifica se o resultado anterior de um arquivo ainda é válido.
+    Compara primeiro tamanho/mtime (barato) e só recorre ao hash se eles mudaram.
+    """
+    if not entrada:
+        return False
+    if entrada.get('model_name') != model_name or entrada.get('detector_backend') != detector_backend:
+        return False
+    if entrada.get('com_face') and arquivo.name not in existentes:
+        return False
+
+    if entrada.get('mtime') == info.st_mtime and entrada.get('tamanho') == info.st_size:
+        return True
+    if entrada.get('hash') == calcular_hash(arquivo):
+        # Conteúdo igual (ex.: arquivo tocado ou copiado): só atualiza o mtime
+        entrada['mtime'] = info.st_mtime
+        entrada['tamanho'] = info.st_size
+        return True
+    return False
+
+def gerar_representacoes(incremental=True, workers=None, batch_size=None, banco=None, pca_dim=None):
+    """
+    Gera e salva embeddings faciais com DeepFace.
+    No modo incremental, só reprocessa imagens novas ou alteradas (segundo o
+    manifesto) e descarta entradas de arquivos removidos; o pickle final é
+    idêntico ao de um processamento completo.
+    Os embeddings são gerados em paralelo (workers) e em lotes (batch_size);
+    por padrão usa DEEPFACE_CONFIG['embedding_workers'/'embedding_batch_size'].
+    Com `banco` (padrão: DEEPFACE_CONFIG['gallery_source'] == "mysql"), a
+    galeria também é gravada na tabela 'embeddings' (src/embedding_db.py).
+    Com `pca_dim` (padrão: DEEPFACE_CONFIG['pca_dim']), ajusta também a
+    projeção PCA aplicada pelo reconhecimento (src/projection.py).
+    """
     # Verifica arquivos cascade
     cascade_file = verificar_arquivos_cascade()
     if not cascade_file:
@@ -56,91 +214,187 @@ def gerar_representacoes():
         print(f"❌ Diretório de imagens não encontrado: {DIRECTORIES['faces']}")
         return False
 
+    # Configurações do DeepFace otimizadas
+    model_name = DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
+    # O mesmo detector das consultas (recognition_service), como o DeepFace.find fazia
+    detector_backend = DEEPFACE_CONFIG.get('detector_backend', 'opencv')
+    align = True
+
+    imagens = [
+        arquivo for arquivo in DIRECTORIES['faces'].iterdir()
+        if arquivo.suffix.lower() in ('.jpg', '.jpeg', '.png')
+    ]
+    if not imagens:
+        print("❌ Nenhuma imagem válida encontrada no diretório de faces")
+        return False
+
+    manifesto_anterior, artefatos_anteriores = carregar_manifesto() if incremental else ({}, None)
+    existentes = carregar_representacoes_existentes() if incremental else {}
+
+    # Separa imagens reaproveitáveis das que precisam de novo embedding
+    manifesto = {}
+    pendentes = []
+    for arquivo in imagens:
+        info = arquivo.stat()
+        entrada = manifesto_anterior.get(arquivo.name)
+        if arquivo_inalterado(arquivo, info, entrada, model_name, detector_backend, existentes):
+            manifesto[arquivo.name] = entrada
+        else:
+            pendentes.append(arquivo)
+
+    removidos = set(manifesto_anterior) - {arquivo.name for arquivo in imagens}
+    print(f"🔍 Encontradas {len(imagens)} imagens: {len(pendentes)} novas/alteradas, "
+          f"{len(imagens) - len(pendentes)} reaproveitadas, {len(removidos)} removidas")
+
+    # Mudanças de PCA, índice ANN, store ou banco também exigem refazer os artefatos
+    pca_dim = DEEPFACE_CONFIG.get('pca_dim', 0) if pca_dim is None else pca_dim
+    banco = DEEPFACE_CONFIG.get('gallery_source') == "mysql" if banco is None else banco
+    artefatos = configuracao_artefatos(pca_dim, banco)
+    if incremental and not pendentes and not removidos and artefatos == artefatos_anteriores \
+            and FILES['representations'].exists() and FILES['store'].with_suffix('.emb').exists() \
+            and FILES['projection'].exists() == bool(pca_dim):
+        salvar_manifesto(manifesto, artefatos)
+        print("✅ Nenhuma alteração na galeria. Representações mantidas.")
+        return True
+
+    novas = {}
+    processados = 0
+    erros = 0
+
     # Cria um diretório temporário para cópias seguras das imagens
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_dir_path = Path(temp_dir)
         
-        # Lista arquivos de imagem válidos e cria cópias com nomes seguros
+        # Cria cópias com nomes seguros apenas das imagens pendentes
         arquivos_seguros = []
-        for arquivo in DIRECTORIES['faces'].iterdir():
-            if arquivo.suffix.lower() in ('.jpg', '.jpeg', '.png'):
-                # Cria um nome de arquivo seguro (sem caracteres especiais)
-                nome_seguro = f"temp_{len(arquivos_seguros)}{arquivo.suffix}"
-                caminho_seguro = temp_dir_path / nome_seguro
-                
-                # Copia o arquivo para o diretório temporário
-                shutil.copy2(arquivo, caminho_seguro)
-                arquivos_seguros.append({
-                    'original': arquivo.name,
-                    'temp_path': caminho_seguro
-                })
-
-        if not arquivos_seguros:
-            print("❌ Nenhuma imagem válida encontrada no diretório de faces")
-            return False
-
-        print(f"🔍 Encontradas {len(arquivos_seguros)} imagens para processamento")
-
-        todas_reps = []
-        processados = 0
-        erros = 0
-
-        # Configurações do DeepFace otimizadas
-        model_name = DEEPFACE_CONFIG.get('model_name', 'VGG-Face')
-        detector_backend = 'mtcnn'  # Mais robusto que opencv
-        enforce_detection = False  # Permite processar mesmo sem detecção
-        align = True
+        for arquivo in pendentes:
+            # Cria um nome de arquivo seguro (sem caracteres especiais)
+            nome_seguro = f"temp_{len(arquivos_seguros)}{arquivo.suffix}"
+            caminho_seguro = temp_dir_path / nome_seguro
+            
+            # Copia o arquivo para o diretório temporário
+            shutil.copy2(arquivo, caminho_seguro)
+            arquivos_seguros.append({
+                'original': arquivo.name,
+                'temp_path': caminho_seguro,
+                'stat': arquivo.stat(),
+                'hash': calcular_hash(caminho_seguro)
+            })
+
+        # Detecção em paralelo e inferência em lotes, na ordem de entrada
+        resultados = gerar_embeddings(
+            [arquivo['temp_path'] for arquivo in arquivos_seguros],
+            model_name=model_name,
+            detector_backend=detector_backend,
+            align=align,
+            workers=workers,
+            batch_size=batch_size
+        ) if arquivos_seguros else []
 
         # Processa imagens com barra de progresso
-        for arquivo in tqdm(arquivos_seguros, desc="Processando imagens"):
-            try:
-                # Verifica se a imagem é válida antes de processar
-                img = cv2.imread(str(arquivo['temp_path']))
-                if img is None:
-                    print(f"⚠️ Imagem inválida: {arquivo['original']}")
-                    erros += 1
-                    continue
-
-                # Gera representação facial usando o caminho temporário seguro
-                reps = DeepFace.represent(
-                    img_path=str(arquivo['temp_path']),
-                    model_name=model_name,
-                    detector_backend=detector_backend,
-                    enforce_detection=enforce_detection,
-                    align=align
-                )
-
-                if reps:
-                    todas_reps.append({
-                        "arquivo": arquivo['original'],  # Usa o nome original
-                        "representacao": np.array(reps[0]["embedding"])
-                    })
-                    processados += 1
-                else:
-                    print(f"⚠️ Nenhuma face detectada em: {arquivo['original']}")
-                    erros += 1
-
-            except Exception as e:
-                print(f"❌ Erro ao processar {arquivo['original']}: {str(e)}")
+        for indice, embedding, motivo in tqdm(resultados, total=len(arquivos_seguros),
+                                              desc="Processando imagens"):
+            arquivo = arquivos_seguros[indice]
+            entrada = {
+                'hash': arquivo['hash'],
+                'mtime': arquivo['stat'].st_mtime,
+                'tamanho': arquivo['stat'].st_size,
+                'model_name': model_name,
+                'detector_backend': detector_backend,
+                'com_face': embedding is not None
+            }
+
+            if embedding is not None:
+                novas[arquivo['original']] = embedding
+                manifesto[arquivo['original']] = entrada
+                processados += 1
+            elif motivo in (FALHA_IMAGEM_INVALIDA, FALHA_SEM_FACE):
+                print(f"⚠️ {motivo.capitalize()}: {arquivo['original']}")
+                manifesto[arquivo['original']] = entrada
+                erros += 1
+            else:
+                # Erros inesperados não entram no manifesto: o arquivo é tentado de novo
+                print(f"❌ Erro ao processar {arquivo['original']}: {motivo}")
                 erros += 1
 
-        # Salva representações se houve sucesso
-        if todas_reps:
-            # Garante que o diretório existe
-            FILES['representations'].parent.mkdir(parents=True, exist_ok=True)
-            
-            # Salva em formato pickle
-            with open(FILES['representations'], 'wb') as f:
-                pickle.dump(todas_reps, f, protocol=pickle.HIGHEST_PROTOCOL)
-
-            print(f"\n✅ Processamento concluído com sucesso!")
-            print(f"   - Imagens processadas: {processados}")
-            print(f"   - Erros encontrados: {erros}")
-            print(f"   - Arquivo salvo em: {FILES['representations']}")
-            return True
+        if arquivos_seguros:
+            print(f"⏱️ {relatorio_de_carga()}")
+
+    # Monta a lista final na ordem do diretório, como no processamento completo
+    todas_reps = []
+    for arquivo in imagens:
+        if arquivo.name in novas:
+            representacao = novas[arquivo.name]
+        elif arquivo.name in manifesto and manifesto[arquivo.name].get('com_face'):
+            representacao = existentes[arquivo.name]
         else:
-            print("\n❌ Nenhuma representação foi gerada")
-            return False
+            continue
+        todas_reps.append({
+            "arquivo": arquivo.name,  # Usa o nome original
+            "representacao": representacao
+        })
+
+    # Salva sempre, mesmo vazia: uma galeria antiga não pode continuar em uso
+    # depois que todas as suas imagens saíram ou ficaram sem rosto
+    identidades = [r["arquivo"] for r in todas_reps]
+    matriz = np.vstack([r["representacao"] for r in todas_reps]) if todas_reps \
+        else np.empty((0, 0), dtype=np.float32)
+
+    # Garante que o diretório existe
+    FILES['representations'].parent.mkdir(parents=True, exist_ok=True)
+
+    # Salva em formato pickle
+    with open(FILES['representations'], 'wb') as f:
+        pickle.dump(todas_reps, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Galeria memmap usada pelo reconhecimento (recognize.py)
+    salvar_store(FILES['store'], identidades, matriz, model_name=model_name)
+
+    # Projeção PCA e índice ANN opcionais, a partir das mesmas representações
+    if todas_reps:
+        projecao = salvar_projecao(todas_reps, pca_dim)
+        if not salvar_indice_ann(todas_reps, projecao) and artefatos['ann_backend'] != "exact":
+            # Índice não gerado: o próximo treino tenta de novo
+            artefatos['ann_backend'] = None
+    else:
+        FILES['projection'].unlink(missing_ok=True)
+        FILES['ann_index'].unlink(missing_ok=True)
+
+    # Uma sincronização que falhou é tentada de novo no próximo treino
+    if banco:
+        artefatos['banco'] = salvar_no_banco(todas_reps, model_name)
+    salvar_manifesto(manifesto, artefatos)
+
+    # Por último: reconhecimento e API em execução recarregam a galeria ao ver a nova versão
+    versao = marcar_versao(len(todas_reps), model_name)
+
+    if not todas_reps:
+        print("\n❌ Nenhuma representação foi gerada")
+        print(f"   - Galeria vazia salva em: {FILES['representations']} (versão {versao})")
+        return False
+
+    print(f"\n✅ Processamento concluído com sucesso!")
+    print(f"   - Imagens processadas: {processados}")
+    print(f"   - Imagens reaproveitadas: {len(todas_reps) - processados}")
+    print(f"   - Erros encontrados: {erros}")
+    print(f"   - Arquivo salvo em: {FILES['representations']}")
+    print(f"   - Galeria memmap: {FILES['store'].with_suffix('.emb')}")
+    print(f"   - Versão da galeria: {versao}")
+    return True
 
 if __name__ == "__main__":
-    gerar_representacoes()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gera as representações faciais da galeria")
+    parser.add_argument("--completo", action="store_true",
+                        help="ignora o manifesto e reprocessa todas as imagens")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos de detecção (padrão: número de CPUs)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="rostos por forward pass do modelo")
+    parser.add_argument("--banco", action="store_true", default=None,
+                        help="grava também a galeria na tabela 'embeddings' do MySQL")
+    parser.add_argument("--pca-dim", type=int, default=None,
+                        help="dimensões da projeção PCA (0 desativa; padrão: DEEPFACE_CONFIG['pca_dim'])")
+    args = parser.parse_args()
+    initialize_directories()
+    gerar_representacoes(incremental=not args.completo, workers=args.workers,
+                         batch_size=args.batch_size, banco=args.banco, pca_dim=args.pca_dim)
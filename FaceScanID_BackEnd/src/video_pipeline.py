@@ -0,0 +1,232 @@
+"""
+VIDEO_PIPELINE.PY - Pipeline de vídeo em estágios paralelos
+- Captura, detecção e reconhecimento em threads dedicadas
+- Estágios ligados por filas limitadas que descartam o item mais antigo
+- A exibição lê apenas o frame mais recente e o último resultado conhecido
+- Frames atrasados nunca se acumulam: cada estágio roda no próprio ritmo
+- Abertura de câmeras/streams com o backend nativo de cada sistema
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+def abrir_camera(indice=0, largura=None, altura=None, fps=None):
+    """Abre uma câmera local com o backend nativo (DirectShow no Windows, V4L2 no Linux)."""
+    if sys.platform.startswith("win"):
+        backend = cv2.CAP_DSHOW
+    elif sys.platform.startswith("linux"):
+        backend = cv2.CAP_V4L2
+    else:
+        backend = cv2.CAP_ANY
+    cap = cv2.VideoCapture(indice, backend)
+    if largura:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, largura)
+    if altura:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, altura)
+    if fps:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    return cap
+
+
+def abrir_captura(fonte):
+    """Abre um índice de câmera ("0"), dispositivo V4L2, arquivo de vídeo ou URL (RTSP/HTTP)."""
+    fonte = str(fonte)
+    if fonte.isdigit():
+        return abrir_camera(int(fonte))
+    if fonte.startswith("/dev/video"):
+        return cv2.VideoCapture(fonte, cv2.CAP_V4L2)
+    return cv2.VideoCapture(fonte)
+
+
+class DropOldestQueue:
+    """Fila limitada: ao encher, o item mais antigo é descartado (nunca bloqueia quem produz)."""
+
+    def __init__(self, tamanho=1):
+        self._itens = deque(maxlen=max(1, tamanho))
+        self._condicao = threading.Condition()
+        self._fechada = False
+        self.descartados = 0
+
+    def put(self, item):
+        with self._condicao:
+            if len(self._itens) == self._itens.maxlen:
+                self.descartados += 1
+            self._itens.append(item)
+            self._condicao.notify()
+
+    def get(self, timeout=None):
+        """Retira o item mais antigo; None se a fila for fechada ou o timeout expirar."""
+        with self._condicao:
+            if not self._condicao.wait_for(lambda: self._itens or self._fechada, timeout):
+                return None
+            return self._itens.popleft() if self._itens else None
+
+    def close(self):
+        with self._condicao:
+            self._fechada = True
+            self._condicao.notify_all()
+
+
+class StageStats:
+    """Contador de itens processados por estágio, com taxa média (itens/s)."""
+
+    def __init__(self):
+        self.itens = 0
+        self.segundos = 0.0
+        self.inicio = time.perf_counter()
+
+    def registrar(self, segundos):
+        self.itens += 1
+        self.segundos += segundos
+
+    @property
+    def fps(self):
+        decorrido = time.perf_counter() - self.inicio
+        return self.itens / decorrido if decorrido else 0.0
+
+    @property
+    def latencia_ms(self):
+        return self.segundos / self.itens * 1000 if self.itens else 0.0
+
+
+class FramePipeline:
+    """
+    Captura -> detecção -> reconhecimento, cada estágio em sua thread.
+
+    - ler_frame(): retorna (ok, frame), como cv2.VideoCapture.read
+    - detectar(frame): retorna os rostos detectados no frame
+    - identificar(frame, faces): retorna a lista de resultados exibida pela UI
+    - preprocessar(frame): opcional (ex.: zoom), aplicado logo após a captura
+    - ao_reconhecer(numero, instante, anotacoes): opcional, chamado para cada
+      frame reconhecido (número sequencial e instante da captura, em time.time())
+
+    A exibição consulta ultimo_resultado(), que devolve o frame mais recente
+    e as anotações do último frame reconhecido.
+    """
+
+    def __init__(self, ler_frame, detectar, identificar, preprocessar=None,
+                 tamanho_fila=1, validade_resultado=1.0, ao_reconhecer=None):
+        self.ler_frame = ler_frame
+        self.detectar = detectar
+        self.identificar = identificar
+        self.preprocessar = preprocessar
+        self.ao_reconhecer = ao_reconhecer
+        # Anotações mais antigas que isso deixam de ser desenhadas
+        self.validade_resultado = validade_resultado
+
+        self.fila_deteccao = DropOldestQueue(tamanho_fila)
+        self.fila_reconhecimento = DropOldestQueue(tamanho_fila)
+        self.stats = {"captura": StageStats(), "deteccao": StageStats(), "reconhecimento": StageStats()}
+
+        self._lock = threading.Lock()
+        self._ultimo_frame = None  # (frame original, frame pré-processado)
+        self._resultado = (None, [], 0.0)  # (nº do frame, anotações, instante)
+        self._parar = threading.Event()
+        self._threads = []
+        self.erro = None
+
+    @property
+    def ativo(self):
+        return not self._parar.is_set() and any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        self._parar.clear()
+        self._threads = [
+            threading.Thread(target=self._capturar, name="pipeline-captura", daemon=True),
+            threading.Thread(target=self._detectar, name="pipeline-deteccao", daemon=True),
+            threading.Thread(target=self._reconhecer, name="pipeline-reconhecimento", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._parar.set()
+        self.fila_deteccao.close()
+        self.fila_reconhecimento.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+
+    def _capturar(self):
+        numero = 0
+        while not self._parar.is_set():
+            inicio = time.perf_counter()
+            ok, frame = self.ler_frame()
+            instante = time.time()
+            if not ok:
+                self.erro = "Erro ao capturar frame"
+                self._parar.set()
+                self.fila_deteccao.close()
+                break
+            original = frame
+            if self.preprocessar is not None:
+                frame = self.preprocessar(frame)
+            numero += 1
+            with self._lock:
+                self._ultimo_frame = (original, frame)
+            self.fila_deteccao.put((numero, instante, frame))
+            self.stats["captura"].registrar(time.perf_counter() - inicio)
+
+    def _detectar(self):
+        while not self._parar.is_set():
+            item = self.fila_deteccao.get(timeout=0.5)
+            if item is None:
+                continue
+            numero, instante, frame = item
+            inicio = time.perf_counter()
+            try:
+                faces = self.detectar(frame)
+            except Exception as e:
+                print(f"Erro na detecção: {e}")
+                faces = []
+            self.stats["deteccao"].registrar(time.perf_counter() - inicio)
+            self.fila_reconhecimento.put((numero, instante, frame, faces))
+
+    def _reconhecer(self):
+        while not self._parar.is_set():
+            item = self.fila_reconhecimento.get(timeout=0.5)
+            if item is None:
+                continue
+            numero, instante, frame, faces = item
+            inicio = time.perf_counter()
+            try:
+                # Também sem rostos: o rastreador precisa ver o tempo passar para expirar trilhas
+                anotacoes = self.identificar(frame, faces)
+            except Exception as e:
+                print(f"Erro no reconhecimento: {e}")
+                anotacoes = []
+            self.stats["reconhecimento"].registrar(time.perf_counter() - inicio)
+            with self._lock:
+                self._resultado = (numero, anotacoes, time.monotonic())
+            if self.ao_reconhecer is not None:
+                self.ao_reconhecer(numero, instante, anotacoes)
+
+    def ultimo_frame(self):
+        """Frame original mais recente (sem pré-processamento), ou None."""
+        with self._lock:
+            return self._ultimo_frame[0] if self._ultimo_frame else None
+
+    def ultimo_resultado(self):
+        """Retorna (frame pré-processado mais recente, anotações ainda válidas)."""
+        with self._lock:
+            frame = self._ultimo_frame[1] if self._ultimo_frame else None
+            _, anotacoes, instante = self._resultado
+        if time.monotonic() - instante > self.validade_resultado:
+            anotacoes = []
+        return frame, anotacoes
+
+    def estatisticas(self):
+        """Taxa, latência média e descartes de cada estágio."""
+        resumo = {
+            nome: {"fps": round(stats.fps, 1), "latencia_ms": round(stats.latencia_ms, 1)}
+            for nome, stats in self.stats.items()
+        }
+        resumo["deteccao"]["descartados"] = self.fila_deteccao.descartados
+        resumo["reconhecimento"]["descartados"] = self.fila_reconhecimento.descartados
+        return resumo
@@ -0,0 +1,106 @@
+"""
+TEST_ANN_INDEX.PY - Testes dos índices aproximados (src/ann_index.py)
+- IVF: listas contíguas, sondando todas as listas o resultado é o exato
+- IVF e HNSW (se hnswlib estiver instalado): recall contra a busca exata
+- salvar/carregar_indice_ann devolvem o mesmo resultado
+- Backend "exact" e backend desconhecido
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ann_index import IVFFlatIndex, carregar_indice_ann, construir_indice_ann
+from src.gallery_index import GalleryIndex, normalizar_l2
+
+
+@pytest.fixture
+def dados():
+    # 400 rostos em 20 pessoas (grupos) e consultas próximas de rostos da galeria
+    rng = np.random.default_rng(0)
+    centros = rng.normal(size=(20, 32))
+    embeddings = normalizar_l2(np.repeat(centros, 20, axis=0) + 0.3 * rng.normal(size=(400, 32)))
+    consultas = embeddings[::40] + 0.05 * rng.normal(size=(10, 32))
+    identidades = [f"pessoa{i // 20}_{i % 20}.jpg" for i in range(400)]
+    return identidades, embeddings, consultas
+
+
+def _top1(indice, consultas):
+    return [resultado[0][0] if resultado else None for resultado in indice.search_batch(consultas, k=1)]
+
+
+def test_ivf_listas_contiguas(dados):
+    identidades, embeddings, _ = dados
+    indice = IVFFlatIndex(identidades, embeddings, nlist=8, limiar=2.0)
+    assert indice.nlist == 8
+    assert indice.offsets[0] == 0 and indice.offsets[-1] == len(indice)
+    assert sorted(indice.identidades) == sorted(identidades)
+    # Cada linha está na lista do seu centróide mais próximo
+    rotulos = np.argmax(indice.matriz @ indice.centroides.T, axis=1)
+    assert np.all(np.diff(rotulos) >= 0)
+
+
+def test_ivf_todas_as_listas_igual_ao_exato(dados):
+    identidades, embeddings, consultas = dados
+    exata = GalleryIndex(identidades, embeddings, limiar=2.0)
+    indice = IVFFlatIndex(identidades, embeddings, nlist=8, nprobe=8, limiar=2.0)
+    for esperado, obtido in zip(exata.search_batch(consultas, k=5), indice.search_batch(consultas, k=5)):
+        np.testing.assert_allclose([d for _, d in obtido], [d for _, d in esperado], atol=1e-5)
+
+
+def test_ivf_recall_com_poucas_listas(dados):
+    identidades, embeddings, consultas = dados
+    exata = GalleryIndex(identidades, embeddings, limiar=2.0)
+    indice = IVFFlatIndex(identidades, embeddings, nlist=16, nprobe=4, limiar=2.0)
+    acertos = np.mean([a == b for a, b in zip(_top1(exata, consultas), _top1(indice, consultas))])
+    assert acertos >= 0.9
+
+
+def test_ivf_limiar(dados):
+    identidades, embeddings, consultas = dados
+    indice = IVFFlatIndex(identidades, embeddings, nlist=8, limiar=0.05)
+    for resultado in indice.search_batch(consultas, k=10):
+        assert all(distancia <= 0.05 for _, distancia in resultado)
+
+
+def test_ivf_salvar_e_carregar(tmp_path, dados):
+    identidades, embeddings, consultas = dados
+    indice = IVFFlatIndex(identidades, embeddings, nlist=8, limiar=0.8, model_name="Facenet")
+    indice.salvar(tmp_path / "ann.npz")
+
+    carregado = carregar_indice_ann(tmp_path / "ann.npz")
+    assert isinstance(carregado, IVFFlatIndex)
+    assert carregado.model_name == "Facenet" and carregado.limiar == pytest.approx(0.8)
+    carregado.nprobe = indice.nprobe
+    assert carregado.search_batch(consultas, k=3) == indice.search_batch(consultas, k=3)
+
+
+def test_hnsw_recall_e_salvar(tmp_path, dados):
+    pytest.importorskip("hnswlib")
+    identidades, embeddings, consultas = dados
+    exata = GalleryIndex(identidades, embeddings, limiar=2.0)
+    indice = construir_indice_ann(identidades, embeddings, backend="hnsw", limiar=2.0)
+    acertos = np.mean([a == b for a, b in zip(_top1(exata, consultas), _top1(indice, consultas))])
+    assert acertos >= 0.9
+
+    indice.salvar(tmp_path / "ann.npz")
+    assert (tmp_path / "ann.hnsw").exists()
+    carregado = carregar_indice_ann(tmp_path / "ann.npz")
+    assert carregado.dimensao == 32
+    assert _top1(carregado, consultas) == _top1(indice, consultas)
+
+
+def test_backend_exato_e_desconhecido(dados):
+    identidades, embeddings, _ = dados
+    assert type(construir_indice_ann(identidades, embeddings, backend="exact")) is GalleryIndex
+    with pytest.raises(ValueError):
+        construir_indice_ann(identidades, embeddings, backend="lsh")
+
+
+def test_galeria_vazia():
+    indice = IVFFlatIndex([], np.empty((0, 0)), limiar=0.5)
+    assert indice.search_batch(np.ones((2, 4)), k=1) == [[], []]
@@ -0,0 +1,200 @@
+"""
+TEST_BULK_IMPORT.PY - Testes da importação em massa (src/bulk_import.py)
+- Linhas rejeitadas: campos obrigatórios, JSON inválido, não-objeto, booleano inválido
+- Linha que viola uma restrição é isolada sem perder o resto do lote
+- Relatório: diagnósticos limitados e arquivo NDJSON com todas as rejeitadas
+- Queda de conexão: o lote é refeito em uma conexão nova, sem rejeitar linhas
+Conexões sqlite3 atrás do ConnectionPool (db_pool.py), com os erros do mysql.connector.
+"""
+
+import io
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+from mysql.connector import IntegrityError, OperationalError
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db_pool import ConnectionPool
+from src import bulk_import
+from src.bulk_import import (
+    PERFIL_API, PERFIL_CADASTRO, RelatorioImportacao, importar_arquivo, importar_stream
+)
+
+
+class CursorFalso:
+    """Cursor sqlite3 com placeholders %s e erros traduzidos para os do MySQL."""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.cursor = conexao.conn.cursor()
+
+    def _executar(self, metodo, sql, valores):
+        if self.conexao.banco.quedas:
+            self.conexao.banco.quedas -= 1
+            self.conexao.morta = True
+            raise OperationalError("Lost connection to MySQL server during query")
+        try:
+            metodo(sql.replace("%s", "?"), valores)
+        except sqlite3.IntegrityError as e:
+            raise IntegrityError(str(e))
+
+    def execute(self, sql, valores=()):
+        self._executar(self.cursor.execute, sql, valores)
+
+    def executemany(self, sql, valores):
+        self._executar(self.cursor.executemany, sql, valores)
+
+    def close(self):
+        self.cursor.close()
+
+
+class ConexaoFalsa:
+    """Conexão que, depois de cair, falha também no rollback (como a do MySQL)."""
+
+    def __init__(self, banco):
+        self.banco = banco
+        self.conn = sqlite3.connect(banco.caminho, check_same_thread=False)
+        self.morta = False
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        if self.morta:
+            raise OperationalError("MySQL Connection not available")
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+class BancoFalso:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.quedas = 0
+        self.conexoes = []
+
+    def conectar(self):
+        conexao = ConexaoFalsa(self)
+        self.conexoes.append(conexao)
+        return conexao
+
+    def cpfs(self):
+        with sqlite3.connect(self.caminho) as conn:
+            return [linha[0] for linha in conn.execute("SELECT cpf FROM pessoas ORDER BY rowid")]
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    caminho = tmp_path / "pessoas.db"
+    conn = sqlite3.connect(caminho)
+    conn.execute(f"CREATE TABLE pessoas ({', '.join(PERFIL_CADASTRO.campos)}, UNIQUE (cpf))")
+    conn.commit()
+    conn.close()
+
+    banco = BancoFalso(caminho)
+    pool = ConnectionPool(banco.conectar, tamanho=2, timeout=1.0)
+    monkeypatch.setattr(bulk_import, "conexao", pool.conexao)
+    return banco
+
+
+def _csv(*linhas):
+    return io.StringIO("nome_completo,cpf\n" + "".join(f"{nome},{cpf}\n" for nome, cpf in linhas))
+
+
+def test_importa_em_lotes(banco):
+    relatorio = importar_stream(_csv(*[(f"Pessoa {i}", f"{i:011d}") for i in range(7)]), "csv", tamanho_lote=3)
+    assert (relatorio.inseridos, relatorio.total_rejeitados, relatorio.lotes) == (7, 0, 3)
+    assert len(banco.cpfs()) == 7
+
+
+def test_rejeita_campos_obrigatorios(banco):
+    relatorio = importar_stream(_csv(("Maria Silva", "111"), ("", "222"), ("João Souza", "  ")), "csv")
+    assert relatorio.inseridos == 1
+    assert [linha for linha, _ in relatorio.rejeitados] == [3, 4]
+    assert "nome_completo" in relatorio.rejeitados[0][1]
+    assert "cpf" in relatorio.rejeitados[1][1]
+
+
+def test_rejeita_json_invalido_e_nao_objeto(banco):
+    ndjson = io.StringIO(
+        '{"nome_completo": "Maria Silva", "cpf": "111"}\n'
+        '\n'
+        '{"nome_completo": "sem fechar"\n'
+        '["Maria", "111"]\n'
+        '{"nome_completo": "João Souza", "cpf": "222"}\n'
+    )
+    relatorio = importar_stream(ndjson, "ndjson")
+    assert relatorio.inseridos == 2
+    assert relatorio.rejeitados == [(3, "JSON inválido"), (4, "Registro não é um objeto")]
+
+
+def test_booleano_invalido():
+    booleano = next(campo for campo in PERFIL_API.campos if campo in PERFIL_API.booleanos)
+    registro = {"nome_completo": "Maria Silva", "doc_identidade": "123"}
+
+    valores, motivo = PERFIL_API.converter({**registro, booleano: "Sim"})
+    assert motivo is None and valores[PERFIL_API.campos.index(booleano)] == 1
+    valores, motivo = PERFIL_API.converter({**registro, booleano: "talvez"})
+    assert valores is None and booleano in motivo
+
+
+def test_restricao_isola_apenas_a_linha(banco):
+    relatorio = importar_stream(_csv(("A", "1"), ("B", "2"), ("Duplicada", "1"), ("C", "3")), "csv",
+                                tamanho_lote=10)
+    assert relatorio.inseridos == 3
+    assert [linha for linha, _ in relatorio.rejeitados] == [4]
+    assert banco.cpfs() == ["1", "2", "3"]
+
+
+def test_relatorio_grava_todas_as_rejeitadas(banco, monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_DIAGNOSTICOS", 2)
+    saida = io.StringIO()
+    relatorio = importar_stream(_csv(*[("", str(i)) for i in range(5)]), "csv",
+                                relatorio=RelatorioImportacao(saida))
+
+    assert relatorio.total_rejeitados == 5
+    assert len(relatorio.rejeitados) == 2
+    linhas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert [linha["linha"] for linha in linhas] == [2, 3, 4, 5, 6]
+    resumo = relatorio.como_dict()
+    assert resumo["rejeitados"] == 5 and len(resumo["diagnosticos"]) == 2
+
+
+def test_queda_de_conexao_refaz_o_lote(banco):
+    banco.quedas = 1
+    relatorio = importar_stream(_csv(*[(f"Pessoa {i}", str(i)) for i in range(5)]), "csv", tamanho_lote=3)
+
+    assert (relatorio.inseridos, relatorio.total_rejeitados) == (5, 0)
+    assert banco.cpfs() == ["0", "1", "2", "3", "4"]
+    # A conexão que caiu foi descartada e o lote foi refeito em uma nova
+    assert len(banco.conexoes) == 2
+
+
+def test_queda_persistente_propaga_sem_rejeitar(banco):
+    importar_stream(_csv(("A", "1")), "csv")
+    banco.quedas = bulk_import.TENTATIVAS_LOTE
+    relatorio = RelatorioImportacao()
+    with pytest.raises(OperationalError):
+        importar_stream(_csv(("B", "2"), ("C", "3")), "csv", relatorio=relatorio)
+
+    assert relatorio.total_rejeitados == 0
+    assert banco.cpfs() == ["1"]
+
+
+def test_importar_arquivo_deduz_formato(banco, tmp_path):
+    arquivo = tmp_path / "pessoas.ndjson"
+    arquivo.write_text('{"nome_completo": "Zoë", "cpf": "9"}\n', encoding="utf-8")
+    assert importar_arquivo(arquivo).inseridos == 1
+    assert banco.cpfs() == ["9"]
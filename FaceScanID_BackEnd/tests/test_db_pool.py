@@ -0,0 +1,119 @@
+"""
+TEST_DB_POOL.PY - Testes do ConnectionPool (db_pool.py) com conexões sqlite3
+- Reuso de conexões devolvidas
+- PoolEsgotadoError quando o timeout de espera estoura
+- Conexão morta substituída ao ser retirada
+- Rollback de transações pendentes na devolução
+- raise_on_warnings ligado só dentro do bloco que o pede
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db_pool import ConnectionPool, PoolEsgotadoError
+
+
+@pytest.fixture
+def banco(tmp_path):
+    caminho = tmp_path / "pool.db"
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE pessoas (id INTEGER PRIMARY KEY, nome TEXT)")
+    conn.commit()
+    conn.close()
+    return caminho
+
+
+@pytest.fixture
+def criadas(banco):
+    """Fábrica de conexões sqlite3 que registra cada conexão criada."""
+    lista = []
+
+    def fabrica():
+        conn = sqlite3.connect(banco, check_same_thread=False)
+        lista.append(conn)
+        return conn
+
+    fabrica.lista = lista
+    return fabrica
+
+
+def test_reusa_conexao_devolvida(criadas):
+    pool = ConnectionPool(criadas, tamanho=2, timeout=0.1)
+    with pool.conexao() as primeira:
+        pass
+    with pool.conexao() as segunda:
+        assert segunda is primeira
+    assert len(criadas.lista) == 1
+
+
+def test_pool_esgotado_apos_timeout(criadas):
+    pool = ConnectionPool(criadas, tamanho=1, timeout=0.05)
+    conn = pool.obter()
+    with pytest.raises(PoolEsgotadoError):
+        pool.obter()
+    pool.devolver(conn)
+    # A vaga liberada volta a ser usada
+    assert pool.obter() is conn
+
+
+def test_substitui_conexao_morta(criadas):
+    pool = ConnectionPool(criadas, tamanho=1, timeout=0.1, ociosidade_ping=0.0)
+    with pool.conexao() as morta:
+        pass
+    morta.close()
+    with pool.conexao() as nova:
+        assert nova is not morta
+        assert nova.execute("SELECT 1").fetchone() == (1,)
+    assert len(criadas.lista) == 2
+
+
+def test_rollback_na_devolucao(criadas):
+    pool = ConnectionPool(criadas, tamanho=1, timeout=0.1)
+    conn = pool.obter()
+    conn.execute("INSERT INTO pessoas (nome) VALUES ('Maria')")
+    assert conn.in_transaction
+    pool.devolver(conn)
+
+    with pool.conexao() as mesma:
+        assert mesma is conn
+        assert not mesma.in_transaction
+        assert mesma.execute("SELECT COUNT(*) FROM pessoas").fetchone() == (0,)
+
+
+def test_rollback_quando_o_bloco_falha(criadas):
+    pool = ConnectionPool(criadas, tamanho=1, timeout=0.1)
+    with pytest.raises(RuntimeError):
+        with pool.conexao() as conn:
+            conn.execute("INSERT INTO pessoas (nome) VALUES ('João')")
+            raise RuntimeError("falha no meio da transação")
+
+    with pool.conexao() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM pessoas").fetchone() == (0,)
+
+
+class ConexaoComAvisos:
+    """Imita os atributos de aviso do mysql.connector sobre uma conexão sqlite3."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.raise_on_warnings = False
+        self.get_warnings = False
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+def test_raise_on_warnings_apenas_no_bloco(banco):
+    pool = ConnectionPool(lambda: ConexaoComAvisos(sqlite3.connect(banco)), tamanho=1, timeout=0.1)
+    with pool.conexao(raise_on_warnings=True) as conn:
+        assert conn.raise_on_warnings
+    assert not conn.raise_on_warnings and not conn.get_warnings
+    with pytest.raises(RuntimeError):
+        with pool.conexao(raise_on_warnings=True) as conn:
+            raise RuntimeError("falha")
+    assert not conn.raise_on_warnings
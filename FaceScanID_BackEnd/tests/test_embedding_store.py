@@ -0,0 +1,145 @@
+"""
+TEST_EMBEDDING_STORE.PY - Testes da galeria memmap (src/embedding_store.py)
+- Ida e volta de identidades (UTF-8) e matriz em float32/float16
+- Galeria vazia
+- Ordem de troca dos arquivos: .emb antes de .ids
+- Par .emb/.ids de gravações diferentes detectado na abertura
+- Galerias gravadas antes da marca continuam abrindo
+- Conversão dos pickles legados
+"""
+
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import embedding_store
+from src.embedding_store import (
+    EmbeddingStore, TAMANHO_CABECALHO, converter_pickle, ler_cabecalho, salvar_store
+)
+from src.gallery_index import GalleryIndex, normalizar_l2
+
+IDENTIDADES = ["Maria Silva.jpg", "João_Souza_2.png", "Zoë (3).jpeg"]
+
+
+@pytest.fixture
+def embeddings():
+    return np.random.default_rng(0).normal(size=(3, 8)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_ida_e_volta(tmp_path, embeddings, dtype):
+    salvar_store(tmp_path / "galeria", IDENTIDADES, embeddings, model_name="Facenet", dtype=dtype)
+    store = EmbeddingStore(tmp_path / "galeria")
+    assert len(store) == 3
+    assert store.model_name == "Facenet"
+    assert store.normalizado
+    assert store.identidades() == IDENTIDADES
+    assert store.identidade(1) == "João_Souza_2.png"
+    assert store.matriz.dtype == np.dtype(dtype)
+    np.testing.assert_allclose(store.matriz, normalizar_l2(embeddings), atol=1e-3)
+
+
+def test_sem_normalizar_guarda_os_valores(tmp_path, embeddings):
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings, normalizar=False, dtype="float32")
+    store = EmbeddingStore(tmp_path / "g")
+    assert not store.normalizado
+    np.testing.assert_array_equal(store.matriz, embeddings)
+
+
+def test_dtype_invalido(tmp_path, embeddings):
+    with pytest.raises(ValueError):
+        salvar_store(tmp_path / "g", IDENTIDADES, embeddings, dtype="int8")
+
+
+def test_quantidades_diferentes(tmp_path, embeddings):
+    with pytest.raises(ValueError):
+        salvar_store(tmp_path / "g", IDENTIDADES[:2], embeddings)
+
+
+def test_galeria_vazia(tmp_path):
+    salvar_store(tmp_path / "vazia", [], np.empty((0, 0), dtype=np.float32))
+    galeria = GalleryIndex.from_store(tmp_path / "vazia", limiar=0.5)
+    assert len(galeria) == 0
+    assert galeria.search_batch(np.ones((1, 4)), k=1) == [[]]
+
+
+def test_cabecalho_alinhado_e_extras(tmp_path, embeddings):
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings, extras={"origem": "teste"})
+    assert (tmp_path / "g.emb").stat().st_size == TAMANHO_CABECALHO + embeddings.size * 4
+    cabecalho = ler_cabecalho(tmp_path / "g")
+    assert cabecalho["origem"] == "teste"
+    assert cabecalho["quantidade"] == 3 and cabecalho["dimensao"] == 8
+
+
+def test_troca_emb_antes_de_ids(tmp_path, embeddings, monkeypatch):
+    trocas = []
+    substituir = os.replace
+
+    def registrar(origem, destino):
+        trocas.append(Path(destino).suffix)
+        substituir(origem, destino)
+
+    monkeypatch.setattr(embedding_store.os, "replace", registrar)
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings)
+    assert trocas == [".emb", ".ids"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_par_misturado_e_detectado(tmp_path, embeddings, monkeypatch):
+    # Simula a queda entre as duas trocas: .emb novo com o .ids anterior
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings)
+    ids_antigo = (tmp_path / "g.ids").read_bytes()
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings * 2)
+    (tmp_path / "g.ids").write_bytes(ids_antigo)
+
+    monkeypatch.setattr(embedding_store.time, "sleep", lambda segundos: None)
+    with pytest.raises(ValueError, match="outra gravação"):
+        EmbeddingStore(tmp_path / "g")
+
+
+def test_quantidade_inconsistente_e_detectada(tmp_path, embeddings, monkeypatch):
+    salvar_store(tmp_path / "g", IDENTIDADES[:2], embeddings[:2])
+    ids_antigo = (tmp_path / "g.ids").read_bytes()
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings)
+    (tmp_path / "g.ids").write_bytes(ids_antigo)
+
+    monkeypatch.setattr(embedding_store.time, "sleep", lambda segundos: None)
+    with pytest.raises(ValueError, match="inconsistente"):
+        EmbeddingStore(tmp_path / "g")
+
+
+def test_galeria_sem_marca_abre(tmp_path, embeddings):
+    # Formato anterior à marca: sem "marca" no cabeçalho nem bytes extras no .ids
+    salvar_store(tmp_path / "g", IDENTIDADES, embeddings)
+    emb = tmp_path / "g.emb"
+    dados = emb.read_bytes()
+    cabecalho = json.loads(dados[:TAMANHO_CABECALHO].decode("utf-8"))
+    del cabecalho["marca"]
+    bruto = json.dumps(cabecalho).encode("utf-8").ljust(TAMANHO_CABECALHO, b" ")
+    emb.write_bytes(bruto + dados[TAMANHO_CABECALHO:])
+    ids = tmp_path / "g.ids"
+    ids.write_bytes(ids.read_bytes()[:-8])
+
+    assert EmbeddingStore(tmp_path / "g").identidades() == IDENTIDADES
+
+
+@pytest.mark.parametrize("formato", ["dicts", "tuplas"])
+def test_converter_pickle(tmp_path, embeddings, formato):
+    if formato == "dicts":
+        registros = [{"arquivo": i, "representacao": e.tolist()} for i, e in zip(IDENTIDADES, embeddings)]
+    else:
+        registros = list(zip(IDENTIDADES, embeddings))
+    with open(tmp_path / "legado.pkl", "wb") as f:
+        pickle.dump(registros, f)
+
+    converter_pickle(tmp_path / "legado.pkl", tmp_path / "g", dtype="float32", model_name="VGG-Face")
+    store = EmbeddingStore(tmp_path / "g")
+    assert store.identidades() == IDENTIDADES
+    np.testing.assert_allclose(store.matriz, normalizar_l2(embeddings), atol=1e-6)
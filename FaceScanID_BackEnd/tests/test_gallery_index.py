@@ -0,0 +1,84 @@
+"""
+TEST_GALLERY_INDEX.PY - Testes da busca exata do GalleryIndex (src/gallery_index.py)
+- Ordem por distância de cosseno e desempate pela ordem da galeria
+- Limiar de distância aplicado a cada resultado
+- Galeria vazia e k maior que a galeria
+- Matriz float16 convertida em blocos com o mesmo resultado
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import gallery_index
+from src.gallery_index import GalleryIndex, normalizar_l2
+
+
+@pytest.fixture
+def galeria():
+    # Quatro rostos em direções conhecidas (2-d): distância de cosseno exata
+    embeddings = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [-1.0, 0.0]])
+    return GalleryIndex(["a.jpg", "b.jpg", "ab.jpg", "menos_a.jpg"], embeddings, limiar=1.5,
+                        model_name="VGG-Face")
+
+
+def test_normalizar_l2_mantem_linhas_nulas():
+    matriz = normalizar_l2([[3.0, 4.0], [0.0, 0.0]])
+    assert matriz.dtype == np.float32
+    np.testing.assert_allclose(matriz, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_search_batch_ordena_por_distancia(galeria):
+    resultados = galeria.search_batch(np.array([[2.0, 0.0], [0.0, 5.0]]), k=3)
+    assert [identidade for identidade, _ in resultados[0]] == ["a.jpg", "ab.jpg", "b.jpg"]
+    assert [identidade for identidade, _ in resultados[1]] == ["b.jpg", "ab.jpg", "a.jpg"]
+    distancias = [distancia for _, distancia in resultados[0]]
+    np.testing.assert_allclose(distancias, [0.0, 1 - np.sqrt(0.5), 1.0], atol=1e-6)
+
+
+def test_search_batch_aplica_limiar():
+    embeddings = np.array([[1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    galeria = GalleryIndex(["a", "ab", "b"], embeddings, limiar=0.5)
+    # "b" está a distância 1.0: fica de fora mesmo com k=3
+    assert [identidade for identidade, _ in galeria.search([1.0, 0.0], k=3)] == ["a", "ab"]
+
+
+def test_empates_seguem_a_ordem_da_galeria():
+    embeddings = np.array([[0.0, 1.0], [1.0, 0.0], [1.0, 0.0], [1.0, 0.0]])
+    galeria = GalleryIndex(["x", "primeiro", "segundo", "terceiro"], embeddings, limiar=1.0)
+    assert [identidade for identidade, _ in galeria.search([1.0, 0.0], k=3)] == \
+        ["primeiro", "segundo", "terceiro"]
+
+
+def test_k_maior_que_a_galeria(galeria):
+    assert len(galeria.search([0.0, 1.0], k=10)) == len(galeria)
+
+
+def test_galeria_vazia():
+    galeria = GalleryIndex([], np.empty((0, 0)), limiar=0.5)
+    assert len(galeria) == 0
+    assert galeria.dimensao == 0
+    assert galeria.search_batch(np.ones((2, 8)), k=1) == [[], []]
+
+
+def test_float16_em_blocos_igual_ao_float32(monkeypatch):
+    rng = np.random.default_rng(0)
+    embeddings = normalizar_l2(rng.normal(size=(50, 16)))
+    consultas = rng.normal(size=(5, 16))
+    exata = GalleryIndex([f"p{i}" for i in range(50)], embeddings, limiar=2.0)
+    compacta = GalleryIndex([f"p{i}" for i in range(50)], embeddings.astype(np.float16),
+                            limiar=2.0, normalizado=True)
+    # Blocos menores que a galeria exercitam a conversão parcial
+    monkeypatch.setattr(gallery_index, "BLOCO_CONVERSAO", 7)
+    for esperado, obtido in zip(exata.search_batch(consultas, k=5), compacta.search_batch(consultas, k=5)):
+        assert [i for i, _ in obtido] == [i for i, _ in esperado]
+        np.testing.assert_allclose([d for _, d in obtido], [d for _, d in esperado], atol=2e-3)
+
+
+def test_pessoa_ids_por_identidade():
+    galeria = GalleryIndex(["a", "b"], np.eye(2), limiar=0.5, pessoa_ids=[7, 9])
+    assert galeria.pessoas == {"a": 7, "b": 9}
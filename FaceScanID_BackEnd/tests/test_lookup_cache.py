@@ -0,0 +1,163 @@
+"""
+TEST_LOOKUP_CACHE.PY - Testes do cache de /buscar (src/lookup_cache.py)
+- Chave sem diferença de caixa e com underscores como espaços
+- TTL, remoção por LRU e "não encontrado" guardado
+- Geração: busca iniciada antes de uma invalidação não grava
+- Arquivo SQLite compartilhado entre instâncias (workers)
+- invalidar_buscas para quem grava fora da API
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import lookup_cache
+from src.lookup_cache import LookupCache, criar_cache_de_ambiente, invalidar_buscas, normalizar_chave
+
+
+class Relogio:
+    """Substitui time.time() do módulo para avançar o tempo sem esperar."""
+
+    def __init__(self):
+        self.agora = 1_000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(lookup_cache.time, "time", relogio)
+    return relogio
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def novo_cache(request, tmp_path):
+    def criar(**kwargs):
+        if request.param == "sqlite":
+            kwargs.setdefault("arquivo_compartilhado", tmp_path / "busca.sqlite")
+        return LookupCache(**kwargs)
+    return criar
+
+
+def test_normalizar_chave():
+    assert normalizar_chave("Maria_Silva") == normalizar_chave("MARIA SILVA")
+    assert normalizar_chave("Ana  Silva") != normalizar_chave("Ana Silva")
+
+
+def test_acerto_e_nao_encontrado(novo_cache, relogio):
+    cache = novo_cache()
+    assert cache.obter("Maria Silva") == (False, None)
+    cache.guardar("Maria Silva", {"id": 1})
+    cache.guardar("Ninguém", None)
+
+    assert cache.obter("maria_silva") == (True, {"id": 1})
+    assert cache.obter("NINGUÉM") == (True, None)
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["faltas"], estatisticas["entradas"]) == (2, 1, 2)
+
+
+def test_ttl_expira(novo_cache, relogio):
+    cache = novo_cache(ttl=10)
+    cache.guardar("Maria Silva", {"id": 1})
+    relogio.agora += 9
+    assert cache.obter("Maria Silva")[0]
+    relogio.agora += 2
+    assert cache.obter("Maria Silva") == (False, None)
+    assert cache.estatisticas()["expirados"] == 1
+    assert cache.estatisticas()["entradas"] == 0
+
+
+def test_lru_remove_a_menos_recente(novo_cache, relogio):
+    cache = novo_cache(capacidade=2)
+    cache.guardar("a", 1)
+    relogio.agora += 1
+    cache.guardar("b", 2)
+    relogio.agora += 1
+    # Ler "a" a torna mais recente que "b"
+    assert cache.obter("a") == (True, 1)
+    relogio.agora += 1
+    cache.guardar("c", 3)
+
+    assert cache.obter("b") == (False, None)
+    assert cache.obter("a") == (True, 1)
+    assert cache.obter("c") == (True, 3)
+    assert cache.estatisticas()["removidos_lru"] == 1
+
+
+def test_geracao_antiga_nao_grava(novo_cache, relogio):
+    cache = novo_cache()
+    geracao = cache.geracao
+    # Uma inserção invalida o nome enquanto a busca consultava o banco
+    cache.invalidar("Maria Silva")
+    assert cache.geracao != geracao
+    cache.guardar("Maria Silva", None, geracao=geracao)
+    assert cache.obter("Maria Silva") == (False, None)
+
+    cache.guardar("Maria Silva", {"id": 1}, geracao=cache.geracao)
+    assert cache.obter("Maria Silva") == (True, {"id": 1})
+
+
+def test_invalidar_e_limpar(novo_cache, relogio):
+    cache = novo_cache()
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    cache.invalidar("A")
+    assert cache.obter("a") == (False, None)
+    cache.limpar()
+    assert cache.estatisticas()["entradas"] == 0
+    assert cache.estatisticas()["invalidacoes"] == 2
+
+
+def test_sqlite_compartilhado_entre_workers(tmp_path, relogio):
+    arquivo = tmp_path / "busca.sqlite"
+    worker_1 = LookupCache(arquivo_compartilhado=arquivo)
+    worker_2 = LookupCache(arquivo_compartilhado=arquivo)
+
+    geracao = worker_1.geracao
+    worker_1.guardar("Maria Silva", {"nascimento": "1990-01-01"})
+    assert worker_2.obter("maria silva") == (True, {"nascimento": "1990-01-01"})
+
+    # Invalidação em um worker descarta a gravação atrasada do outro
+    worker_2.invalidar("Maria Silva")
+    assert worker_1.geracao == worker_2.geracao != geracao
+    worker_1.guardar("Maria Silva", None, geracao=geracao)
+    assert worker_1.obter("Maria Silva") == (False, None)
+    assert worker_2.estatisticas()["compartilhado"]
+
+
+def test_criar_cache_de_ambiente(monkeypatch, tmp_path):
+    monkeypatch.setenv("CACHE_BUSCA_TAMANHO", "0")
+    assert criar_cache_de_ambiente() is None
+
+    monkeypatch.setenv("CACHE_BUSCA_TAMANHO", "5")
+    monkeypatch.setenv("CACHE_BUSCA_TTL", "2.5")
+    monkeypatch.setenv("CACHE_BUSCA_ARQUIVO", str(tmp_path / "busca.sqlite"))
+    cache = criar_cache_de_ambiente()
+    assert (cache.capacidade, cache.ttl) == (5, 2.5)
+    assert cache.estatisticas()["compartilhado"]
+
+
+def test_invalidar_buscas(monkeypatch, tmp_path, relogio):
+    monkeypatch.delenv("CACHE_BUSCA_TAMANHO", raising=False)
+    monkeypatch.setenv("CACHE_BUSCA_ARQUIVO", str(tmp_path / "busca.sqlite"))
+    cache = criar_cache_de_ambiente()
+    cache.guardar("Maria Silva", None)
+    cache.guardar("João Souza", None)
+
+    invalidar_buscas(["maria_silva"])
+    assert cache.obter("Maria Silva") == (False, None)
+    assert cache.obter("João Souza") == (True, None)
+
+    invalidar_buscas()
+    assert cache.obter("João Souza") == (False, None)
+
+
+def test_invalidar_buscas_sem_arquivo_nao_faz_nada(monkeypatch):
+    monkeypatch.delenv("CACHE_BUSCA_ARQUIVO", raising=False)
+    monkeypatch.setattr(lookup_cache, "criar_cache_de_ambiente", lambda: pytest.fail("não deveria criar cache"))
+    invalidar_buscas(["Maria Silva"])
@@ -0,0 +1,120 @@
+"""
+TEST_PROJECTION.PY - Testes da projeção PCA (src/projection.py)
+- ajustar: componentes ortonormais e variância explicada
+- Branqueamento: componentes projetados com variância unitária
+- calibrar_limiar aceita a mesma fração de pares no espaço reduzido
+- salvar/carregar e carregar_projecao com arquivo ausente ou inválido
+- projetar_galeria projeta a galeria e as consultas
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.gallery_index import GalleryIndex, normalizar_l2
+from src.projection import ProjecaoPCA, carregar_projecao, projetar_galeria
+
+
+@pytest.fixture
+def embeddings():
+    # 300 vetores de 32-d que vivem quase todos num subespaço de 6 dimensões
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(6, 32))
+    return rng.normal(size=(300, 6)) @ base + 0.01 * rng.normal(size=(300, 32))
+
+
+def test_ajustar_componentes_ortonormais(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 6)
+    assert (projecao.entrada, projecao.saida) == (32, 6)
+    assert not projecao.branqueada
+    np.testing.assert_allclose(projecao.componentes.T @ projecao.componentes, np.eye(6), atol=1e-5)
+    assert projecao.variancia_explicada > 0.99
+
+
+def test_dimensao_limitada_pela_entrada(embeddings):
+    assert ProjecaoPCA.ajustar(embeddings[:10], 64).saida == 10
+
+
+def test_aplicar_preserva_distancias_no_subespaco(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 6)
+    reduzidos = projecao.aplicar(embeddings)
+    assert reduzidos.shape == (300, 6) and reduzidos.dtype == np.float32
+
+    # No subespaço que contém os dados, as distâncias euclidianas se mantêm
+    originais = normalizar_l2(embeddings) - projecao.media
+    distancias_originais = ((originais[:20, None] - originais[None]) ** 2).sum(axis=2)
+    distancias_reduzidas = ((reduzidos[:20, None] - reduzidos[None]) ** 2).sum(axis=2)
+    np.testing.assert_allclose(distancias_reduzidas, distancias_originais, atol=1e-3)
+
+
+def test_aplicar_aceita_float16(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 6)
+    np.testing.assert_allclose(projecao.aplicar(embeddings.astype(np.float16)), projecao.aplicar(embeddings),
+                               atol=5e-3)
+
+
+def test_branqueamento_variancia_unitaria(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 6, branquear=True)
+    assert projecao.branqueada
+    np.testing.assert_allclose(projecao.aplicar(embeddings).var(axis=0, ddof=1), np.ones(6), rtol=1e-3)
+
+
+def test_calibrar_limiar_mantem_a_fracao_de_pares(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 3)
+    limiar = projecao.calibrar_limiar(embeddings, 0.4)
+    assert projecao.limiar == limiar
+
+    pares = ~np.eye(len(embeddings), dtype=bool)
+    originais = normalizar_l2(embeddings)
+    reduzidos = normalizar_l2(projecao.aplicar(embeddings))
+    fracao_original = np.mean((1.0 - originais @ originais.T)[pares] <= 0.4)
+    fracao_reduzida = np.mean((1.0 - reduzidos @ reduzidos.T)[pares] <= limiar)
+    assert fracao_reduzida == pytest.approx(fracao_original, abs=0.01)
+
+
+def test_calibrar_limiar_sem_pares_aceitos(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 3)
+    assert projecao.calibrar_limiar(embeddings, -1.0) == -1.0
+
+
+def test_salvar_e_carregar(tmp_path, embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 4, branquear=True)
+    projecao.calibrar_limiar(embeddings, 0.4)
+    projecao.salvar(tmp_path / "sub" / "pca.npz")
+
+    carregada = carregar_projecao(tmp_path / "sub" / "pca.npz")
+    np.testing.assert_array_equal(carregada.componentes, projecao.componentes)
+    np.testing.assert_array_equal(carregada.escalas, projecao.escalas)
+    assert carregada.limiar == pytest.approx(projecao.limiar)
+    assert carregada.variancia_explicada == pytest.approx(projecao.variancia_explicada)
+
+
+def test_carregar_projecao_ausente_ou_invalida(tmp_path):
+    assert carregar_projecao(tmp_path / "nao_existe.npz") is None
+    (tmp_path / "quebrada.npz").write_bytes(b"nada")
+    assert carregar_projecao(tmp_path / "quebrada.npz") is None
+
+
+def test_projetar_galeria(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 6)
+    projecao.limiar = 0.3
+    galeria = GalleryIndex([f"p{i}.jpg" for i in range(300)], embeddings, limiar=0.6,
+                           pessoa_ids=list(range(300)))
+
+    projetada = projetar_galeria(galeria, projecao)
+    assert projetada.dimensao == 6
+    assert projetada.limiar == pytest.approx(0.3)
+    assert projetada.pessoas["p5.jpg"] == 5
+    # Consultas com a dimensão original são projetadas na busca
+    assert projetada.search(embeddings[5], k=1)[0][0] == "p5.jpg"
+
+
+def test_projetar_galeria_incompativel(embeddings):
+    projecao = ProjecaoPCA.ajustar(embeddings, 6)
+    galeria = GalleryIndex(["a.jpg"], np.ones((1, 10)), limiar=0.5)
+    assert projetar_galeria(galeria, projecao).projecao is None
+    assert projetar_galeria(galeria, None) is galeria
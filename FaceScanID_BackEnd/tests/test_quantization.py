@@ -0,0 +1,98 @@
+"""
+TEST_QUANTIZATION.PY - Testes das galerias comprimidas (src/quantization.py)
+- float16, int8 e PQ: top-1 e distâncias próximos da busca exata
+- Memória ocupada menor que a matriz float32
+- salvar/carregar_indice_ann devolvem o mesmo resultado
+- Galeria vazia
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ann_index import carregar_indice_ann, construir_indice_ann
+from src.gallery_index import GalleryIndex, normalizar_l2
+from src.quantization import BACKENDS_QUANTIZADOS, Float16Index, PQIndex, ScalarInt8Index
+
+# Tolerância de distância por backend (PQ com 16 sub-vetores é o mais grosseiro)
+TOLERANCIAS = {"float16": 2e-3, "int8": 2e-2, "pq": 0.15}
+
+
+@pytest.fixture
+def dados():
+    rng = np.random.default_rng(0)
+    centros = rng.normal(size=(50, 64))
+    embeddings = normalizar_l2(np.repeat(centros, 6, axis=0) + 0.3 * rng.normal(size=(300, 64)))
+    consultas = embeddings[::15] + 0.05 * rng.normal(size=(20, 64))
+    identidades = [f"rosto_{i}.jpg" for i in range(300)]
+    return identidades, embeddings, consultas
+
+
+def _construir(backend, identidades, embeddings, **kwargs):
+    if backend == "pq":
+        kwargs.setdefault("m", 16)
+    return construir_indice_ann(identidades, embeddings, backend=backend, limiar=2.0, **kwargs)
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS_QUANTIZADOS))
+def test_proximo_da_busca_exata(dados, backend):
+    identidades, embeddings, consultas = dados
+    exata = GalleryIndex(identidades, embeddings, limiar=2.0)
+    indice = _construir(backend, identidades, embeddings)
+    assert isinstance(indice, BACKENDS_QUANTIZADOS[backend])
+
+    esperados = exata.search_batch(consultas, k=1)
+    obtidos = indice.search_batch(consultas, k=1)
+    acertos = np.mean([e[0][0] == o[0][0] for e, o in zip(esperados, obtidos)])
+    assert acertos >= 0.9
+    distancias_exatas = exata.search_batch(consultas, k=len(exata))
+    for (identidade, distancia), completa in zip([o[0] for o in obtidos], distancias_exatas):
+        exata_da_identidade = dict(completa)[identidade]
+        assert distancia == pytest.approx(exata_da_identidade, abs=TOLERANCIAS[backend])
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS_QUANTIZADOS))
+def test_memoria_menor_que_float32(dados, backend):
+    identidades, embeddings, _ = dados
+    indice = _construir(backend, identidades, embeddings)
+    assert indice.memoria() < embeddings.astype(np.float32).nbytes
+    assert indice.dimensao == 64
+
+
+def test_int8_codigos_cobrem_o_intervalo(dados):
+    identidades, embeddings, _ = dados
+    indice = ScalarInt8Index(identidades, embeddings)
+    assert indice.codigos.dtype == np.uint8
+    assert indice.codigos.min() == 0 and indice.codigos.max() == 255
+    reconstruida = indice.minimo + indice.passo * indice.codigos
+    np.testing.assert_allclose(reconstruida, embeddings, atol=float(indice.passo.max()))
+
+
+def test_pq_dimensao_nao_multipla(dados):
+    identidades, embeddings, consultas = dados
+    indice = PQIndex(identidades, embeddings[:, :60], m=16, limiar=2.0)
+    assert indice.m == 16 and indice.dimensao == 60
+    assert len(indice.search_batch(consultas[:, :60], k=3)[0]) == 3
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS_QUANTIZADOS))
+def test_salvar_e_carregar(tmp_path, dados, backend):
+    identidades, embeddings, consultas = dados
+    indice = _construir(backend, identidades, embeddings, model_name="ArcFace")
+    indice.salvar(tmp_path / "ann.npz")
+
+    carregado = carregar_indice_ann(tmp_path / "ann.npz")
+    assert type(carregado) is type(indice)
+    assert carregado.model_name == "ArcFace"
+    assert carregado.search_batch(consultas, k=3) == indice.search_batch(consultas, k=3)
+
+
+@pytest.mark.parametrize("classe", [Float16Index, ScalarInt8Index, PQIndex])
+def test_galeria_vazia(classe):
+    indice = classe([], np.empty((0, 0)), limiar=0.5)
+    assert len(indice) == 0
+    assert indice.search_batch(np.ones((1, 4)), k=1) == [[]]
@@ -0,0 +1,113 @@
+"""
+TEST_TEMPLATES.PY - Testes da galeria agregada por pessoa (src/templates.py)
+- identidade_do_arquivo remove os sufixos de fotos adicionais
+- Centróide e k-medoides por pessoa
+- Busca em dois estágios com o mesmo top-1 da busca exata
+- agrupar_galeria usa pessoas.id e deixa índices ANN como vieram
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ann_index import IVFFlatIndex
+from src.embedding_store import EmbeddingStore
+from src.gallery_index import GalleryIndex, normalizar_l2
+from src.templates import TemplateIndex, _medoides, agrupar_galeria, identidade_do_arquivo
+
+
+@pytest.fixture
+def dados():
+    # 30 pessoas com 5 fotos cada; a foto extra de cada pessoa leva sufixo no nome
+    rng = np.random.default_rng(1)
+    centros = rng.normal(size=(30, 64))
+    embeddings = normalizar_l2(np.repeat(centros, 5, axis=0) + 0.4 * rng.normal(size=(150, 64)))
+    nomes = [f"Pessoa {chr(65 + p // 26)}{chr(65 + p % 26)}" for p in range(30)]
+    identidades = [f"{nomes[i // 5]}.jpg" if i % 5 == 0 else f"{nomes[i // 5]}_{i % 5}.jpg"
+                   for i in range(150)]
+    consultas = normalizar_l2(centros + 0.4 * rng.normal(size=(30, 64)))
+    return identidades, embeddings, consultas
+
+
+@pytest.mark.parametrize("arquivo, esperado", [
+    ("Maria Silva.jpg", "maria silva"),
+    ("Maria_Silva_2.jpg", "maria silva"),
+    ("Maria Silva (3).png", "maria silva"),
+    ("maria-silva-01.jpeg", "maria-silva"),
+    ("data/faces/MARIA  SILVA 4.jpg", "maria silva"),
+    ("123.jpg", "123"),
+])
+def test_identidade_do_arquivo(arquivo, esperado):
+    assert identidade_do_arquivo(arquivo) == esperado
+
+
+def test_centroide_por_pessoa(dados):
+    identidades, embeddings, _ = dados
+    indice = TemplateIndex(identidades, embeddings, modo="centroide", limiar=2.0)
+    assert indice.nlist == 30
+    assert indice.fotos_por_pessoa == pytest.approx(5.0)
+    posicao = list(indice.grupos).index("pessoa ad")
+    esperado = normalizar_l2(embeddings[15:20].sum(axis=0, keepdims=True))[0]
+    np.testing.assert_allclose(indice.centroides[posicao], esperado, atol=1e-5)
+
+
+def test_medoides_escolhe_fotos_da_pessoa():
+    fotos = normalizar_l2(np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9], [0.7, 0.7]]))
+    escolhidas = _medoides(fotos, 2)
+    assert len(escolhidas) == 2
+    # Um representante de cada direção
+    assert {int(np.argmax(fotos[i])) for i in escolhidas} == {0, 1}
+    np.testing.assert_array_equal(_medoides(fotos[:2], 3), [0, 1])
+
+
+def test_dois_estagios_igual_ao_exato(dados):
+    identidades, embeddings, consultas = dados
+    exata = GalleryIndex(identidades, embeddings, limiar=2.0)
+    esperados = [r[0][0] for r in exata.search_batch(consultas, k=1)]
+    for modo in ("centroide", "medoides"):
+        indice = TemplateIndex(identidades, embeddings, modo=modo, medoides=2, candidatos=5, limiar=2.0)
+        obtidos = [r[0][0] for r in indice.search_batch(consultas, k=1)]
+        assert obtidos == esperados
+
+
+def test_todos_os_candidatos_reordena_igual_ao_exato(dados):
+    identidades, embeddings, consultas = dados
+    exata = GalleryIndex(identidades, embeddings, limiar=2.0)
+    indice = TemplateIndex(identidades, embeddings, modo="centroide", candidatos=30, limiar=2.0)
+    for esperado, obtido in zip(exata.search_batch(consultas, k=4), indice.search_batch(consultas, k=4)):
+        assert [i for i, _ in obtido] == [i for i, _ in esperado]
+        np.testing.assert_allclose([d for _, d in obtido], [d for _, d in esperado], atol=1e-5)
+
+
+def test_modo_desconhecido(dados):
+    identidades, embeddings, _ = dados
+    with pytest.raises(ValueError):
+        TemplateIndex(identidades, embeddings, modo="mediana")
+
+
+def test_agrupar_galeria_por_pessoa_id():
+    # Nomes de arquivo diferentes, mesma pessoa no banco
+    galeria = GalleryIndex(["a.jpg", "b.jpg", "c.jpg"], np.eye(3), limiar=0.5, pessoa_ids=[7, 7, 9])
+    agrupada = agrupar_galeria(galeria, modo="centroide")
+    assert isinstance(agrupada, TemplateIndex)
+    assert list(agrupada.grupos) == ["7", "9"]
+
+
+def test_agrupar_galeria_mantem_ann(dados):
+    identidades, embeddings, _ = dados
+    ivf = IVFFlatIndex(identidades, embeddings, nlist=4)
+    assert agrupar_galeria(ivf) is ivf
+    assert agrupar_galeria(None) is None
+
+
+def test_salvar_grava_galeria_plana(tmp_path, dados):
+    identidades, embeddings, _ = dados
+    indice = TemplateIndex(identidades, embeddings, modo="centroide", model_name="ArcFace")
+    indice.salvar(tmp_path / "g")
+    store = EmbeddingStore(tmp_path / "g")
+    assert store.identidades() == identidades
+    assert store.model_name == "ArcFace"